@@ -0,0 +1,377 @@
+"""
+Micro-benchmarks for the local retrieval stack (vector store, embedder, rerankers, chunkers).
+
+Run `python benchmark_retrieval.py <benchmark> --help` for the options of each
+benchmark. Results are printed as one dict per configuration.
+"""
+
+import argparse
+import random
+import tempfile
+import os
+import time
+import tracemalloc
+from typing import Dict, List
+
+from {{ cookiecutter.project_slug }}.data_loaders.chunking import CHUNKING_STRATEGIES, chunk_text
+from {{ cookiecutter.project_slug }}.embeddings.embedder import Embedder
+from {{ cookiecutter.project_slug }}.embeddings.embedding_cache import EmbeddingCache
+from {{ cookiecutter.project_slug }}.reranker.lexical_reranker import LexicalReranker
+from {{ cookiecutter.project_slug }}.reranker.reranker import Reranker
+from {{ cookiecutter.project_slug }}.vectordatabase.vector_store import InMemoryVectorStore
+
+
+def synthetic_corpus(docs: int, vocabulary: int = 5000, words_per_doc: int = 40, seed: int = 0) -> List[str]:
+    """
+    Build a reproducible corpus whose documents share topic vocabularies.
+    """
+    rng = random.Random(seed)
+    words = [f"term{idx}" for idx in range(vocabulary)]
+    topics = [rng.sample(words, 200) for _ in range(max(1, vocabulary // 100))]
+    corpus = []
+    for _ in range(docs):
+        topic = rng.choice(topics)
+        corpus.append(" ".join(rng.choice(topic) if rng.random() < 0.7 else rng.choice(words) for _ in range(words_per_doc)))
+    return corpus
+
+
+def _ids(hits: List[Dict]) -> List[int]:
+    return [hit["metadata"]["id"] for hit in hits]
+
+
+def _time_queries(store: InMemoryVectorStore, queries: List[str], top_k: int):
+    results = []
+    started = time.perf_counter()
+    for query in queries:
+        results.append(_ids(store.search(query, top_k=top_k, indexes=["bench"])))
+    latency_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    return results, latency_ms
+
+
+def _recall(approximate: List[List[int]], exact: List[List[int]]) -> float:
+    found = sum(len(set(a) & set(e)) for a, e in zip(approximate, exact))
+    total = sum(len(e) for e in exact)
+    return found / total if total else 1.0
+
+
+def _exact_baseline(args):
+    corpus = synthetic_corpus(args.docs)
+    queries = [" ".join(doc.split()[:8]) for doc in synthetic_corpus(args.queries, seed=1)]
+    metadatas = [{"id": idx} for idx in range(len(corpus))]
+
+    exact_store = InMemoryVectorStore()
+    exact_store.add_documents(corpus, metadatas=metadatas, index="bench")
+    exact, exact_ms = _time_queries(exact_store, queries, args.top_k)
+    print({"engine": "flat", "docs": args.docs, "recall": 1.0, "latency_ms": round(exact_ms, 3)})
+    return corpus, metadatas, queries, exact, exact_ms
+
+
+def bench_ivf(args) -> None:
+    corpus, metadatas, queries, exact, exact_ms = _exact_baseline(args)
+    ivf_store = InMemoryVectorStore(index_config={"type": "ivf", "nlist": args.nlist})
+    ivf_store.add_documents(corpus, metadatas=metadatas, index="bench")
+    ivf = ivf_store._stores["bench"].ann
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        approximate, latency_ms = _time_queries(ivf_store, queries, args.top_k)
+        print(
+            {
+                "engine": "ivf",
+                "nlist": args.nlist,
+                "nprobe": nprobe,
+                "recall": round(_recall(approximate, exact), 4),
+                "latency_ms": round(latency_ms, 3),
+                "speedup": round(exact_ms / latency_ms, 2),
+            }
+        )
+
+
+def bench_hnsw(args) -> None:
+    corpus, metadatas, queries, exact, exact_ms = _exact_baseline(args)
+    hnsw_store = InMemoryVectorStore(
+        index_config={"type": "hnsw", "m": args.m, "ef_construction": args.ef_construction}
+    )
+    started = time.perf_counter()
+    hnsw_store.add_documents(corpus, metadatas=metadatas, index="bench")
+    build_s = time.perf_counter() - started
+    hnsw = hnsw_store._stores["bench"].ann
+    for ef_search in args.ef_search:
+        hnsw.ef_search = ef_search
+        approximate, latency_ms = _time_queries(hnsw_store, queries, args.top_k)
+        print(
+            {
+                "engine": "hnsw",
+                "m": args.m,
+                "ef_construction": args.ef_construction,
+                "ef_search": ef_search,
+                "build_s": round(build_s, 2),
+                "recall": round(_recall(approximate, exact), 4),
+                "latency_ms": round(latency_ms, 3),
+                "speedup": round(exact_ms / latency_ms, 2),
+            }
+        )
+
+
+def bench_quantized(args) -> None:
+    corpus, metadatas, queries, exact, exact_ms = _exact_baseline(args)
+    float_bytes = 4 * len(InMemoryVectorStore().embedder.embed("x"))
+    print({"engine": "flat", "bytes_per_vector": float_bytes, "resident_bytes_per_vector": float_bytes})
+    configs = [{"quantization": "int8"}] + [
+        {"quantization": "pq", "pq_subvectors": subvectors} for subvectors in args.pq_subvectors
+    ]
+    for config in configs:
+        for rescore in [False, True]:
+            store = InMemoryVectorStore(
+                index_config={**config, "rescore": rescore, "rescore_factor": args.rescore_factor}
+            )
+            store.add_documents(corpus, metadatas=metadatas, index="bench")
+            approximate, latency_ms = _time_queries(store, queries, args.top_k)
+            index = store._stores["bench"]
+            print(
+                {
+                    "engine": config["quantization"],
+                    "pq_subvectors": config.get("pq_subvectors"),
+                    "rescore": rescore,
+                    "bytes_per_vector": index.quantizer.bytes_per_vector,
+                    # Re-scored rows are read from disk, so only the codes (and trained arrays) stay resident.
+                    "resident_bytes_per_vector": round(index.resident_bytes / index.size, 1),
+                    "recall": round(_recall(approximate, exact), 4),
+                    "latency_ms": round(latency_ms, 3),
+                    "speedup": round(exact_ms / latency_ms, 2),
+                }
+            )
+
+
+def bench_sharded(args) -> None:
+    corpus = synthetic_corpus(args.docs)
+    queries = [" ".join(doc.split()[:8]) for doc in synthetic_corpus(args.queries, seed=1)]
+    metadatas = [{"id": idx} for idx in range(len(corpus))]
+    single = InMemoryVectorStore()
+    single.add_documents(corpus, metadatas=metadatas, index="bench")
+    exact, exact_ms = _time_queries(single, queries, args.top_k)
+    print({"engine": "flat", "docs": args.docs, "shards": 0, "latency_ms": round(exact_ms, 3)})
+    for shards in args.shards:
+        store = InMemoryVectorStore(search_workers=shards, shard_min_rows=0)
+        # Share the embedded index instead of re-embedding the corpus per configuration.
+        store._stores, store._snapshot = single._stores, single._snapshot
+        store.search(queries[0], top_k=args.top_k)  # start workers and publish the shared block
+        sharded, latency_ms = _time_queries(store, queries, args.top_k)
+        print(
+            {
+                "engine": "sharded",
+                "shards": shards,
+                "recall": round(_recall(sharded, exact), 4),
+                "latency_ms": round(latency_ms, 3),
+                "speedup": round(exact_ms / latency_ms, 2),
+            }
+        )
+        store.close()
+
+
+def bench_embed(args) -> None:
+    corpus = synthetic_corpus(args.docs, words_per_doc=args.words_per_doc)
+    uncached = Embedder(dimensions=args.dimensions, cache_size=0)
+    started = time.perf_counter()
+    reference = [uncached.embed(doc) for doc in corpus]
+    loop_s = time.perf_counter() - started
+
+    embedder = Embedder(dimensions=args.dimensions, cache_size=args.cache_size)
+    started = time.perf_counter()
+    cached_loop = [embedder.embed(doc) for doc in corpus]
+    cached_loop_s = time.perf_counter() - started
+    started = time.perf_counter()
+    batched = uncached.embed_documents(corpus)
+    batch_s = time.perf_counter() - started
+    started = time.perf_counter()
+    warm = embedder.embed_documents(corpus)
+    warm_s = time.perf_counter() - started
+    print(
+        {
+            "docs": args.docs,
+            "per_document_docs_per_s": round(args.docs / loop_s),
+            "per_document_cached_docs_per_s": round(args.docs / cached_loop_s),
+            "batched_docs_per_s": round(args.docs / batch_s),
+            "batched_warm_cache_docs_per_s": round(args.docs / warm_s),
+            "identical": batched == reference and cached_loop == reference and warm == reference,
+            "cache": embedder.cache_info(),
+        }
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        timings = []
+        for _ in range(2):
+            # A fresh embedder per pass: only the on-disk cache carries over, as on a re-index.
+            cached = Embedder(dimensions=args.dimensions, embedding_cache=EmbeddingCache(f"{directory}/cache.sqlite"))
+            started = time.perf_counter()
+            cached.embed_batch(corpus)
+            timings.append(time.perf_counter() - started)
+            cached.embedding_cache.close()
+        print(
+            {
+                "embedding_cache_cold_docs_per_s": round(args.docs / timings[0]),
+                "embedding_cache_warm_docs_per_s": round(args.docs / timings[1]),
+            }
+        )
+
+    for workers in args.workers:
+        parallel = Embedder(dimensions=args.dimensions, workers=workers, chunk_size=args.chunk_size)
+        parallel.embed_batch(corpus[: args.chunk_size * workers])  # start the pool outside the timing
+        started = time.perf_counter()
+        block = parallel.embed_batch(corpus)
+        parallel_s = time.perf_counter() - started
+        parallel.close()
+        print(
+            {
+                "workers": workers,
+                "chunk_size": args.chunk_size,
+                "docs_per_s": round(args.docs / parallel_s),
+                "identical": block.tolist() == reference,
+            }
+        )
+
+
+def bench_rerank(args) -> None:
+    corpus = synthetic_corpus(args.docs, words_per_doc=args.words_per_doc)
+    queries = [" ".join(doc.split()[:6]) for doc in synthetic_corpus(args.queries, seed=1)]
+    rng = random.Random(2)
+    pools = [rng.sample(corpus, args.candidates) for _ in queries]
+    rerankers = {"lexical": LexicalReranker(), "embedding": Reranker(encoder=Embedder())}
+    for name, reranker in rerankers.items():
+        timings = []
+        for _ in range(2):
+            # The first pass fills the candidate caches; the second is the steady state of repeated chunks.
+            started = time.perf_counter()
+            for query, pool in zip(queries, pools):
+                reranker.rerank(query, pool, top_k=args.top_n)
+            timings.append((time.perf_counter() - started) * 1000 / len(queries))
+        print(
+            {
+                "reranker": name,
+                "candidates": args.candidates,
+                "cold_ms_per_query": round(timings[0], 3),
+                "warm_ms_per_query": round(timings[1], 3),
+                "cache": reranker.cache_info(),
+            }
+        )
+
+
+def _write_markdown(path: str, megabytes: float, seed: int = 0) -> None:
+    """Write a reproducible markdown file of about ``megabytes`` MB: headings, prose paragraphs and bullet lists."""
+    rng = random.Random(seed)
+    words = [f"term{idx}" for idx in range(5000)]
+    target = int(megabytes * 1024 * 1024)
+    written = 0
+    with open(path, "w") as handle:
+        while written < target:
+            sentences = [
+                " ".join(rng.choice(words) for _ in range(rng.randint(5, 25))).capitalize() + rng.choice(".!?")
+                for _ in range(rng.randint(2, 8))
+            ]
+            section = f"## Section {written}\n\n" + " ".join(sentences) + "\n\n"
+            if rng.random() < 0.3:
+                section += "".join(f"- {rng.choice(words)} {rng.choice(words)}\n" for _ in range(rng.randint(2, 6))) + "\n"
+            handle.write(section)
+            written += len(section)
+
+
+def bench_chunk(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.md")
+        _write_markdown(path, args.megabytes)
+        megabytes = os.path.getsize(path) / (1024 * 1024)
+        for strategy in CHUNKING_STRATEGIES:
+            started = time.perf_counter()
+            chunks = longest = 0
+            with open(path) as handle:
+                for chunk in chunk_text(handle, args.size, args.overlap, strategy):
+                    chunks += 1
+                    longest = max(longest, len(chunk))
+            seconds = time.perf_counter() - started
+            # Separate pass: tracing slows chunking down, but shows memory stays flat as the file grows.
+            tracemalloc.start()
+            with open(path) as handle:
+                for _ in chunk_text(handle, args.size, args.overlap, strategy):
+                    pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(
+                {
+                    "strategy": strategy,
+                    "megabytes": round(megabytes, 2),
+                    "chunks": chunks,
+                    "longest_chunk": longest,
+                    "mb_per_second": round(megabytes / seconds, 2),
+                    "peak_kb": round(peak / 1024, 1),
+                }
+            )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark local retrieval components.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    ivf_parser = subparsers.add_parser("ivf", help="IVF recall vs latency against exact search.")
+    ivf_parser.add_argument("--docs", type=int, default=50_000)
+    ivf_parser.add_argument("--queries", type=int, default=200)
+    ivf_parser.add_argument("--top-k", type=int, default=10)
+    ivf_parser.add_argument("--nlist", type=int, default=256)
+    ivf_parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    ivf_parser.set_defaults(func=bench_ivf)
+
+    hnsw_parser = subparsers.add_parser("hnsw", help="HNSW recall vs latency against exact search.")
+    hnsw_parser.add_argument("--docs", type=int, default=10_000)
+    hnsw_parser.add_argument("--queries", type=int, default=200)
+    hnsw_parser.add_argument("--top-k", type=int, default=10)
+    hnsw_parser.add_argument("--m", type=int, default=16)
+    hnsw_parser.add_argument("--ef-construction", type=int, default=100)
+    hnsw_parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 20, 50, 100, 200])
+    hnsw_parser.set_defaults(func=bench_hnsw)
+
+    quantized_parser = subparsers.add_parser("quantized", help="int8/PQ code vs resident bytes and recall.")
+    quantized_parser.add_argument("--docs", type=int, default=50_000)
+    quantized_parser.add_argument("--queries", type=int, default=200)
+    quantized_parser.add_argument("--top-k", type=int, default=10)
+    quantized_parser.add_argument("--pq-subvectors", type=int, nargs="+", default=[16, 32, 64])
+    quantized_parser.add_argument("--rescore-factor", type=int, default=4)
+    quantized_parser.set_defaults(func=bench_quantized)
+
+    sharded_parser = subparsers.add_parser("sharded", help="Multi-process sharded exact search vs shard count.")
+    sharded_parser.add_argument("--docs", type=int, default=200_000)
+    sharded_parser.add_argument("--queries", type=int, default=100)
+    sharded_parser.add_argument("--top-k", type=int, default=10)
+    sharded_parser.add_argument("--shards", type=int, nargs="+", default=[2, 4, 8])
+    sharded_parser.set_defaults(func=bench_sharded)
+
+    embed_parser = subparsers.add_parser("embed", help="Batched vs per-document embedding throughput.")
+    embed_parser.add_argument("--docs", type=int, default=20_000)
+    embed_parser.add_argument("--words-per-doc", type=int, default=40)
+    embed_parser.add_argument("--dimensions", type=int, default=128)
+    embed_parser.add_argument("--cache-size", type=int, default=50_000)
+    embed_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    embed_parser.add_argument("--chunk-size", type=int, default=2048)
+    embed_parser.set_defaults(func=bench_embed)
+
+    rerank_parser = subparsers.add_parser("rerank", help="Lexical vs embedding reranker latency per query.")
+    rerank_parser.add_argument("--docs", type=int, default=20_000)
+    rerank_parser.add_argument("--words-per-doc", type=int, default=80)
+    rerank_parser.add_argument("--queries", type=int, default=200)
+    rerank_parser.add_argument("--candidates", type=int, default=300)
+    rerank_parser.add_argument("--top-n", type=int, default=5)
+    rerank_parser.set_defaults(func=bench_rerank)
+
+    chunk_parser = subparsers.add_parser("chunk", help="Streaming chunker throughput and peak memory on markdown.")
+    chunk_parser.add_argument("--megabytes", type=float, default=8.0)
+    chunk_parser.add_argument("--size", type=int, default=500)
+    chunk_parser.add_argument("--overlap", type=int, default=50)
+    chunk_parser.set_defaults(func=bench_chunk)
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
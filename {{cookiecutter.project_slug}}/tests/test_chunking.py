@@ -0,0 +1,88 @@
+import io
+import tracemalloc
+
+import pytest
+
+from {{ cookiecutter.project_slug }}.data_loaders.chunking import chunk_text, recursive_chunks, sentence_chunks
+from {{ cookiecutter.project_slug }}.orchestration.spec_runtime import SpecRuntime
+
+MARKDOWN = (
+    "# Shipping\n\n"
+    "Orders ship within two business days. Tracking links are emailed once a package leaves!\n"
+    "Weekend orders ship on Monday.\n\n"
+    "## Refunds\n\n"
+    "Refunds go to the original payment method within five days. Store credit is instant? "
+    + " ".join(f"Partial refund rule {number} is prorated" for number in range(6))
+    + "\n"
+)
+
+
+def _assert_covers(chunks, text, size):
+    """Chunks are in-order substrings of at most ``size`` characters that together span ``text``."""
+    assert all(0 < len(chunk) <= size for chunk in chunks)
+    end = 0
+    for chunk in chunks:
+        start = text.find(chunk, max(0, end - len(chunk)))
+        assert 0 <= start <= end < start + len(chunk)
+        end = start + len(chunk)
+    assert end == len(text)
+
+
+def test_sliding_window_streams_same_windows_from_text_and_files():
+    windows = SpecRuntime._chunk_text(MARKDOWN, 60, 25)
+    assert windows[0] == MARKDOWN[:60] and windows[1] == MARKDOWN[35:95]
+    assert list(chunk_text(io.StringIO(MARKDOWN), 60, 25)) == windows
+    assert SpecRuntime._chunk_text("", 60, 25) == [] and SpecRuntime._chunk_text("abc", 0, 0) == ["abc"]
+
+
+@pytest.mark.parametrize("strategy", ["sentence", "recursive"])
+def test_structured_strategies_respect_size_and_cover_the_text(strategy):
+    for size, overlap in [(40, 0), (80, 30), (200, 60)]:
+        chunks = list(chunk_text(MARKDOWN, size, overlap, strategy))
+        _assert_covers(chunks, MARKDOWN, size)
+        assert list(chunk_text(io.StringIO(MARKDOWN), size, overlap, strategy)) == chunks
+
+
+def test_sentence_chunks_end_on_sentence_boundaries_and_overlap_whole_sentences():
+    chunks = list(sentence_chunks(MARKDOWN, 100, 40))
+    assert chunks[0] == "# Shipping\n\nOrders ship within two business days. Tracking links are emailed once a package leaves!\n"
+    assert all(chunk.rstrip()[-1] in ".!?" or chunk.endswith("\n\n") for chunk in chunks[:3])
+    # The trailing sentence (here a heading) of one chunk opens the next.
+    assert chunks[1] == "Weekend orders ship on Monday.\n\n## Refunds\n\n"
+    assert chunks[2].startswith("## Refunds\n\nRefunds go")
+
+
+def test_recursive_chunks_prefer_paragraphs_then_smaller_separators():
+    chunks = list(recursive_chunks(MARKDOWN, 160, 0))
+    # Whole paragraphs are packed together while they fit.
+    assert chunks[0] == MARKDOWN[: MARKDOWN.index("Refunds go")]
+    assert chunks[1].startswith("Refunds go to the original payment method")
+    # A paragraph longer than the chunk size is split between words, never inside one.
+    assert all(chunk.endswith((" ", "\n")) for chunk in chunks[:-1])
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        " ".join(f"word{number}" for number in range(50_000)) + ".",
+        "\n".join(f"line {number} " + "x" * 60 for number in range(6_000)),
+    ],
+    ids=["one-400kb-line", "one-paragraph-of-short-lines"],
+)
+def test_recursive_chunks_buffer_about_two_windows_however_long_the_paragraph(text):
+    size = 1_000
+    source = io.StringIO(text)
+    tracemalloc.start()
+    try:
+        chunks = list(recursive_chunks(source, size, 40))
+        peak = tracemalloc.get_traced_memory()[1] - sum(map(len, chunks)) - 80 * len(chunks)
+    finally:
+        tracemalloc.stop()
+    _assert_covers(chunks, text, size)
+    # Two windows of text plus the small piece strings and generator frames around them; never the paragraph.
+    assert peak < 30 * size
+
+
+def test_unknown_strategy_rejected():
+    with pytest.raises(ValueError):
+        chunk_text(MARKDOWN, 100, 10, "semantic")
@@ -0,0 +1,63 @@
+from {{ cookiecutter.project_slug }}.orchestration.spec_runtime import SpecRuntime
+from {{ cookiecutter.project_slug }}.retrievers.context_packing import estimate_tokens, pack_context
+
+TEXT = (
+    "Orders ship within two business days from the regional warehouse. "
+    "Refunds are issued to the original payment method within five days. "
+    "Tracking links are emailed once a package leaves the warehouse."
+)
+
+
+def _hits(chunks, source="product.md", scores=None):
+    scores = scores or [1.0 - 0.1 * idx for idx in range(len(chunks))]
+    return [
+        {"id": f"{source}-{idx}", "text": chunk, "metadata": {"source": source}, "score": score}
+        for idx, (chunk, score) in enumerate(zip(chunks, scores))
+    ]
+
+
+def test_overlapping_neighbours_merge_back_into_the_source_text():
+    chunks = SpecRuntime._chunk_text(TEXT, 60, 25)
+    # Retrieval order is by score, not position; every window should still be stitched back together.
+    hits = _hits([chunks[2], chunks[0], chunks[3], chunks[1]] + chunks[4:])
+    packed = pack_context(hits)
+    assert len(packed) == 1
+    assert packed[0]["text"] == TEXT
+    assert packed[0]["id"] == "product.md-0" and packed[0]["score"] == 1.0
+    assert sorted(packed[0]["merged_ids"]) == sorted(hit["id"] for hit in hits)
+
+    other_source = pack_context(_hits(chunks[:2]) + _hits(chunks[1:2], source="faq.md", scores=[0.1]))
+    assert [hit["metadata"]["source"] for hit in other_source] == ["product.md"]  # near-duplicate of the merged text
+
+
+def test_near_duplicates_dropped_and_budget_filled_greedily_by_score():
+    hits = _hits(
+        [
+            "Refunds are issued to the original payment method within five days.",
+            "Refunds are issued to the original payment method within five days!",
+            "Tracking links are emailed once a package leaves the warehouse, usually in the evening hours.",
+            "Orders ship in two days.",
+        ],
+        source=None,
+        scores=[0.9, 0.8, 0.7, 0.6],
+    )
+    assert [hit["score"] for hit in pack_context(hits)] == [0.9, 0.7, 0.6]
+    budget = estimate_tokens(hits[0]["text"]) + estimate_tokens(hits[3]["text"])
+    assert [hit["score"] for hit in pack_context(hits, max_tokens=budget)] == [0.9, 0.6]
+    assert pack_context(hits, max_tokens=1) == []
+
+
+def test_span_over_budget_falls_back_to_its_best_chunks():
+    text = " ".join(f"word{idx:03d}" for idx in range(98))[:780]
+    chunks = SpecRuntime._chunk_text(text, 240, 60)
+    assert len(chunks) == 4 and all(estimate_tokens(chunk) == 60 for chunk in chunks)
+    hits = _hits(chunks, scores=[0.8, 0.5, 0.9, 0.7])
+    assert len(pack_context(hits)) == 1  # the four windows merge back into one 195-token span
+
+    single = pack_context(hits, max_tokens=100)
+    assert [(hit["id"], hit["text"]) for hit in single] == [("product.md-2", chunks[2])]
+
+    # Two neighbours fit once merged (105 tokens); the best chunk keeps its best-scoring neighbour.
+    pair = pack_context(hits, max_tokens=110)
+    assert [hit["text"] for hit in pair] == [text[360:]]
+    assert sorted(pair[0]["merged_ids"]) == ["product.md-2", "product.md-3"]
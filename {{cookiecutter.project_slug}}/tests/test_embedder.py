@@ -0,0 +1,154 @@
+import numpy as np
+import pytest
+
+from {{ cookiecutter.project_slug }}.embeddings.embedder import Embedder
+from {{ cookiecutter.project_slug }}.embeddings.embedding_cache import EmbeddingCache
+from {{ cookiecutter.project_slug }}.embeddings.factory import create_embedder
+from {{ cookiecutter.project_slug }}.embeddings.hashing_embedder import HashingEmbedder
+from {{ cookiecutter.project_slug }}.vectordatabase.vector_store import InMemoryVectorStore
+
+
+def test_batched_embeddings_match_per_document_embeddings_exactly():
+    docs = ["refund policy for order ORD-1", "", "   ", "the the the", "Émile ütf-8 中文 tokens", "word " * 500]
+    docs += [f"note {i} about billing and delivery {i % 7}" for i in range(50)]
+    for dimensions in (128, 48):
+        embedder = Embedder(dimensions=dimensions, batch_rows=16)
+        assert embedder.embed_documents(docs) == [embedder.embed(doc) for doc in docs]
+    assert Embedder().embed_documents([]) == []
+
+
+def test_token_cache_is_bounded_and_counts_hits():
+    embedder = Embedder(cache_size=3)
+    reference = Embedder(cache_size=0)
+    first = embedder.embed("alpha beta alpha gamma")
+    assert embedder.cache_info()["misses"] == 3 and embedder.cache_info()["hits"] == 1
+    assert embedder.embed("delta alpha") == reference.embed("delta alpha")
+    assert embedder.cache_info()["size"] == 3  # beta, the least recently used token, was evicted
+    assert "beta" not in embedder._cache
+
+    embedder.load_vocabulary(["alpha", "gamma", "refund"])
+    hits, misses = embedder.cache_hits, embedder.cache_misses
+    assert embedder.embed("alpha beta alpha gamma") == first
+    assert embedder.embed_documents(["refund alpha", "beta"]) == reference.embed_documents(["refund alpha", "beta"])
+    assert (embedder.cache_hits - hits, embedder.cache_misses - misses) == (1, 1)
+
+
+def test_persistent_embedding_cache_reuses_vectors_across_embedders(tmp_path):
+    docs = [f"chunk {i} about refunds and delivery" for i in range(20)]
+    reference = Embedder().embed_documents(docs)
+    first = Embedder(embedding_cache=EmbeddingCache(str(tmp_path / "cache.sqlite")))
+    assert first.embed_documents(docs) == reference
+
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_entries=25)
+    second = Embedder(embedding_cache=cache)
+    second._embed_uncached = None  # every vector must come from disk
+    assert second.embed_documents(docs) == reference
+    assert (cache.hits, cache.misses) == (20, 0)
+
+    # A different model name or dimension never reuses entries; past max_entries a batch of old entries is evicted.
+    other = Embedder(dimensions=64, embedding_cache=cache)
+    assert other.embed_documents(docs[:10]) == Embedder(dimensions=64).embed_documents(docs[:10])
+    assert cache.misses == 10 and len(cache) == 22
+
+
+def test_embedding_cache_writes_keep_a_running_count_and_evict_in_batches(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_entries=100, eviction_fraction=0.2)
+    statements = []
+    cache._connection.set_trace_callback(statements.append)
+    vectors = np.ones((10, 4), dtype=np.float32)
+    for batch in range(10):
+        cache.put_many("m", 4, [bytes([batch, i]) for i in range(10)], vectors)
+    assert not any("COUNT" in statement for statement in statements) and len(cache) == 100
+
+    # The 101st entry evicts the 21 oldest at once; the next 19 writes evict nothing.
+    cache.put_many("m", 4, [b"new"], vectors[:1])
+    assert len(cache) == 80 and not cache.get_many("m", 4, [bytes([0, 0]), bytes([1, 9])])
+    statements.clear()
+    cache.put_many("m", 4, [bytes([200, i]) for i in range(19)], vectors[:1].repeat(19, axis=0))
+    assert not any("DELETE" in statement for statement in statements) and len(cache) == 99
+
+    plan = cache._connection.execute(
+        "EXPLAIN QUERY PLAN SELECT model, dimensions, digest FROM embeddings ORDER BY used LIMIT 1"
+    ).fetchall()
+    assert any("embeddings_used" in row[-1] for row in plan)
+
+
+def test_store_queries_bypass_the_persistent_embedding_cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    store = InMemoryVectorStore(embedder=Embedder(embedding_cache=cache))
+    store.add_documents(["refunds take five days", "delivery is free over $50"], ids=["refund", "delivery"])
+    assert len(cache) == 2 and (cache.hits, cache.misses) == (0, 2)
+
+    for query in ["how long do refunds take", "free delivery threshold", "how long do refunds take"]:
+        assert store.search(query, top_k=1)
+    assert len(cache) == 2 and (cache.hits, cache.misses) == (0, 2)
+
+
+def test_parallel_embedding_preserves_order_and_values():
+    docs = [f"document {i} with tokens {i % 13} and {i % 5}" for i in range(130)]
+    parallel = Embedder(workers=2, chunk_size=16)
+    try:
+        assert parallel.embed_documents(docs) == Embedder().embed_documents(docs)
+        assert parallel._pool is not None
+    finally:
+        parallel.close()
+
+
+def test_hashing_embedder_matches_inflections_and_sparse_output_agrees_with_dense():
+    docs = ["Refunds are issued within 5 days", "Delivery delays in the north region", "", "refund"]
+    dense = HashingEmbedder(dimensions=256).embed_batch(docs)
+    sparse = HashingEmbedder(dimensions=256, output="csr").embed_batch(docs)
+    assert np.allclose(sparse.toarray(), dense)
+    assert np.allclose(np.linalg.norm(dense[[0, 1, 3]], axis=1), 1.0) and not dense[2].any()
+    assert dense[3] @ dense[0] > dense[3] @ dense[1]  # "refund" shares char n-grams with "Refunds"
+    queries = dense[[3, 1]].T
+    assert np.allclose(sparse.dot(queries), dense @ queries, atol=1e-6)
+    assert np.allclose(sparse.dot(dense[3]), dense @ dense[3], atol=1e-6)
+
+
+def test_hashing_embedder_idf_downweights_common_features():
+    embedder = HashingEmbedder(dimensions=512, idf=True, char_ngrams=(0, 0))
+    embedder.fit(["the refund", "the order", "the invoice"])
+    assert embedder.document_count == 3 and embedder.fitted
+    (common, rare), _ = embedder._hash(["w:the", "w:refund"])
+    weights = embedder.idf_weights()
+    assert weights[common] < weights[rare]
+    plain = HashingEmbedder(dimensions=512, char_ngrams=(0, 0)).embed_batch(["the refund"])[0]
+    weighted = embedder.embed_batch(["the refund"])[0]
+    assert abs(weighted[common]) < abs(plain[common]) and abs(weighted[rare]) > abs(plain[rare])
+
+
+def test_create_embedder_parses_model_names():
+    assert isinstance(create_embedder("local-hash-64"), Embedder) and create_embedder("local-hash-64").dimensions == 64
+    hashing = create_embedder("feature-hash-2048-idf")
+    assert isinstance(hashing, HashingEmbedder) and (hashing.dimensions, hashing.idf) == (2048, True)
+    assert create_embedder("feature-hash").dimensions == 128
+    for name in ("text-embedding-3-small", "local-hash-idf", "feature-hash-x"):
+        with pytest.raises(ValueError):
+            create_embedder(name)
+
+
+def test_vector_store_indexes_hashing_embeddings_and_fits_idf(tmp_path):
+    with pytest.raises(ValueError, match="dense"):
+        InMemoryVectorStore(embedder=HashingEmbedder(output="csr"))
+    embedder = HashingEmbedder(dimensions=512, idf=True)
+    store = InMemoryVectorStore(embedder=embedder)
+    store.add_documents(["Refunds are issued within 5 days", "Delivery delays in the north region"], index="kb")
+    assert embedder.document_count == 2
+    assert store.search("refund timing", indexes=["kb"], top_k=1)[0]["text"].startswith("Refunds")
+
+    # The IDF is frozen after the first batch: later writes and deletes do not reweight queries.
+    weights = embedder.idf_weights()
+    store.add_documents(["the the the refund", "the north the delivery"], ids=["a", "b"], index="kb")
+    store.upsert_documents(["the the refund"], ids=["a"], index="kb")
+    store.delete(["b"], index="kb")
+    assert embedder.document_count == 2 and np.array_equal(embedder.idf_weights(), weights)
+
+    store.save(str(tmp_path))
+    reloaded = HashingEmbedder(dimensions=512, idf=True)
+    reloaded.fit(["unrelated corpus"])
+    restored = InMemoryVectorStore(embedder=reloaded)
+    assert restored.load(str(tmp_path)) and reloaded.document_count == 2
+    assert np.array_equal(reloaded.idf_weights(), weights)
+    for query in ["north delivery", "refund timing"]:
+        assert restored.search(query, indexes=["kb"]) == store.search(query, indexes=["kb"])
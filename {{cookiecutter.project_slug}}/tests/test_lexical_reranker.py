@@ -0,0 +1,43 @@
+import numpy as np
+
+from {{ cookiecutter.project_slug }}.reranker.lexical_reranker import LexicalReranker
+
+
+def test_exact_phrase_and_proximity_outrank_scattered_terms():
+    reranker = LexicalReranker()
+    candidates = [
+        "refund the order and we will check the delivery policy later",
+        "our refund policy covers every order",
+        "shipping times for the north region",
+        "policy on refund requests",
+    ]
+    ranked = [text for text, _ in reranker.rerank("refund policy", candidates, top_k=4)]
+    assert ranked[0] == "our refund policy covers every order"
+    assert ranked.index("policy on refund requests") < ranked.index(candidates[0])
+    assert ranked[-1] == "shipping times for the north region"
+    assert reranker.scores("refund policy", candidates)[2] == 0
+
+
+def test_scores_are_bm25_without_pair_features_and_handle_empty_inputs():
+    reranker = LexicalReranker(proximity_weight=0, phrase_weight=0)
+    candidates = ["alpha alpha beta", "beta gamma", "delta"]
+    lengths = np.array([3, 2, 1], dtype=np.float32)
+    norms = 1.2 * (1 - 0.75 + 0.75 * lengths / lengths.mean())
+    idf_alpha, idf_beta = np.log1p((3 - 1 + 0.5) / 1.5), np.log1p((3 - 2 + 0.5) / 2.5)
+    expected = [
+        idf_alpha * 2 * 2.2 / (2 + norms[0]) + idf_beta * 2.2 / (1 + norms[0]),
+        idf_beta * 2.2 / (1 + norms[1]),
+        0.0,
+    ]
+    assert np.allclose(reranker.scores("alpha beta", candidates), expected, atol=1e-5)
+    assert reranker.rerank("alpha", [], top_k=3) == []
+    assert not reranker.scores("", candidates).any() and not reranker.scores("alpha", ["", "..."]).any()
+
+
+def test_candidate_tokens_are_cached_and_bounded():
+    reranker = LexicalReranker(cache_size=2)
+    reranker.scores("refund", ["a refund", "an order"])
+    reranker.scores("order", ["an order", "an invoice"])
+    info = reranker.cache_info()
+    assert (info["hits"], info["misses"], info["size"]) == (1, 3, 2)
+    assert "a refund" not in reranker._cache
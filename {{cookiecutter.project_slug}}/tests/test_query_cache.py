@@ -0,0 +1,91 @@
+import threading
+
+from {{ cookiecutter.project_slug }}.retrievers.query_cache import QueryCache
+from {{ cookiecutter.project_slug }}.retrievers.retriever import Retriever
+
+
+def test_repeated_queries_hit_the_cache_until_the_index_changes():
+    retriever = Retriever(top_k=2)
+    retriever.add_texts(["where is my package: tracking links", "refund policy"], index="kb")
+    first = retriever.retrieve("Where is my  package", indexes=["kb"])
+    first[0]["score"] = -1.0  # callers get their own hit dicts
+    assert retriever.retrieve("where is my package", indexes=["kb"])[0]["score"] != -1.0
+    assert retriever.cache_info()["hits"] == 1 and retriever.cache_info()["misses"] == 1
+
+    retriever.retrieve("where is my package", indexes=["kb"], top_k=1)
+    retriever.retrieve("where is my package", indexes=["kb"], where={"lang": "en"})
+    assert retriever.cache_info()["misses"] == 3
+
+    retriever.add_texts(["where is my package? see the package tracker"], index="kb")
+    fresh = retriever.retrieve("where is my package", indexes=["kb"], top_k=3)
+    assert len(fresh) == 3 and retriever.cache_info()["misses"] == 4
+    retriever.add_texts(["unrelated"], index="other")
+    retriever.retrieve("where is my package", indexes=["kb"], top_k=3)
+    assert retriever.cache_info()["hits"] == 2  # writes to another index keep "kb" entries valid
+
+    retriever.vector_store.reset()
+    assert retriever.retrieve("where is my package", indexes=["kb"], top_k=3) == []
+    assert retriever.cache_info()["hit_rate"] == 2 / 7
+
+
+def test_equal_where_filters_share_one_cache_key_and_different_ones_do_not():
+    retriever = Retriever(top_k=2)
+
+    def key(where):
+        return retriever._cache_key("q", ["kb"], 2, where, None, None)
+
+    values = [f"source-{i}.md" for i in range(20)]
+    assert len({key({"source": container(values)}) for container in (list, tuple, set, frozenset)}) == 1
+    assert key({"source": set(values)}) == key({"source": sorted(values, reverse=True)})
+    assert key({"lang": "en"}) == key({"lang": ["en"]}) != key({"lang": ["en", "de"]})
+    assert key({"lang": "en", "tags": ["faq"]}) == key({"tags": "faq", "lang": ("en",)})
+    assert key({"id": [1, "1"]}) != key({"id": ["1"]})
+
+
+def test_batch_retrieval_only_searches_cache_misses():
+    retriever = Retriever(top_k=1)
+    retriever.add_texts(["refund policy", "delivery windows"], index="kb")
+    retriever.retrieve("refund policy", indexes=["kb"])
+    batch = retriever.retrieve_many(["refund policy", "delivery windows"], indexes=["kb"])
+    assert [hits[0]["text"] for hits in batch] == ["refund policy", "delivery windows"]
+    assert (retriever.cache_info()["hits"], retriever.cache_info()["misses"]) == (1, 2)
+
+    uncached = Retriever(vector_store=retriever.vector_store, top_k=1, cache_size=0)
+    direct = uncached.retrieve_many(["refund policy", "delivery windows"], indexes=["kb"])
+    assert [[hit["id"] for hit in hits] for hits in direct] == [[hit["id"] for hit in hits] for hits in batch]
+    assert uncached.cache_info()["size"] == 0
+
+
+def test_reader_racing_a_write_never_caches_old_rows_under_the_new_version():
+    retriever = Retriever(top_k=2)
+    retriever.add_texts(["refund policy"], index="kb", ids=["a"])
+    live = retriever.vector_store._stores["kb"]
+    publish_view = live.snapshot
+
+    def snapshot_with_concurrent_reader():
+        # A reader that runs while the write is being published, before the new view is swapped in.
+        reader = threading.Thread(target=retriever.retrieve, args=("refund policy",), kwargs={"indexes": ["kb"]})
+        reader.start()
+        reader.join()
+        return publish_view()
+
+    live.snapshot = snapshot_with_concurrent_reader
+    retriever.add_texts(["refund policy: refunds within five days"], index="kb", ids=["b"])
+    live.snapshot = publish_view
+
+    cached = [hit["id"] for hit in retriever.retrieve("refund policy", indexes=["kb"])]
+    direct = [hit["id"] for hit in retriever.vector_store.search("refund policy", top_k=2, indexes=["kb"])]
+    assert cached == direct and sorted(cached) == ["a", "b"]
+
+
+def test_query_cache_evicts_least_recently_used_and_expires_entries():
+    now = [0.0]
+    cache = QueryCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+    now[0] = 11.0
+    assert cache.get("a") is None and cache.get("c") is None
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,69 @@
+import sys
+import types
+
+import numpy as np
+
+from {{ cookiecutter.project_slug }}.embeddings.embedder import Embedder
+from {{ cookiecutter.project_slug }}.embeddings.hashing_embedder import HashingEmbedder
+from {{ cookiecutter.project_slug }}.reranker import reranker as reranker_module
+from {{ cookiecutter.project_slug }}.reranker.reranker import Reranker
+
+
+def test_rerank_orders_by_cosine_and_batches_match_single_encoding():
+    embedder = Embedder()
+    reranker = Reranker(encoder=embedder, batch_size=2)
+    candidates = ["delivery delays in the north", "refund issued to the card", "refund policy", "store hours"]
+    ranked = reranker.rerank("refund policy", candidates, top_k=2)
+    assert [text for text, _ in ranked] == ["refund policy", "refund issued to the card"]
+
+    query = np.asarray(embedder.embed("refund policy"))
+    expected = [
+        float(np.asarray(embedder.embed(text)) @ query / (np.linalg.norm(embedder.embed(text)) * np.linalg.norm(query)))
+        for text in candidates
+    ]
+    assert np.allclose(reranker.scores("refund policy", candidates), expected, atol=1e-6)
+    assert reranker.rerank("refund policy", [], top_k=3) == []
+
+
+def test_candidate_embeddings_are_cached_and_bounded():
+    reranker = Reranker(encoder=HashingEmbedder(dimensions=256, output="csr"), cache_size=3)
+    reranker.rerank("refund", ["a refund", "an order", "a refund"])
+    assert reranker.cache_info()["misses"] == 2 and reranker.cache_info()["hits"] == 0
+    reranker.rerank("order", ["an order", "a refund", "an invoice", "a parcel"])
+    info = reranker.cache_info()
+    assert (info["hits"], info["misses"], info["size"]) == (2, 4, 3)
+    assert "an order" not in reranker._cache
+
+
+def test_rerank_hits_keeps_top_n_and_hit_fields():
+    reranker = Reranker(encoder=Embedder())
+    hits = [
+        {"id": "1", "text": "store hours", "metadata": {}, "score": 0.9},
+        {"id": "2", "text": "refund policy", "metadata": {}, "score": 0.4},
+    ]
+    reranked = reranker.rerank_hits("refund policy", hits, top_n=1)
+    assert [hit["id"] for hit in reranked] == ["2"]
+    assert reranked[0]["score"] == 0.4 and reranked[0]["rerank_score"] > 0.99
+
+
+def test_model_is_imported_and_loaded_lazily_and_shared(monkeypatch):
+    loads = []
+
+    class FakeSentenceTransformer:
+        def __init__(self, name):
+            loads.append(name)
+
+        def encode(self, texts, batch_size, convert_to_numpy):
+            return np.ones((len(texts), 4), dtype=np.float32)
+
+    fake_module = types.SimpleNamespace(SentenceTransformer=FakeSentenceTransformer)
+    monkeypatch.setitem(sys.modules, "sentence_transformers", fake_module)
+    monkeypatch.setattr(reranker_module, "_MODELS", {})
+    first, second = Reranker(model_name="mini"), Reranker(model_name="mini")
+    assert loads == [] and not first.loaded
+    first.warmup()
+    assert loads == ["mini"] and first.loaded
+    assert second.rerank("q", ["a", "b"], top_k=1)[0][0] == "a"
+    assert loads == ["mini"] and second.model is first.model
+    Reranker(model_name="mini", shared_model=False).warmup()
+    assert loads == ["mini", "mini"]
@@ -0,0 +1,79 @@
+import pytest
+
+from {{ cookiecutter.project_slug }}.reranker.lexical_reranker import LexicalReranker
+from {{ cookiecutter.project_slug }}.retrievers.pipeline import MetadataFilterStage, RetrievalRequest
+from {{ cookiecutter.project_slug }}.retrievers.retriever import Retriever
+
+
+def _retriever() -> Retriever:
+    retriever = Retriever(top_k=2)
+    retriever.add_texts(
+        [
+            "refund policy: refunds go to the original card",
+            "refund timing: refunds take five days",
+            "refund exceptions for gift cards",
+            "delivery windows for the north region",
+        ],
+        metadatas=[
+            {"source": "refunds.md", "lang": "en"},
+            {"source": "refunds.md", "lang": "en"},
+            {"source": "gifts.md", "lang": "de"},
+            {"source": "delivery.md", "lang": "en"},
+        ],
+        index="kb",
+    )
+    return retriever
+
+
+def test_pipeline_reports_time_and_counts_per_stage():
+    retriever = _retriever()
+    pipeline = retriever.build_pipeline(
+        candidates=4,
+        where={"lang": "en"},
+        reranker=LexicalReranker(),
+        top_n=3,
+        max_per_source=1,
+        max_tokens=40,
+    )
+    result = retriever.retrieve_staged("refund policy", pipeline, indexes=["kb"])
+    assert [stage.name for stage in result.stages] == ["candidates", "filter", "rerank", "diversify", "pack"]
+    assert [(stage.candidates_in, stage.candidates_out) for stage in result.stages] == [
+        (0, 4),
+        (4, 3),
+        (3, 3),
+        (3, 2),
+        (2, 2),
+    ]
+    assert [hit["metadata"]["source"] for hit in result.hits] == ["refunds.md", "delivery.md"]
+    assert result.hits[0]["text"].startswith("refund policy")
+    assert all(stage.seconds >= 0 for stage in result.stages)
+    assert result.total_seconds == sum(report["seconds"] for report in result.report())
+
+
+def test_default_pipeline_matches_plain_retrieve():
+    retriever = _retriever()
+    result = retriever.retrieve_staged("refund timing", indexes=["kb"])
+    assert result.hits == retriever.retrieve("refund timing", indexes=["kb"])
+    assert [stage.name for stage in result.stages] == ["candidates"]
+
+
+def test_metadata_filter_stage_matches_store_semantics_and_predicates():
+    hits = [
+        {"text": "a", "metadata": {"tags": ["billing", "faq"], "lang": "en"}},
+        {"text": "b", "metadata": {"tags": "shipping", "lang": "en"}},
+        {"text": "c", "metadata": {"lang": "de"}},
+    ]
+    request = RetrievalRequest(query="q")
+    assert [hit["text"] for hit in MetadataFilterStage(where={"tags": ["faq", "shipping"]}).run(request, hits)] == [
+        "a",
+        "b",
+    ]
+    stage = MetadataFilterStage(where={"lang": "en"}, predicate=lambda metadata: metadata.get("tags") != "shipping")
+    assert [hit["text"] for hit in stage.run(request, hits)] == ["a"]
+
+    # Unhashable metadata entries are skipped and nested filter values rejected, as in the store.
+    nested = [{"text": "d", "metadata": {"tags": [{"name": "faq"}, "faq"], "lang": ["en", ["de"]]}}]
+    assert MetadataFilterStage(where={"tags": "faq", "lang": "en"}).run(request, nested) == nested
+    for where in [{"tags": [["faq"]]}, {"tags": {"name": "faq"}}]:
+        with pytest.raises(ValueError, match="where"):
+            MetadataFilterStage(where=where)
@@ -0,0 +1,121 @@
+from pathlib import Path
+
+import numpy as np
+
+from {{ cookiecutter.project_slug }}.config.spec_models import WorkflowSpec
+from {{ cookiecutter.project_slug }}.orchestration.spec_runtime import SpecRuntime
+from {{ cookiecutter.project_slug }}.reranker.lexical_reranker import LexicalReranker
+from {{ cookiecutter.project_slug }}.reranker.reranker import Reranker
+
+
+def _spec(tmp_path: Path, **rag_overrides) -> WorkflowSpec:
+    contexts = tmp_path / "contexts"
+    contexts.mkdir(exist_ok=True)
+    (contexts / "product.md").write_text(
+        "Orders ship within two business days. Refunds are issued to the original payment method. "
+        "Tracking links are emailed once a package leaves the warehouse."
+    )
+    (tmp_path / "prompt.md").write_text("You are an agent.")
+    rag = {
+        "enabled": True,
+        "top_k": 2,
+        "chunking": {"size": 60, "overlap": 10},
+        "knowledge_bases": [{"name": "product", "collection": "product_docs", "contexts": ["contexts/product.md"]}],
+    }
+    rag.update(rag_overrides)
+    return WorkflowSpec.model_validate(
+        {
+            "name": "runtime-test",
+            "entry_agent": "a1",
+            "rag": rag,
+            "storage": {"vector_store": {"path": "index"}},
+            "agents": [{"name": "a1", "role": "alpha", "prompt_file": "prompt.md"}],
+            "observability": {"telemetry_endpoint": "http://localhost"},
+        }
+    )
+
+
+def test_runtime_persists_and_reuses_vector_index(tmp_path: Path, monkeypatch):
+    spec = _spec(tmp_path)
+    first = SpecRuntime(spec, tmp_path)
+    assert (tmp_path / "index" / "manifest.json").exists()
+    expected = first.retriever.retrieve("refund payment method", indexes=["product_docs"])
+
+    def fail_embedding(*_args, **_kwargs):
+        raise AssertionError("unchanged contexts should load from disk instead of re-embedding")
+
+    monkeypatch.setattr(SpecRuntime, "_embed_contexts", fail_embedding)
+    second = SpecRuntime(spec, tmp_path)
+    assert second.retriever.retrieve("refund payment method", indexes=["product_docs"]) == expected
+
+    monkeypatch.undo()
+    (tmp_path / "contexts" / "product.md").write_text("Completely new product notes.")
+    third = SpecRuntime(spec, tmp_path)
+    assert third.retriever.retrieve("product notes", indexes=["product_docs"])[0]["text"].startswith("Completely")
+
+
+def test_runtime_reranks_over_retrieved_candidates(tmp_path: Path):
+    spec = _spec(tmp_path, top_k=6, reranker={"enabled": True, "provider": "local", "top_n": 1})
+    runtime = SpecRuntime(spec, tmp_path)
+    assert runtime.reranker is not None
+    prompt = runtime._apply_rag("refund payment method")
+    assert prompt.count("\n- (") == 1
+    candidates, rerank, _pack = runtime.last_retrieval.stages
+    assert (candidates.name, rerank.name) == ("candidates", "rerank")
+    assert candidates.candidates_out > 1 and (rerank.candidates_in, rerank.candidates_out) == (candidates.candidates_out, 1)
+    assert isinstance(runtime.reranker, LexicalReranker) and runtime.reranker.cache_info()["misses"] > 1
+
+    plain = tmp_path / "plain"
+    plain.mkdir()
+    assert SpecRuntime(_spec(plain), plain).reranker is None
+
+
+def test_runtime_fits_idf_once_over_every_collection(tmp_path: Path):
+    (tmp_path / "contexts").mkdir()
+    (tmp_path / "contexts" / "billing.md").write_text("Invoices are emailed monthly. Billing disputes close in a week.")
+    knowledge_bases = [
+        {"name": "product", "collection": "product_docs", "contexts": ["contexts/product.md"]},
+        {"name": "billing", "collection": "billing_docs", "contexts": ["contexts/billing.md"]},
+    ]
+    spec = _spec(tmp_path, embedding_model="feature-hash-512-idf", knowledge_bases=knowledge_bases)
+    runtime = SpecRuntime(spec, tmp_path)
+    embedder = runtime.retriever.vector_store.embedder
+    stored = sum(len(store.ids) for store in runtime.retriever.vector_store._stores.values())
+    assert embedder.fitted and embedder.document_count == stored
+
+    reloaded = SpecRuntime(spec, tmp_path)
+    assert np.array_equal(reloaded.retriever.vector_store.embedder.idf_weights(), embedder.idf_weights())
+
+
+def test_runtime_close_shuts_down_the_embedding_pool(tmp_path: Path):
+    runtime = SpecRuntime(_spec(tmp_path, embedding_workers=2, embedding_chunk_size=1), tmp_path)
+    embedder = runtime.retriever.vector_store.embedder
+    assert embedder._pool is not None
+
+    runtime.close()
+    assert embedder._pool is None
+
+
+def test_runtime_warms_up_the_configured_cross_encoder_model(tmp_path: Path, monkeypatch):
+    reranker = {"enabled": True, "provider": "cross_encoder", "model_name": "custom-minilm", "top_n": 1}
+    runtime = SpecRuntime(_spec(tmp_path, reranker=reranker), tmp_path)
+    assert isinstance(runtime.reranker, Reranker) and runtime.reranker.model_name == "custom-minilm"
+    assert not runtime.reranker.loaded
+
+    warmed = []
+    monkeypatch.setattr(Reranker, "warmup", lambda self: warmed.append(self.model_name) or self)
+    runtime.warmup()
+    assert warmed == ["custom-minilm"]
+
+
+def test_runtime_packs_retrieved_context_within_token_budget(tmp_path: Path):
+    unpacked = SpecRuntime(_spec(tmp_path, top_k=6), tmp_path)
+    prompt = unpacked._apply_rag("refund payment method")
+    assert prompt.count("\n- (") == 1  # the overlapping windows of product.md are merged into one chunk
+    assert "Orders ship within two business days. Refunds" in prompt
+
+    budgeted_dir = tmp_path / "budgeted"
+    budgeted_dir.mkdir()
+    budgeted = SpecRuntime(_spec(budgeted_dir, top_k=6, context_token_budget=5), budgeted_dir)
+    assert budgeted._apply_rag("refund payment method") == "refund payment method"
+    assert budgeted.last_retrieval.stages[-1].name == "pack"
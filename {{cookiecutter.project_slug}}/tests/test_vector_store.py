@@ -0,0 +1,508 @@
+import threading
+
+import numpy as np
+import pytest
+
+from {{ cookiecutter.project_slug }}.embeddings.hashing_embedder import HashingEmbedder
+from {{ cookiecutter.project_slug }}.vectordatabase.hnsw_index import HNSWIndex
+from {{ cookiecutter.project_slug }}.vectordatabase.ivf_index import IVFIndex
+from {{ cookiecutter.project_slug }}.vectordatabase.quantization import ProductQuantizer, ScalarQuantizer
+from {{ cookiecutter.project_slug }}.vectordatabase.vector_store import InMemoryVectorStore
+
+
+def _corpus(size: int = 200):
+    topics = ["refund", "delivery", "guardrails", "billing", "agents", "orchestration", "privacy"]
+    return [f"{topics[i % len(topics)]} policy note {i} about {topics[(i * 3) % len(topics)]}" for i in range(size)]
+
+
+def _reference_search(store: InMemoryVectorStore, docs, query: str, top_k: int):
+    query_vector = np.array(store.embedder.embed(query), dtype=np.float32)
+    scored = []
+    for idx, vector in enumerate(store.embedder.embed_documents(docs)):
+        vector = np.array(vector, dtype=np.float32)
+        denom = np.linalg.norm(vector) * np.linalg.norm(query_vector)
+        scored.append((idx, 0.0 if denom == 0 else float(np.dot(vector, query_vector) / denom)))
+    return sorted(scored, key=lambda item: item[1], reverse=True)[:top_k]
+
+
+def test_matrix_search_matches_reference_cosine():
+    docs = _corpus()
+    store = InMemoryVectorStore()
+    store.add_documents(docs[:50], index="kb")
+    store.add_documents(docs[50:], index="kb")  # crosses the initial matrix capacity
+
+    results = store.search("refund delivery policy", top_k=5, indexes=["kb"])
+    expected = _reference_search(store, docs, "refund delivery policy", top_k=5)
+
+    assert [hit["text"] for hit in results] == [docs[idx] for idx, _ in expected]
+    assert np.allclose([hit["score"] for hit in results], [score for _, score in expected], atol=1e-5)
+    assert results[0]["metadata"]["index"] == "kb"
+
+
+def test_search_across_indexes_and_empty_query():
+    store = InMemoryVectorStore()
+    store.add_documents(["alpha beta", "gamma"], index="one")
+    store.add_documents(["alpha delta"], metadatas=[{"source": "two.md"}], index="two")
+
+    results = store.search("alpha", top_k=2)
+    assert {hit["metadata"]["index"] for hit in results} == {"one", "two"}
+    assert store.search("", top_k=2)[0]["score"] == 0.0
+    assert store.search("alpha", indexes=["missing"]) == []
+
+
+def test_search_many_matches_single_query_search():
+    docs = _corpus(120)
+    store = InMemoryVectorStore()
+    store.add_documents(docs[:60], index="a")
+    store.add_documents(docs[60:], index="b")
+    queries = ["refund policy", "agents orchestration", "", "privacy billing note 7"]
+
+    batched = store.search_many(queries, top_k=4)
+    assert len(batched) == len(queries)
+    for query, hits in zip(queries, batched):
+        single = store.search(query, top_k=4)
+        assert [hit["text"] for hit in hits] == [hit["text"] for hit in single]
+        assert np.allclose([hit["score"] for hit in hits], [hit["score"] for hit in single], atol=1e-6)
+    assert store.search_many([]) == []
+
+
+def test_ivf_index_trains_and_tracks_exact_results():
+    docs = _corpus(600)
+    exact = InMemoryVectorStore()
+    ivf = InMemoryVectorStore(index_config={"type": "ivf", "nlist": 8, "nprobe": 8})
+    exact.add_documents(docs[:30], index="kb")
+    ivf.add_documents(docs[:30], index="kb")
+    assert not ivf._stores["kb"].ann.trained  # small indexes stay exact
+
+    exact.add_documents(docs[30:], index="kb")
+    ivf.add_documents(docs[30:], index="kb")
+    assert ivf._stores["kb"].ann.trained
+
+    # Probing every cluster scans every row, so results match exact search.
+    query = "delivery refund note"
+    assert [hit["text"] for hit in ivf.search(query, top_k=5)] == [hit["text"] for hit in exact.search(query, top_k=5)]
+
+    ivf._stores["kb"].ann.nprobe = 1
+    assert len(ivf.search(query, top_k=5)) == 5
+
+
+def test_unknown_index_type_raises():
+    store = InMemoryVectorStore(index_overrides={"kb": {"type": "missing"}})
+    with pytest.raises(ValueError):
+        store.add_documents(["text"], index="kb")
+
+
+def test_hnsw_index_supports_incremental_inserts():
+    docs = _corpus(300)
+    exact = InMemoryVectorStore()
+    hnsw = InMemoryVectorStore(index_config={"type": "hnsw", "m": 8, "ef_construction": 50, "ef_search": 300})
+    for start in range(0, len(docs), 100):
+        exact.add_documents(docs[start : start + 100], index="kb")
+        hnsw.add_documents(docs[start : start + 100], index="kb")
+    assert len(hnsw._stores["kb"].ann) == len(docs)
+
+    # A beam as wide as the index visits every reachable node, so results match exact search.
+    for query in ["delivery refund note", "agents privacy 42"]:
+        expected = [hit["text"] for hit in exact.search(query, top_k=5)]
+        assert [hit["text"] for hit in hnsw.search(query, top_k=5)] == expected
+
+
+@pytest.mark.parametrize("quantization", ["int8", "pq"])
+def test_quantized_search_rescores_shortlist(quantization):
+    docs = _corpus(400)
+    exact = InMemoryVectorStore()
+    quantized = InMemoryVectorStore(index_config={"quantization": quantization, "pq_subvectors": 16})
+    exact.add_documents(docs, index="kb")
+    quantized.add_documents(docs, index="kb")
+    store = quantized._stores["kb"]
+    assert store.quantizer.trained
+    assert store.quantizer.bytes_per_vector < store.matrix.itemsize * store.matrix.shape[1]
+
+    query = "billing privacy note"
+    expected = exact.search(query, top_k=3)
+    results = quantized.search(query, top_k=3)
+    # Re-scored hits carry exact float32 scores.
+    for hit in results:
+        assert hit["score"] == pytest.approx(next(e["score"] for e in exact.search(query, top_k=400) if e["text"] == hit["text"]))
+    assert results[0]["text"] == expected[0]["text"]
+
+
+@pytest.mark.parametrize("quantization", ["int8", "pq"])
+def test_quantized_indexes_keep_only_codes_in_memory(tmp_path, quantization):
+    docs = _corpus(400)
+    config = {"quantization": quantization, "pq_subvectors": 16}
+    rescored = InMemoryVectorStore(index_config=config, spill_directory=str(tmp_path / "spill"))
+    codes_only = InMemoryVectorStore(index_config={**config, "rescore": False})
+    for target in (rescored, codes_only):
+        target.add_documents(docs[:300], index="kb", ids=[str(i) for i in range(300)])
+    float_bytes = 4 * rescored._stores["kb"].dimensions
+
+    # Re-scored rows are paged in from a disk-backed map; codes-only indexes drop the float32 rows.
+    store = rescored._stores["kb"]
+    assert isinstance(store.matrix, np.memmap) and store.resident_bytes == store.quantizer.nbytes
+    assert store.resident_bytes / store.size < float_bytes
+    assert codes_only._stores["kb"].matrix is None
+    assert codes_only._stores["kb"].resident_bytes / 300 < float_bytes
+
+    # Appends, deletes, compaction and a save/load round trip keep working from the codes alone.
+    query = "billing privacy note"
+    for target in (rescored, codes_only):
+        target.add_documents(docs[300:], index="kb", ids=[str(i) for i in range(300, 400)])
+        assert target.delete([str(i) for i in range(100)]) == 100
+        target.compact()
+        assert len(target._stores["kb"].ids) == 300
+    assert isinstance(rescored._stores["kb"].matrix, np.memmap)
+    assert codes_only._stores["kb"].matrix is None
+    expected = codes_only.search(query, top_k=5)
+    assert {hit["text"] for hit in expected} <= set(docs[100:])
+    codes_only.save(str(tmp_path / "index"), fingerprint="v1")
+    loaded = InMemoryVectorStore(index_config={**config, "rescore": False})
+    assert loaded.load(str(tmp_path / "index"), fingerprint="v1")
+    assert loaded._stores["kb"].matrix is None
+    assert [hit["id"] for hit in loaded.search(query, top_k=5)] == [hit["id"] for hit in expected]
+
+
+@pytest.mark.parametrize("quantizer_cls", [ScalarQuantizer, ProductQuantizer])
+def test_quantizer_appends_encode_only_new_rows_in_blocks(quantizer_cls):
+    vectors = np.random.default_rng(0).normal(size=(600, 32)).astype(np.float32)
+    options = {"subvectors": 8, "centroids": 16} if quantizer_cls is ProductQuantizer else {}
+    quantizer = quantizer_cls(min_train_size=64, block_size=50, max_train_points=300, **options)
+    quantizer.add(vectors[:400], 0)
+    frozen = quantizer.snapshot()
+    before = frozen.codes.copy()
+
+    encoded = []
+    encode = quantizer._encode
+    quantizer._encode = lambda residuals: encoded.append(len(residuals)) or encode(residuals)
+    quantizer.add(vectors[:520], 400)
+    # Below the retrain threshold only the 120 new rows are encoded, one block at a time.
+    assert encoded == [50, 50, 20] and quantizer.size == 520
+    np.testing.assert_array_equal(quantizer.codes, encode(vectors[:520] - quantizer.mean))
+    np.testing.assert_array_equal(frozen.codes, before)
+
+    assert quantizer.nbytes >= quantizer.codes.nbytes + quantizer.mean.nbytes
+    assert quantizer.bytes_per_vector < vectors.itemsize * vectors.shape[1]
+
+
+def test_save_and_memmap_load_round_trip(tmp_path):
+    docs = _corpus(50)
+    store = InMemoryVectorStore()
+    store.add_documents(docs[:40], metadatas=[{"source": f"doc-{i}"} for i in range(40)], index="kb")
+    store.add_documents(docs[40:], index="other")
+    store.save(str(tmp_path), fingerprint="v1")
+
+    loaded = InMemoryVectorStore()
+    assert not loaded.load(str(tmp_path), fingerprint="v2")
+    assert loaded.load(str(tmp_path), fingerprint="v1")
+    assert isinstance(loaded._stores["kb"].matrix, np.memmap)
+    assert loaded.search("refund policy", top_k=4) == store.search("refund policy", top_k=4)
+
+    # Appending after a load copies into memory and leaves the mapped file untouched.
+    loaded.add_documents(["fresh refund policy"], index="kb")
+    assert not isinstance(loaded._stores["kb"].matrix, np.memmap)
+    assert loaded.search("fresh refund policy", top_k=1)[0]["text"] == "fresh refund policy"
+
+    store.save(str(tmp_path), fingerprint="v1")
+    assert len(list(tmp_path.glob("*.f32"))) == 2  # previous generation cleaned up
+
+
+def _saved_state_array(index, config):
+    if "quantization" in config:
+        return index.quantizer.codes
+    if config["type"] == "ivf":
+        return index.ann._assignments
+    return getattr(index.ann._links[0], "neighbors", None)
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        {"type": "hnsw", "m": 8},
+        {"type": "ivf", "nlist": 8, "nprobe": 2},
+        {"type": "flat", "quantization": "int8"},
+        {"type": "flat", "quantization": "pq", "pq_subvectors": 16},
+    ],
+)
+def test_load_maps_saved_ann_and_quantizer_state_instead_of_rebuilding(tmp_path, monkeypatch, config):
+    docs = _corpus(300)
+    store = InMemoryVectorStore(index_config=config)
+    store.add_documents(docs, index="kb")
+    store.save(str(tmp_path), fingerprint="v1")
+    queries = ["refund policy note", "privacy agents 42", "billing delivery"]
+    expected = [store.search(query, top_k=5) for query in queries]
+
+    def rebuilt(*_args, **_kwargs):
+        raise AssertionError("saved ANN/quantizer state should be mapped, not rebuilt")
+
+    for cls in (HNSWIndex, IVFIndex, ScalarQuantizer, ProductQuantizer):
+        monkeypatch.setattr(cls, "add", rebuilt)
+    loaded = InMemoryVectorStore(index_config=config)
+    assert loaded.load(str(tmp_path), fingerprint="v1")
+    assert [loaded.search(query, top_k=5) for query in queries] == expected
+    assert isinstance(_saved_state_array(loaded._stores["kb"], config), np.memmap)
+
+    # Appends thaw the mapped state and extend it like the original; a changed config rebuilds instead.
+    monkeypatch.undo()
+    for target in (store, loaded):
+        target.add_documents(["fresh refund policy", "fresh privacy agents"], ids=["fresh-1", "fresh-2"], index="kb")
+    assert [loaded.search(query, top_k=5) for query in queries] == [store.search(query, top_k=5) for query in queries]
+    other = InMemoryVectorStore(index_config={**config, "rescore_factor": 8})
+    assert other.load(str(tmp_path), fingerprint="v1")
+    assert not isinstance(_saved_state_array(other._stores["kb"], config), np.memmap)
+
+
+def test_where_filter_prefilters_rows_by_metadata():
+    store = InMemoryVectorStore()
+    docs = _corpus(60)
+    metadatas = [
+        {"source": f"file-{i % 3}.md", "knowledge_base": "kb", "tags": ["even" if i % 2 == 0 else "odd"]}
+        for i in range(60)
+    ]
+    store.add_documents(docs, metadatas=metadatas, index="kb")
+
+    results = store.search("refund policy", top_k=5, where={"source": "file-1.md", "tags": "even"})
+    assert len(results) == 5
+    assert all(hit["metadata"]["source"] == "file-1.md" and "even" in hit["metadata"]["tags"] for hit in results)
+
+    expected = [hit for hit in store.search("refund policy", top_k=60) if hit["metadata"]["source"] != "file-2.md"][:4]
+    filtered = store.search("refund policy", top_k=4, where={"source": ["file-0.md", "file-1.md"]})
+    assert [hit["text"] for hit in filtered] == [hit["text"] for hit in expected]
+    assert store.search("refund policy", where={"source": "missing.md"}) == []
+    for where in [{"source": {"$in": ["file-1.md"]}}, {"tags": [["even"]]}, ["source"]]:
+        with pytest.raises(ValueError, match="where"):
+            store.search("refund policy", where=where)
+
+
+def test_delete_and_upsert_tombstone_rows_until_compaction():
+    docs = _corpus(40)
+    store = InMemoryVectorStore(compaction_threshold=0.5, background_compaction=False)
+    ids = store.add_documents(docs, index="kb", ids=[f"doc-{i}" for i in range(40)])
+    assert ids[0] == "doc-0"
+    with pytest.raises(ValueError):
+        store.add_documents(["duplicate"], index="kb", ids=["doc-0"])
+
+    # Deleting only unknown ids publishes nothing, so cached results for the index stay valid.
+    snapshot, version = store._snapshot, store.version(["kb"])
+    assert store.delete(["missing"]) == 0 and store.delete(["missing"], index="kb") == 0
+    assert store._snapshot is snapshot and store.version(["kb"]) == version
+
+    top = store.search("refund policy", top_k=1)[0]
+    assert store.delete([top["id"], "missing"]) == 1 and store.version(["kb"]) != version
+    assert top["id"] not in [hit["id"] for hit in store.search("refund policy", top_k=40)]
+    assert len(store.search("refund policy", top_k=100)) == 39
+
+    store.upsert_documents(["fresh refund policy"], index="kb", ids=["doc-5"])
+    hits = store.search("fresh refund policy", top_k=40)
+    assert [hit["text"] for hit in hits].count("fresh refund policy") == 1
+    assert docs[5] not in [hit["text"] for hit in hits]
+    assert store._stores["kb"].deleted == 2
+
+    store.delete([f"doc-{i}" for i in range(10, 30)], index="kb")
+    compacted = store._stores["kb"]
+    assert compacted.deleted == 0 and compacted.size == 19
+    assert store.search("fresh refund policy", top_k=1)[0]["id"] == "doc-5"
+
+
+def test_background_compaction_swaps_index_without_disturbing_searches(tmp_path):
+    docs = _corpus(300)
+    store = InMemoryVectorStore(index_config={"type": "ivf", "nlist": 8, "nprobe": 8}, compaction_threshold=0.1)
+    store.add_documents(docs, index="kb", ids=[str(i) for i in range(300)])
+    before = store._stores["kb"]
+    store.delete([str(i) for i in range(0, 300, 2)])
+
+    # Searches during compaction keep reading a consistent index and never return deleted rows.
+    for _ in range(20):
+        assert all(int(hit["id"]) % 2 for hit in store.search("billing privacy note", top_k=10))
+    for _ in range(200):
+        if store._stores["kb"] is not before:
+            break
+        threading.Event().wait(0.01)
+    assert store._stores["kb"].size == 150 and store._stores["kb"].ann.trained
+
+    store.save(str(tmp_path))
+    loaded = InMemoryVectorStore()
+    assert loaded.load(str(tmp_path))
+    assert [hit["id"] for hit in loaded.search("billing privacy note", top_k=3)] == [
+        hit["id"] for hit in store.search("billing privacy note", top_k=3)
+    ]
+
+
+def test_sharded_search_matches_single_process_search():
+    docs = _corpus(500)
+    single = InMemoryVectorStore()
+    sharded = InMemoryVectorStore(search_workers=2, shard_min_rows=0)
+    try:
+        for store in (single, sharded):
+            store.add_documents(docs, index="kb", ids=[str(i) for i in range(500)])
+        queries = ["refund delivery policy", "agents orchestration note 17"]
+        for expected, hits in zip(single.search_many(queries, top_k=6), sharded.search_many(queries, top_k=6)):
+            assert [hit["id"] for hit in hits] == [hit["id"] for hit in expected]
+            assert np.allclose([hit["score"] for hit in hits], [hit["score"] for hit in expected], atol=1e-6)
+
+        # Small writes reuse the shared block: new rows are scored in-process, tombstoned ones filtered out.
+        block = sharded._sharded._blocks["kb"].memory.name
+        winner = sharded.search("refund delivery policy", top_k=1)[0]["id"]
+        for store in (single, sharded):
+            store.add_documents(["refund delivery policy"], index="kb", ids=["new"])
+            store.delete([winner])
+        for expected, hits in zip(single.search_many(queries, top_k=6), sharded.search_many(queries, top_k=6)):
+            assert [hit["id"] for hit in hits] == [hit["id"] for hit in expected]
+        refreshed = [hit["id"] for hit in sharded.search("refund delivery policy", top_k=6)]
+        assert refreshed[0] == "new" and winner not in refreshed
+        assert sharded._sharded._blocks["kb"].memory.name == block
+    finally:
+        sharded.close()
+
+
+def test_sharded_block_in_use_is_unlinked_only_after_its_last_query():
+    from multiprocessing import shared_memory
+
+    store = InMemoryVectorStore(search_workers=2, shard_min_rows=0)
+    try:
+        store.add_documents(_corpus(200), index="kb")
+        searcher = store._sharded
+        held = searcher._acquire("kb", store._snapshot.stores["kb"])  # an in-flight query on this block
+        store.add_documents(_corpus(100), index="kb")  # drifts past rebuild_fraction: the next query re-copies
+        store.search("refund policy", top_k=3)
+        assert searcher._blocks["kb"] is not held and held.retired
+
+        shared_memory.SharedMemory(name=held.memory.name).close()  # still attachable by workers
+        searcher._release(held)
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=held.memory.name)
+    finally:
+        store.close()
+
+
+def test_lexical_and_hybrid_search_surface_exact_keyword_matches():
+    docs = _corpus(80) + ["status update for order ORD-7731 shipped"]
+    store = InMemoryVectorStore(search_mode="hybrid")
+    store.add_documents(docs, index="kb", ids=[str(i) for i in range(len(docs))])
+
+    lexical = store.search("where is ORD-7731", top_k=3, mode="lexical")
+    assert [hit["id"] for hit in lexical] == ["80"]  # only rows sharing a term are returned
+    assert store.search("status of order ORD-7731", top_k=3)[0]["id"] == "80"
+    assert store.search("ord-7731", top_k=3, mode="lexical", where={"index": "missing"}) == []
+
+    store.delete(["80"])
+    assert store.search("ord-7731", top_k=3, mode="lexical") == []
+
+    weighted = InMemoryVectorStore(search_mode="hybrid", fusion="weighted", vector_weight=0.0)
+    weighted.add_documents(docs, index="kb")
+    assert weighted.search("refund ORD-7731", top_k=1)[0]["text"] == docs[-1]
+    with pytest.raises(ValueError):
+        InMemoryVectorStore(search_mode="fuzzy")
+
+
+def test_multi_index_merge_matches_global_ranking():
+    docs = _corpus(90)
+    store = InMemoryVectorStore()
+    for position, name in enumerate(["a", "b", "c"]):
+        store.add_documents(docs[position * 30 : (position + 1) * 30] + ["shared refund text"], index=name)
+
+    merged = store.search("refund policy note", top_k=7)
+    pooled = [hit for name in ["a", "b", "c"] for hit in store.search("refund policy note", top_k=7, indexes=[name])]
+    assert merged == sorted(pooled, key=lambda hit: hit["score"], reverse=True)[:7]
+    assert [hit["metadata"]["index"] for hit in store.search("shared refund text", top_k=3)] == ["a", "b", "c"]
+
+
+def test_concurrent_writers_and_readers_see_consistent_snapshots():
+    store = InMemoryVectorStore(compaction_threshold=0.3)
+    store.add_documents([f"doc-{i} version 0 refund policy" for i in range(50)], ids=[str(i) for i in range(50)])
+    errors = []
+    stop = threading.Event()
+
+    def writer(offset):
+        try:
+            for version in range(1, 30):
+                ids = [str(i) for i in range(offset, 50, 2)]
+                store.upsert_documents([f"doc-{i} version {version} refund policy" for i in ids], ids=ids)
+                store.add_documents([f"extra-{offset}-{version} refund"], ids=[f"extra-{offset}-{version}"])
+                store.delete([f"extra-{offset}-{version - 1}"])
+        except Exception as exc:  # pragma: no cover - surfaced by the assertion below
+            errors.append(exc)
+
+    def reader():
+        try:
+            while not stop.is_set():
+                for mode in ("vector", "lexical"):
+                    hits = store.search("refund policy version", top_k=100, mode=mode)
+                    ids = [hit["id"] for hit in hits]
+                    # An upsert is never half-visible: each id appears once, with its own text.
+                    assert len(ids) == len(set(ids))
+                    assert all(hit["text"].startswith(("doc-" + hit["id"] + " ", hit["id"])) for hit in hits)
+                    assert sum(1 for i in ids if not i.startswith("extra")) == 50
+        except Exception as exc:  # pragma: no cover
+            errors.append(exc)
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    writers = [threading.Thread(target=writer, args=(offset,)) for offset in (0, 1)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    assert not errors, errors
+    final = store.search("refund policy", top_k=100)
+    assert sorted(hit["id"] for hit in final if not hit["id"].startswith("extra")) == sorted(str(i) for i in range(50))
+    assert all("version 29" in hit["text"] for hit in final if not hit["id"].startswith("extra"))
+
+
+@pytest.mark.parametrize(
+    "index_config",
+    [
+        {"type": "hnsw", "m": 4, "ef_construction": 20, "ef_search": 10},
+        {"type": "ivf", "nlist": 4, "nprobe": 1},
+        {"type": "flat", "quantization": "int8", "rescore": False},
+    ],
+)
+def test_held_snapshot_results_do_not_move_with_later_writes(index_config):
+    store = InMemoryVectorStore(index_config=index_config)
+    docs = _corpus(120)
+    store.add_documents(docs, index="kb", ids=[str(i) for i in range(len(docs))])
+    held = store._snapshot.stores["kb"]
+    queries = ["refund policy note", "privacy agents 17"]
+    query_vectors = np.stack([np.asarray(store.embedder.embed(query), dtype=np.float32) for query in queries])
+    lexical_before = held.lexical_top_k(queries, 10)
+    vector_before = held.top_k(query_vectors, 10)
+
+    for round_ in range(4):
+        # Retrains the IVF/quantizer, relinks HNSW neighbours and shifts the BM25 statistics.
+        added = [f"refund policy note refund {round_} {i}" for i in range(150)]
+        store.add_documents(added, index="kb", ids=[f"n{round_}-{i}" for i in range(150)])
+        store.upsert_documents(["privacy agents refund refund"], index="kb", ids=["3"])
+
+    assert held.lexical_top_k(queries, 10) == lexical_before
+    assert held.top_k(query_vectors, 10) == vector_before
+    assert store._snapshot.stores["kb"].lexical_top_k(queries, 10) != lexical_before
+
+
+def test_mmr_search_spreads_top_k_over_distinct_documents():
+    store = InMemoryVectorStore(embedder=HashingEmbedder(dimensions=512))
+    store.add_documents(
+        [
+            "refund policy: refunds go back to the original card within five days",
+            "refund policy: refunds go back to the original card within five days.",
+            "refund policy - refunds go back to the original card within five days",
+            "refund exceptions: gift cards and vouchers are never refunded",
+            "delivery windows for the north region",
+        ],
+        index="kb",
+    )
+    plain = [hit["text"] for hit in store.search("refund policy card", top_k=2, indexes=["kb"])]
+    assert all(text.startswith("refund policy") for text in plain)
+
+    diverse = store.search("refund policy card", top_k=2, indexes=["kb"], mmr_lambda=0.7)
+    assert diverse[0]["text"] == plain[0]
+    assert diverse[1]["text"].startswith("refund exceptions")
+    assert store.search("refund policy card", top_k=2, indexes=["kb"], mmr_lambda=1.0) == store.search(
+        "refund policy card", top_k=2, indexes=["kb"]
+    )
+    lexical = store.search("refund policy card", top_k=2, indexes=["kb"], mode="lexical", mmr_lambda=0.3)
+    assert {hit["text"][:13] for hit in lexical} == {"refund policy", "refund except"}
+
+    with pytest.raises(ValueError):
+        store.search("refund", indexes=["kb"], mmr_lambda=1.5)
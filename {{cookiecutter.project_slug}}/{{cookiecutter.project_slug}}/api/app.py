@@ -6,7 +6,9 @@ existing template primitives, then invoke it via a POST endpoint. Extend the
 builder functions to wire your own tools, storage, or routing logic.
 """
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional
 
@@ -15,11 +17,27 @@ from {{ cookiecutter.project_slug }}.config.config_loader import ConfigLoader
 from {{ cookiecutter.project_slug }}.guardrails.policies import build_default_guardrails
 from {{ cookiecutter.project_slug }}.llms.base_llm import BaseLLM
 from {{ cookiecutter.project_slug }}.orchestration import patterns
+from {{ cookiecutter.project_slug }}.orchestration.spec_runtime import load_workflow
 from {{ cookiecutter.project_slug }}.prompt.prompt_template import PromptTemplate
 from {{ cookiecutter.project_slug }}.protocols.a2a_protocol import AgentToAgentProtocol
 from {{ cookiecutter.project_slug }}.tools.tools import assemble_tools
 
-app = FastAPI(title="{{ cookiecutter.project_name }} Agent API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the spec workflow (WORKFLOW_SPEC) once at startup and load its reranker model before the first request.
+    spec_path = ConfigLoader().load_config().get("workflow_spec")
+    app.state.runtime = load_workflow(spec_path) if spec_path else None
+    if app.state.runtime is not None:
+        app.state.runtime.warmup()
+    try:
+        yield
+    finally:
+        if app.state.runtime is not None:
+            app.state.runtime.close()
+
+
+app = FastAPI(title="{{ cookiecutter.project_name }} Agent API", lifespan=lifespan)
 
 
 class InvokeRequest(BaseModel):
@@ -112,14 +130,20 @@ def health():
 
 
 @app.post("/agent/invoke")
-def invoke(req: InvokeRequest):
+def invoke(req: InvokeRequest, request: Request):
     config = ConfigLoader().load_config()
     channels = config.get("channel_clients", {})
-    pattern = build_pattern(req.pattern, config)
-    if isinstance(pattern, Agent):
-        result = pattern.execute(req.query)
+    if req.pattern == "workflow":
+        runtime = getattr(request.app.state, "runtime", None)
+        if runtime is None:
+            raise HTTPException(status_code=400, detail="No workflow loaded; set WORKFLOW_SPEC")
+        result = runtime.run(req.query)
     else:
-        result = pattern.run(req.query)  # type: ignore[attr-defined]
+        pattern = build_pattern(req.pattern, config)
+        if isinstance(pattern, Agent):
+            result = pattern.execute(req.query)
+        else:
+            result = pattern.run(req.query)  # type: ignore[attr-defined]
     delivery = None
     if req.channel:
         client = channels.get(req.channel)
@@ -46,6 +46,7 @@ class ConfigLoader:
             ),
             "openai_agent_sdk": os.getenv("OPENAI_AGENT_SDK", "{{ cookiecutter.openai_agent_sdk }}"),
             "openai_agent_id": os.getenv("OPENAI_AGENT_ID"),
+            "workflow_spec": os.getenv("WORKFLOW_SPEC", ""),
             "mlflow_tracking_uri": os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000"),
             "langfuse_host": os.getenv("LANGFUSE_HOST", "https://cloud.langfuse.com"),
             "langfuse_public_key": os.getenv("LANGFUSE_PUBLIC_KEY", "your-public-key"),
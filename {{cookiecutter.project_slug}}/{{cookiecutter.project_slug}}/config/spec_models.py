@@ -23,7 +23,7 @@ def _ensure_env_ref(value: str) -> str:
 
 
 class ChunkingConfig(BaseModel):
-    size: int = Field(default=500, description="Chunk size in tokens/characters.")
+    size: int = Field(default=500, description="Chunk size in characters (about four per token).")
     overlap: int = Field(default=50, description="Chunk overlap to preserve context.")
     strategy: Literal["sliding_window", "sentence", "recursive"] = "sliding_window"
 
@@ -31,9 +31,19 @@ class ChunkingConfig(BaseModel):
 class RerankerConfig(BaseModel):
     enabled: bool = False
     provider: Literal["none", "local", "cross_encoder"] = "none"
+    model_name: str = "all-MiniLM-L6-v2"
     top_n: int = 3
 
 
+class HybridSearchConfig(BaseModel):
+    fusion: Literal["rrf", "weighted"] = Field(
+        default="rrf", description="Reciprocal rank fusion or a weighted mix of normalized scores."
+    )
+    rrf_k: int = Field(default=60, ge=1, description="RRF rank offset; larger values flatten rank differences.")
+    vector_weight: float = Field(default=0.5, ge=0.0, le=1.0, description="Weighted fusion: share of the vector score.")
+    candidates: int = Field(default=4, ge=1, description="Each ranking contributes top_k * candidates hits to fusion.")
+
+
 class KnowledgeBase(BaseModel):
     name: str
     description: Optional[str] = None
@@ -50,11 +60,26 @@ class KnowledgeBase(BaseModel):
 
 class RAGConfig(BaseModel):
     enabled: bool = True
-    retriever: Literal["in_memory", "stub"] = "in_memory"
+    retriever: Literal["in_memory", "bm25", "hybrid", "stub"] = Field(
+        default="in_memory", description="Vector (in_memory), keyword (bm25) or fused (hybrid) retrieval."
+    )
     top_k: int = 3
     embedding_model: str = "local-hash-128"
+    embedding_workers: int = Field(default=1, ge=1, description="Processes used to embed large context ingests.")
+    embedding_chunk_size: int = Field(default=2048, ge=1, description="Documents per parallel embedding task.")
     chunking: ChunkingConfig = Field(default_factory=ChunkingConfig)
+    hybrid: HybridSearchConfig = Field(default_factory=HybridSearchConfig)
     reranker: Optional[RerankerConfig] = None
+    mmr_lambda: Optional[float] = Field(
+        default=None, ge=0, le=1, description="Diversify results by maximal marginal relevance (0 = most diverse)."
+    )
+    query_cache_size: int = Field(default=1024, ge=0, description="Cached query results; 0 disables the cache.")
+    query_cache_ttl_seconds: Optional[float] = Field(
+        default=300.0, gt=0, description="Age after which a cached query result is recomputed; unset keeps it."
+    )
+    context_token_budget: Optional[int] = Field(
+        default=None, ge=1, description="Approximate token budget for retrieved context; unset keeps every packed chunk."
+    )
     citations: bool = True
     collection: str = "sparkgen"
     knowledge_bases: List[KnowledgeBase] = Field(default_factory=list)
@@ -74,10 +99,36 @@ class MemoryConfig(BaseModel):
     )
 
 
+class VectorIndexConfig(BaseModel):
+    type: Literal["flat", "ivf", "hnsw"] = Field(
+        default="flat", description="Exact (flat), inverted-file (ivf), or graph (hnsw) search."
+    )
+    nlist: int = Field(default=64, ge=1, description="IVF: number of k-means clusters.")
+    nprobe: int = Field(default=8, ge=1, description="IVF: clusters scanned per query.")
+    m: int = Field(default=16, ge=2, description="HNSW: links per node on upper layers (2x on layer 0).")
+    ef_construction: int = Field(default=100, ge=1, description="HNSW: beam width while inserting.")
+    ef_search: int = Field(default=50, ge=1, description="HNSW: beam width while querying.")
+    quantization: Literal["none", "int8", "pq"] = Field(
+        default="none", description="Score on int8 scalar or product-quantized codes before re-scoring."
+    )
+    pq_subvectors: int = Field(default=16, ge=1, description="PQ: byte codes per vector; must divide dimensions.")
+    rescore: bool = Field(default=True, description="Re-score the quantized shortlist in float32.")
+    rescore_factor: int = Field(default=4, ge=1, description="Shortlist size as a multiple of top_k.")
+
+
 class VectorStoreConfig(BaseModel):
-    backend: Literal["local_memory", "chroma_stub"] = "local_memory"
+    backend: Literal["local_memory", "local_hnsw", "chroma_stub"] = Field(
+        default="local_memory", description="local_hnsw defaults every index to an HNSW graph."
+    )
     collection: str = "sparkgen_vectors"
     path: Optional[str] = None
+    index: VectorIndexConfig = Field(default_factory=VectorIndexConfig)
+    indexes: Dict[str, VectorIndexConfig] = Field(
+        default_factory=dict, description="Per-collection index overrides keyed by collection name."
+    )
+    search_workers: int = Field(
+        default=1, ge=1, description="Processes used to shard exact searches over large collections."
+    )
     credentials: Dict[str, str] = Field(default_factory=dict)
 
     @field_validator("credentials")
@@ -105,6 +156,10 @@ class StorageConfig(BaseModel):
     vector_store: VectorStoreConfig = Field(default_factory=VectorStoreConfig)
     document_store: DocumentStoreConfig = Field(default_factory=DocumentStoreConfig)
     memory_store_path: str = ".sparkgen_memory.json"
+    embedding_cache_path: Optional[str] = Field(
+        default=None, description="SQLite file caching document embeddings across re-indexes."
+    )
+    embedding_cache_max_entries: int = Field(default=500_000, ge=1, description="Embeddings kept before LRU eviction.")
 
 
 class MCPTool(BaseModel):
@@ -0,0 +1,202 @@
+"""
+Streaming text chunkers for RAG ingestion.
+
+Every strategy is a generator over a string, a file-like object (read in
+``size``-character blocks) or any iterable of string pieces, runs in O(n) over
+the input and buffers about two chunk windows of text (plus the longest piece an
+iterable yields). Chunks are exact substrings of the input, so
+neighbouring chunks share their overlap verbatim. ``size`` and ``overlap`` are
+measured in characters (roughly four per LLM token).
+"""
+
+import re
+from collections import deque
+from typing import Deque, Iterable, Iterator, List, Pattern, Sequence, Tuple, Union
+
+TextSource = Union[str, Iterable[str]]
+
+CHUNKING_STRATEGIES = ("sliding_window", "sentence", "recursive")
+
+# A sentence ends after terminal punctuation (plus closing quotes/brackets) and whitespace, or at a blank line.
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+|\n[ \t]*\n\s*")
+PARAGRAPH_END = re.compile(r"\n[ \t]*\n\s*")
+# Separators tried in order once a paragraph is still longer than the chunk size.
+RECURSIVE_SEPARATORS = ("\n", ". ", " ")
+
+
+def _blocks(source: TextSource, block_size: int) -> Iterator[str]:
+    """Re-cut ``source`` into blocks of at least ``block_size`` characters (the last may be shorter)."""
+
+    if isinstance(source, str):
+        for start in range(0, len(source), block_size):
+            yield source[start : start + block_size]
+        return
+    read = getattr(source, "read", None)
+    if read is not None:
+        # Files are read in blocks, so one huge line never has to sit in memory whole.
+        for block in iter(lambda: read(block_size), ""):
+            yield block
+        return
+    pending: List[str] = []
+    pending_length = 0
+    for piece in source:
+        pending.append(piece)
+        pending_length += len(piece)
+        if pending_length >= block_size:
+            yield "".join(pending)
+            pending, pending_length = [], 0
+    if pending:
+        yield "".join(pending)
+
+
+def _stream_units(
+    source: TextSource, pattern: Pattern[str], limit: int, separators: Sequence[str] = ()
+) -> Iterator[Tuple[str, bool]]:
+    """
+    Yield consecutive units of the stream as ``(text, whole)``, each ending right
+    after a ``pattern`` match. A unit that would grow past ``limit`` characters
+    is cut, with ``whole`` set to ``False``: after the last of the first
+    ``separators`` found before the limit, or without ``separators`` at the last
+    newline or space (or exactly at the limit). The buffer never holds more
+    than ``limit`` characters of carry-over plus one block.
+    """
+
+    buffer = ""
+    for block in _blocks(source, limit):
+        buffer += block
+        start = 0
+        while True:
+            match = pattern.search(buffer, start)
+            # A match touching the end of the buffer may still grow with the next block.
+            if match is not None and match.end() < len(buffer) and match.end() - start <= limit:
+                yield buffer[start : match.end()], True
+                start = match.end()
+                continue
+            if len(buffer) - start <= limit:
+                break
+            window = buffer[start : start + limit]
+            cut = _cut(window, separators) if separators else max(window.rfind("\n"), window.rfind(" ")) + 1 or limit
+            yield window[:cut], False
+            start += cut
+        buffer = buffer[start:]
+    if buffer:
+        yield buffer, True
+
+
+def _cut(window: str, separators: Sequence[str]) -> int:
+    """Length of ``window`` up to the end of the last occurrence of the first separator found in it (else all of it)."""
+
+    for separator in separators:
+        position = window.rfind(separator)
+        if position != -1:
+            return position + len(separator)
+    return len(window)
+
+
+def _split_fragment(text: str) -> Iterator[str]:
+    """Split a cut-off part of an over-long paragraph on the first ``RECURSIVE_SEPARATORS`` entry it contains."""
+
+    for separator in RECURSIVE_SEPARATORS:
+        if separator in text:
+            start = 0
+            while start < len(text):
+                found = text.find(separator, start)
+                end = len(text) if found == -1 else found + len(separator)
+                yield text[start:end]
+                start = end
+            return
+    yield text
+
+
+def _merge_pieces(pieces: Iterable[str], size: int, overlap: int) -> Iterator[str]:
+    """
+    Greedily join consecutive pieces (each at most ``size`` long) into chunks of
+    at most ``size`` characters. A new chunk starts with the trailing pieces of
+    the previous one that fit in ``overlap`` characters.
+    """
+
+    window: Deque[str] = deque()
+    length = 0
+    for piece in pieces:
+        if not piece:
+            continue
+        if window and length + len(piece) > size:
+            yield "".join(window)
+            while window and (length > overlap or length + len(piece) > size):
+                length -= len(window.popleft())
+        window.append(piece)
+        length += len(piece)
+    if window:
+        yield "".join(window)
+
+
+def sliding_window_chunks(source: TextSource, size: int, overlap: int) -> Iterator[str]:
+    """
+    Fixed windows of ``size`` characters, each starting ``size - overlap`` after
+    the previous one (``size`` when the overlap is not smaller than the size).
+    """
+
+    if size <= 0:
+        yield source if isinstance(source, str) else "".join(source)
+        return
+    step = size - overlap if overlap < size else size
+    buffer = ""
+    for block in _blocks(source, size):
+        buffer += block
+        start = 0
+        # Only windows that do not reach the end of the buffer are final; the tail may still grow.
+        while len(buffer) - start > size:
+            yield buffer[start : start + size]
+            start += step
+        buffer = buffer[start:]
+    if buffer:
+        yield buffer
+
+
+def sentence_chunks(source: TextSource, size: int, overlap: int) -> Iterator[str]:
+    """
+    Whole sentences packed into chunks of at most ``size`` characters, with up
+    to ``overlap`` characters of trailing sentences repeated in the next chunk.
+    Sentences longer than ``size`` are cut at whitespace.
+    """
+
+    if size <= 0:
+        yield from sliding_window_chunks(source, size, overlap)
+        return
+    sentences = (sentence for sentence, _ in _stream_units(source, SENTENCE_END, size))
+    yield from _merge_pieces(sentences, size, overlap)
+
+
+def recursive_chunks(source: TextSource, size: int, overlap: int) -> Iterator[str]:
+    """
+    Paragraphs packed into chunks of at most ``size`` characters; paragraphs
+    that are too long are split on lines, then sentences, then words, then
+    characters, as needed.
+
+    A paragraph is never buffered whole: one longer than ``size`` arrives in
+    ``size``-character pieces cut at the preferred separator, and each piece is
+    split on the separator it was cut at. Memory stays at about two windows of
+    ``size`` however long a paragraph or line is.
+    """
+
+    if size <= 0:
+        yield from sliding_window_chunks(source, size, overlap)
+        return
+    pieces = (
+        piece
+        for unit, whole in _stream_units(source, PARAGRAPH_END, size, RECURSIVE_SEPARATORS)
+        for piece in ([unit] if whole else _split_fragment(unit))
+    )
+    yield from _merge_pieces(pieces, size, overlap)
+
+
+def chunk_text(source: TextSource, size: int, overlap: int, strategy: str = "sliding_window") -> Iterator[str]:
+    """Chunk ``source`` with one of ``CHUNKING_STRATEGIES``."""
+
+    if strategy == "sliding_window":
+        return sliding_window_chunks(source, size, overlap)
+    if strategy == "sentence":
+        return sentence_chunks(source, size, overlap)
+    if strategy == "recursive":
+        return recursive_chunks(source, size, overlap)
+    raise ValueError(f"Unknown chunking strategy: {strategy}")
@@ -1,34 +1,141 @@
 import hashlib
-from typing import List, Sequence
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import numpy as np
 
+from {{ cookiecutter.project_slug }}.embeddings.embedding_cache import EmbeddingCache, text_digest
+
+# Embedders living in pool worker processes, keyed by their settings so token caches stay warm across tasks.
+_WORKER_EMBEDDERS: Dict[Tuple[int, int, int], "Embedder"] = {}
+
+
+def _embed_in_worker(settings: Tuple[int, int, int], documents: Sequence[str]) -> np.ndarray:
+    """Pool task: embed one chunk and return it as a float32 block (pickled as a buffer, not as lists)."""
+    embedder = _WORKER_EMBEDDERS.get(settings)
+    if embedder is None:
+        dimensions, batch_rows, cache_size = settings
+        embedder = _WORKER_EMBEDDERS[settings] = Embedder(dimensions, batch_rows=batch_rows, cache_size=cache_size)
+    return embedder._embed_uncached(documents)
+
 
 class Embedder:
     """
     Lightweight, dependency-free embedder that produces deterministic vectors.
     Designed for starter projects to avoid heavy external services.
+
+    Token vectors are kept in a bounded LRU cache, so frequent tokens are hashed
+    once rather than on every occurrence. ``load_vocabulary`` can additionally
+    pin a precomputed matrix of known tokens that never gets evicted.
+
+    With ``workers > 1``, batches larger than ``chunk_size`` documents are split
+    into chunks embedded by a process pool; chunks come back as float32 blocks
+    and are reassembled in input order.
     """
 
-    def __init__(self, dimensions: int = 128) -> None:
+    def __init__(
+        self,
+        dimensions: int = 128,
+        batch_rows: int = 4096,
+        cache_size: int = 50_000,
+        model_name: Optional[str] = None,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        workers: int = 1,
+        chunk_size: int = 2048,
+    ) -> None:
         """
         Initializes the Embedder instance.
 
         Args:
             dimensions (int): Size of the embedding vector to generate.
+            batch_rows (int): Documents summed per step in ``embed_batch``; bounds its temporary memory.
+            cache_size (int): Token vectors kept in the LRU cache; 0 disables caching.
+            model_name (str): Name recorded in ``embedding_cache`` keys; defaults to ``local-hash-<dimensions>``.
+            embedding_cache (EmbeddingCache): Optional persistent cache of whole-document embeddings.
+            workers (int): Processes used to embed large batches; 1 embeds in-process.
+            chunk_size (int): Documents per pool task when ``workers > 1``.
         """
         self.dimensions = dimensions
+        self.model_name = model_name or f"local-hash-{dimensions}"
+        self.embedding_cache = embedding_cache
+        self.batch_rows = batch_rows
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.vocabulary: Dict[str, int] = {}
+        self.vocabulary_matrix: Optional[np.ndarray] = None
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def load_vocabulary(self, tokens: Iterable[str]) -> None:
+        """
+        Precompute vectors for ``tokens`` into ``vocabulary_matrix`` (row ``vocabulary[token]``).
+
+        Vocabulary tokens skip hashing and the LRU cache entirely.
+        """
+        vocabulary = {token: row for row, token in enumerate(dict.fromkeys(tokens))}
+        self.vocabulary_matrix = self._hash_tokens(list(vocabulary)).astype(np.float32)
+        self.vocabulary = vocabulary
+
+    def cache_info(self) -> Dict[str, int]:
+        """
+        Token cache counters: hits, misses, current size and capacity, plus
+        ``vocabulary``, the number of tokens precomputed by ``load_vocabulary``
+        (those bypass the cache and are not counted as hits or misses).
+        """
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "size": len(self._cache),
+            "capacity": self.cache_size,
+            "vocabulary": len(self.vocabulary),
+        }
 
     def _token_vector(self, token: str) -> np.ndarray:
         """
         Convert a token into a deterministic vector using hashing.
+
+        The returned array is shared with the cache and must not be modified.
         """
+        row = self.vocabulary.get(token)
+        if row is not None:
+            return self.vocabulary_matrix[row]
+        with self._cache_lock:
+            cached = self._cache.get(token)
+            if cached is not None:
+                self._cache.move_to_end(token)
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
         # Use SHA-256 to ensure consistent token representation.
         digest = hashlib.sha256(token.encode("utf-8")).digest()
         # Expand digest to the requested dimensions by repeating.
         repeat_count = (self.dimensions + len(digest) - 1) // len(digest)
         expanded = (digest * repeat_count)[: self.dimensions]
-        return np.frombuffer(expanded, dtype=np.uint8).astype(np.float32)
+        vector = np.frombuffer(expanded, dtype=np.uint8).astype(np.float32)
+        if self.cache_size:
+            self._remember([token], vector[None, :])
+        return vector
+
+    def _remember(self, tokens: Sequence[str], vectors: np.ndarray) -> None:
+        if not self.cache_size:
+            return
+        # Only the newest cache_size entries would survive; copy rows so evicted ones free their memory.
+        entries = []
+        for token, vector in zip(tokens[-self.cache_size :], vectors[-self.cache_size :]):
+            vector = vector.copy()
+            vector.flags.writeable = False
+            entries.append((token, vector))
+        with self._cache_lock:
+            for token, vector in entries:
+                self._cache[token] = vector
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
 
     def embed(self, text: str) -> List[float]:
         """
@@ -47,8 +154,152 @@ class Embedder:
         normalized = (mean_vector / norm).tolist()
         return normalized
 
+    def _hash_tokens(self, tokens: Sequence[str]) -> np.ndarray:
+        """
+        Hash each token and return their vectors as a ``(len(tokens), dimensions)`` uint8 matrix.
+        """
+        digest_size = hashlib.sha256().digest_size
+        repeat_count = (self.dimensions + digest_size - 1) // digest_size
+        digests = b"".join(hashlib.sha256(token.encode("utf-8")).digest() for token in tokens)
+        matrix = np.frombuffer(digests, dtype=np.uint8).reshape(len(tokens), digest_size)
+        return np.tile(matrix, repeat_count)[:, : self.dimensions]
+
+    def _token_matrix(self, tokens: Sequence[str]) -> np.ndarray:
+        """
+        Vectors for distinct ``tokens`` as a uint8 matrix, served from the vocabulary and cache where possible.
+        """
+        matrix = np.empty((len(tokens), self.dimensions), dtype=np.uint8)
+        known: List[int] = []
+        known_rows: List[int] = []
+        cached: List[int] = []
+        cached_vectors: List[np.ndarray] = []
+        missing: List[int] = []
+        with self._cache_lock:
+            for position, token in enumerate(tokens):
+                row = self.vocabulary.get(token)
+                if row is not None:
+                    known.append(position)
+                    known_rows.append(row)
+                    continue
+                vector = self._cache.get(token)
+                if vector is None:
+                    missing.append(position)
+                    continue
+                self._cache.move_to_end(token)
+                cached.append(position)
+                cached_vectors.append(vector)
+            self.cache_hits += len(cached)
+            self.cache_misses += len(missing)
+        if known:
+            matrix[known] = self.vocabulary_matrix[known_rows]
+        if cached:
+            matrix[cached] = np.stack(cached_vectors)
+        if missing:
+            missing_tokens = [tokens[position] for position in missing]
+            hashed = self._hash_tokens(missing_tokens)
+            matrix[missing] = hashed
+            self._remember(missing_tokens, hashed.astype(np.float32))
+        return matrix
+
+    def embed_batch(self, documents: Sequence[str], cache: bool = True) -> np.ndarray:
+        """
+        Embed a batch of documents into a ``(len(documents), dimensions)`` float32 matrix.
+
+        With an ``embedding_cache``, documents whose text was embedded before by
+        the same model and dimensions are read back instead of recomputed. Pass
+        ``cache=False`` for one-off texts such as queries: they skip the SQLite
+        round-trip and are not written to the cache.
+        """
+        if not cache or self.embedding_cache is None or not len(documents):
+            return self._embed_parallel(documents)
+        digests = [text_digest(document) for document in documents]
+        cached = self.embedding_cache.get_many(self.model_name, self.dimensions, digests)
+        missing = [row for row, digest in enumerate(digests) if digest not in cached]
+        embeddings = np.empty((len(documents), self.dimensions), dtype=np.float32)
+        if missing:
+            computed = self._embed_parallel([documents[row] for row in missing])
+            embeddings[missing] = computed
+            fresh = {digests[row]: row for row in missing}
+            self.embedding_cache.put_many(
+                self.model_name, self.dimensions, list(fresh), embeddings[list(fresh.values())]
+            )
+        for row, digest in enumerate(digests):
+            if digest in cached:
+                embeddings[row] = cached[digest]
+        return embeddings
+
+    def _embed_parallel(self, documents: Sequence[str]) -> np.ndarray:
+        """
+        Embed on the process pool when the batch spans several chunks, otherwise in-process.
+
+        Workers hash tokens with their own LRU caches; a loaded ``vocabulary`` only
+        speeds up in-process embedding. Output is identical either way.
+        """
+        if self.workers <= 1 or len(documents) <= self.chunk_size:
+            return self._embed_uncached(documents)
+        with self._cache_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        settings = (self.dimensions, self.batch_rows, self.cache_size)
+        chunks = [documents[start : start + self.chunk_size] for start in range(0, len(documents), self.chunk_size)]
+        embeddings = np.empty((len(documents), self.dimensions), dtype=np.float32)
+        # Executor.map yields results in submission order, so chunks land back in input order.
+        for start, block in zip(
+            range(0, len(documents), self.chunk_size),
+            self._pool.map(_embed_in_worker, [settings] * len(chunks), chunks),
+        ):
+            embeddings[start : start + len(block)] = block
+        return embeddings
+
+    def close(self) -> None:
+        """
+        Shut down the embedding process pool, if one was started.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _embed_uncached(self, documents: Sequence[str]) -> np.ndarray:
+        """
+        Tokenizes the whole batch, hashes each distinct token once, and sums
+        token vectors per document with ``np.add.reduceat`` over a token-id
+        array. Token vectors hold integers below 256, so the sums are exact in
+        any order and every row is bit-for-bit identical to ``embed``.
+        """
+        embeddings = np.zeros((len(documents), self.dimensions), dtype=np.float32)
+        tokens: List[str] = []
+        counts = np.zeros(len(documents), dtype=np.int64)
+        for row, document in enumerate(documents):
+            document_tokens = document.split()
+            counts[row] = len(document_tokens)
+            tokens.extend(document_tokens)
+        if not tokens:
+            return embeddings
+
+        batch_vocabulary = {token: token_id for token_id, token in enumerate(dict.fromkeys(tokens))}
+        token_ids = np.fromiter(map(batch_vocabulary.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+        token_vectors = self._token_matrix(list(batch_vocabulary))
+        # float32 sums of values below 256 stay exact up to 2**24; longer documents go through embed().
+        for row in np.flatnonzero(counts * 255 >= 2**24):
+            embeddings[row] = self.embed(documents[row])
+        rows = np.flatnonzero((counts > 0) & (counts * 255 < 2**24))
+        starts = np.cumsum(counts) - counts
+        for chunk in range(0, len(rows), self.batch_rows):
+            chunk_rows = rows[chunk : chunk + self.batch_rows]
+            segments = np.concatenate([token_ids[starts[row] : starts[row] + counts[row]] for row in chunk_rows])
+            offsets = np.cumsum(counts[chunk_rows]) - counts[chunk_rows]
+            sums = np.add.reduceat(token_vectors[segments], offsets, axis=0, dtype=np.int32)
+            means = sums.astype(np.float32) / counts[chunk_rows, None].astype(np.float32)
+            # linalg.norm per row keeps the exact reduction embed() uses.
+            norms = np.array([np.linalg.norm(mean) for mean in means], dtype=np.float32)
+            nonzero = norms > 0
+            means[nonzero] /= norms[nonzero, None]
+            means[~nonzero] = 0.0
+            embeddings[chunk_rows] = means
+        return embeddings
+
     def embed_documents(self, documents: Sequence[str]) -> List[List[float]]:
         """
         Generate embeddings for a list of documents.
         """
-        return [self.embed(doc) for doc in documents]
+        return self.embed_batch(documents).tolist()
@@ -0,0 +1,113 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def text_digest(text: str) -> bytes:
+    """Content address of a text: its SHA-256 digest."""
+
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache backed by SQLite.
+
+    Vectors are stored as raw float32 bytes keyed by ``(model, dimensions,
+    sha256(text))``, so a cached vector is bit-for-bit the one that was
+    computed, and a model or dimension change never reuses stale entries.
+    Every lookup refreshes the entry's ``used`` stamp. Once the table holds
+    more than ``max_entries`` rows, the least recently used ones are evicted
+    down to ``(1 - eviction_fraction) * max_entries``, so eviction runs once
+    per batch of new entries rather than on every write. Writes keep a running
+    row count instead of counting the table, and eviction walks the index on
+    ``used`` instead of sorting, so neither slows down as the cache grows.
+    """
+
+    # SQLite caps bound parameters per statement; look keys up in batches of this size.
+    _BATCH = 500
+
+    def __init__(self, path: str, max_entries: int = 500_000, eviction_fraction: float = 0.1) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.eviction_fraction = eviction_fraction
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, dimensions INTEGER NOT NULL, digest BLOB NOT NULL, "
+            "vector BLOB NOT NULL, used INTEGER NOT NULL, PRIMARY KEY (model, dimensions, digest)"
+            ") WITHOUT ROWID"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+        self._connection.commit()
+        (self._count,) = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def get_many(self, model: str, dimensions: int, digests: Sequence[bytes]) -> Dict[bytes, np.ndarray]:
+        """Return the cached vectors among ``digests``, keyed by digest."""
+
+        found: Dict[bytes, np.ndarray] = {}
+        unique = list(dict.fromkeys(digests))
+        with self._lock:
+            for start in range(0, len(unique), self._BATCH):
+                batch = unique[start : start + self._BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT digest, vector FROM embeddings WHERE model = ? AND dimensions = ? "
+                    f"AND digest IN ({placeholders})",
+                    [model, dimensions, *batch],
+                ).fetchall()
+                for digest, vector in rows:
+                    found[digest] = np.frombuffer(vector, dtype=np.float32)
+            if found:
+                stamp = time.time_ns()
+                self._connection.executemany(
+                    "UPDATE embeddings SET used = ? WHERE model = ? AND dimensions = ? AND digest = ?",
+                    [(stamp, model, dimensions, digest) for digest in found],
+                )
+                self._connection.commit()
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, model: str, dimensions: int, digests: Sequence[bytes], vectors: np.ndarray) -> None:
+        """Store one float32 vector per digest, evicting a batch of old entries past ``max_entries``."""
+
+        stamp = time.time_ns()
+        rows: List[Tuple] = [
+            (model, dimensions, digest, np.asarray(vector, dtype=np.float32).tobytes(), stamp)
+            for digest, vector in zip(digests, vectors)
+        ]
+        with self._lock:
+            # Content-addressed: an existing entry already holds this vector, so only new keys are written.
+            inserted = self._connection.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+            self._count += inserted.rowcount
+            if self._count > self.max_entries:
+                # Recount once per eviction, which also picks up entries written by other processes.
+                (self._count,) = self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+                target = int(self.max_entries * (1 - self.eviction_fraction))
+                if self._count > self.max_entries:
+                    self._connection.execute(
+                        "DELETE FROM embeddings WHERE (model, dimensions, digest) IN "
+                        "(SELECT model, dimensions, digest FROM embeddings ORDER BY used LIMIT ?)",
+                        (self._count - target,),
+                    )
+                    self._count = target
+            self._connection.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
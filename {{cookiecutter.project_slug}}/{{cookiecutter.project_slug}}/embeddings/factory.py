@@ -0,0 +1,39 @@
+import re
+from typing import Optional, Union
+
+from {{ cookiecutter.project_slug }}.embeddings.embedder import Embedder
+from {{ cookiecutter.project_slug }}.embeddings.embedding_cache import EmbeddingCache
+from {{ cookiecutter.project_slug }}.embeddings.hashing_embedder import HashingEmbedder
+
+MODEL_PATTERN = re.compile(r"(?P<family>local-hash|feature-hash)(?:-(?P<dimensions>\d+))?(?P<idf>-idf)?")
+
+
+def create_embedder(
+    model_name: str,
+    embedding_cache: Optional[EmbeddingCache] = None,
+    workers: int = 1,
+    chunk_size: int = 2048,
+) -> Union[Embedder, HashingEmbedder]:
+    """
+    Build the local embedder named by ``RAGConfig.embedding_model``.
+
+    ``local-hash-<dimensions>`` is the token-digest ``Embedder``;
+    ``feature-hash[-<dimensions>][-idf]`` is the signed n-gram ``HashingEmbedder``
+    (128 dimensions by default, ``-idf`` fits IDF weights at ingest). The
+    persistent cache and process pool only apply to ``local-hash``.
+    """
+
+    match = MODEL_PATTERN.fullmatch(model_name)
+    if not match or (match.group("family") == "local-hash" and match.group("idf")):
+        raise ValueError(f"Unknown embedding model: {model_name}")
+    if match.group("family") == "local-hash":
+        return Embedder(
+            dimensions=int(match.group("dimensions") or 128),
+            model_name=model_name,
+            embedding_cache=embedding_cache,
+            workers=workers,
+            chunk_size=chunk_size,
+        )
+    return HashingEmbedder(
+        dimensions=int(match.group("dimensions") or 128), idf=bool(match.group("idf")), model_name=model_name
+    )
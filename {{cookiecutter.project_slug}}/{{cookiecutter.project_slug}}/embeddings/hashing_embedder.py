@@ -0,0 +1,215 @@
+import hashlib
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class CSRMatrix:
+    """
+    Minimal compressed-sparse-row matrix: row ``i`` keeps its column ids in
+    ``indices[indptr[i]:indptr[i + 1]]`` and the matching values in ``data``.
+    """
+
+    def __init__(self, data: np.ndarray, indices: np.ndarray, indptr: np.ndarray, shape: Tuple[int, int]) -> None:
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = shape
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    def _row_ids(self) -> np.ndarray:
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def toarray(self) -> np.ndarray:
+        dense = np.zeros(self.shape, dtype=np.float32)
+        dense[self._row_ids(), self.indices] = self.data
+        return dense
+
+    def dot(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Multiply by dense ``vectors`` of shape ``(columns,)`` or ``(columns, k)``,
+        touching only the stored entries.
+        """
+
+        products = self.data[:, None] * np.asarray(vectors, dtype=np.float32).reshape(self.shape[1], -1)[self.indices]
+        scores = np.zeros((self.shape[0], products.shape[1]), dtype=np.float32)
+        np.add.at(scores, self._row_ids(), products)
+        return scores[:, 0] if np.ndim(vectors) == 1 else scores
+
+
+class HashingEmbedder:
+    """
+    Dependency-free embedder using signed feature hashing over word and character n-grams.
+
+    Each document becomes a bag of word n-grams (``word_ngrams``) and character
+    n-grams taken inside space-padded words (``char_ngrams``), so inflections and
+    typos still share most features. Every feature is hashed to one of
+    ``dimensions`` buckets with a random sign, so colliding features cancel out
+    on average instead of piling up. Counts are optionally weighted by an IDF
+    that ``fit`` computes over the corpus and then freezes, so stored and query
+    vectors always share one weighting; then rows are L2-normalized.
+
+    ``embed_batch`` returns a dense float32 matrix, which is what the vector
+    store indexes: each row costs ``4 * dimensions`` bytes, so the default of
+    128 buckets matches the token-hash ``Embedder``. With ``output="csr"`` it
+    returns a ``CSRMatrix`` of only the touched buckets, for callers that score
+    sparse rows themselves with ``CSRMatrix.dot`` (worthwhile only with far
+    more buckets than a document touches); ``InMemoryVectorStore`` rejects
+    CSR-output embedders rather than densifying them.
+    """
+
+    def __init__(
+        self,
+        dimensions: int = 128,
+        word_ngrams: Tuple[int, int] = (1, 2),
+        char_ngrams: Tuple[int, int] = (3, 5),
+        idf: bool = False,
+        output: str = "dense",
+        model_name: Optional[str] = None,
+        cache_size: int = 200_000,
+    ) -> None:
+        if output not in ("dense", "csr"):
+            raise ValueError(f"Unknown embedding output: {output}")
+        self.dimensions = dimensions
+        self.word_ngrams = word_ngrams
+        self.char_ngrams = char_ngrams
+        self.idf = idf
+        self.output = output
+        self.model_name = model_name or f"feature-hash-{dimensions}{'-idf' if idf else ''}"
+        self.cache_size = cache_size
+        self.document_count = 0
+        self.document_frequency = np.zeros(dimensions, dtype=np.int64)
+        self.fitted = False
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def _features(self, text: str) -> List[str]:
+        words = WORD_PATTERN.findall(text.lower())
+        features: List[str] = []
+        low, high = self.word_ngrams
+        for size in range(max(low, 1), high + 1):
+            features.extend("w:" + " ".join(words[start : start + size]) for start in range(len(words) - size + 1))
+        low, high = self.char_ngrams
+        if high > 0:
+            for word in words:
+                padded = f" {word} "
+                for size in range(max(low, 1), high + 1):
+                    features.extend("c:" + padded[start : start + size] for start in range(len(padded) - size + 1))
+        return features
+
+    def _hash(self, features: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Bucket ids and signs for distinct ``features``; hashes are memoized up to ``cache_size``."""
+
+        buckets = np.empty(len(features), dtype=np.int64)
+        signs = np.empty(len(features), dtype=np.float32)
+        fresh: Dict[str, Tuple[int, float]] = {}
+        for position, feature in enumerate(features):
+            cached = self._buckets.get(feature)
+            if cached is None:
+                value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                cached = fresh[feature] = (value % self.dimensions, 1.0 if value >> 63 else -1.0)
+            buckets[position], signs[position] = cached
+        with self._lock:
+            if len(self._buckets) + len(fresh) > self.cache_size:
+                self._buckets = {}
+            self._buckets.update(list(fresh.items())[: self.cache_size])
+        return buckets, signs
+
+    def _counts(self, documents: Sequence[str]) -> CSRMatrix:
+        """Signed bucket counts per document, as CSR with sorted, non-zero columns per row."""
+
+        features: List[str] = []
+        lengths = np.zeros(len(documents), dtype=np.int64)
+        for row, document in enumerate(documents):
+            document_features = self._features(document)
+            lengths[row] = len(document_features)
+            features.extend(document_features)
+        distinct = {feature: position for position, feature in enumerate(dict.fromkeys(features))}
+        buckets, signs = self._hash(list(distinct))
+        feature_ids = np.fromiter(map(distinct.__getitem__, features), dtype=np.int64, count=len(features))
+        rows = np.repeat(np.arange(len(documents), dtype=np.int64), lengths)
+        keys, inverse = np.unique(rows * self.dimensions + buckets[feature_ids], return_inverse=True)
+        values = np.bincount(inverse.ravel(), weights=signs[feature_ids], minlength=len(keys)).astype(np.float32)
+        keep = values != 0
+        keys, values = keys[keep], values[keep]
+        entry_rows = keys // self.dimensions
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(entry_rows, minlength=len(documents)))])
+        return CSRMatrix(values, keys % self.dimensions, indptr, (len(documents), self.dimensions))
+
+    def fit(self, documents: Sequence[str], batch_size: int = 4096) -> "HashingEmbedder":
+        """
+        Compute bucket document frequencies over ``documents`` (the whole corpus)
+        and freeze them: every later embedding, of documents and queries alike,
+        uses these IDF weights until ``fit`` is called again. Vectors embedded
+        before a refit are stale and must be re-embedded. Only marks the
+        embedder fitted unless ``idf`` is enabled.
+        """
+
+        frequency = np.zeros(self.dimensions, dtype=np.int64)
+        count = len(documents) if self.idf else 0
+        for start in range(0, count, batch_size):
+            counts = self._counts(documents[start : start + batch_size])
+            frequency += np.bincount(counts.indices, minlength=self.dimensions)
+        with self._lock:
+            self.document_frequency, self.document_count, self.fitted = frequency, count, True
+        return self
+
+    def state(self) -> Optional[Dict[str, Any]]:
+        """The frozen IDF statistics for persisting next to the vectors they weighted, or ``None``."""
+
+        if not self.idf or not self.fitted:
+            return None
+        return {"document_count": self.document_count, "document_frequency": self.document_frequency}
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """Adopt saved ``state()`` statistics so queries are weighted like the stored vectors."""
+
+        with self._lock:
+            self.document_count = state["document_count"]
+            self.document_frequency = state["document_frequency"]
+            self.fitted = True
+
+    def idf_weights(self) -> np.ndarray:
+        """Smoothed IDF per bucket: ``log((1 + n) / (1 + df)) + 1``."""
+
+        return (np.log((1 + self.document_count) / (1 + self.document_frequency)) + 1).astype(np.float32)
+
+    def embed_batch(self, documents: Sequence[str]) -> Union[np.ndarray, CSRMatrix]:
+        """
+        Embed documents as L2-normalized rows: a dense float32 matrix, or a
+        ``CSRMatrix`` when ``output="csr"``.
+        """
+
+        matrix = self._counts(documents)
+        if self.idf and self.document_count:
+            matrix.data *= self.idf_weights()[matrix.indices]
+        row_ids = matrix._row_ids()
+        norms = np.sqrt(np.bincount(row_ids, weights=matrix.data.astype(np.float64) ** 2, minlength=len(documents)))
+        matrix.data /= norms[row_ids].astype(np.float32)
+        return matrix if self.output == "csr" else matrix.toarray()
+
+    def embed(self, text: str) -> List[float]:
+        """
+        Generates an embedding vector for the provided text.
+        """
+        vectors = self.embed_batch([text])
+        dense = vectors.toarray() if isinstance(vectors, CSRMatrix) else vectors
+        return dense[0].tolist()
+
+    def embed_documents(self, documents: Sequence[str]) -> List[List[float]]:
+        """
+        Generate embeddings for a list of documents.
+        """
+        vectors = self.embed_batch(documents)
+        dense = vectors.toarray() if isinstance(vectors, CSRMatrix) else vectors
+        return dense.tolist()
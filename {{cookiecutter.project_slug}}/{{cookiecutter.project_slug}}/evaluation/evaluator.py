@@ -1,6 +1,6 @@
 import json
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, List, Optional
 
 from {{ cookiecutter.project_slug }}.retrievers.retriever import Retriever
 
@@ -36,14 +36,22 @@ class RAGEvaluator:
         """
         For each query, ensure the top retrieval contains the expected snippet.
         """
+        # Group queries by target knowledge base so each group is one batched search.
+        groups: Dict[Optional[str], List[int]] = {}
+        for position, item in enumerate(self.dataset):
+            groups.setdefault(item.get("knowledge_base"), []).append(position)
+        top_texts: Dict[int, str] = {}
+        for kb, positions in groups.items():
+            indexes = [kb] if kb else None
+            queries = [self.dataset[position].get("query", "") for position in positions]
+            for position, retrieved in zip(positions, self.retriever.retrieve_many(queries, indexes=indexes)):
+                top_texts[position] = retrieved[0]["text"] if retrieved else ""
+
         results: List[Dict] = []
-        for item in self.dataset:
+        for position, item in enumerate(self.dataset):
             query = item.get("query", "")
             expected = item.get("expected_answer", "")
-            kb = item.get("knowledge_base")
-            indexes = [kb] if kb else None
-            retrieved = self.retriever.retrieve(query, indexes=indexes)
-            top_text = retrieved[0]["text"] if retrieved else ""
+            top_text = top_texts[position]
             passed = expected.lower() in top_text.lower()
             results.append(
                 {
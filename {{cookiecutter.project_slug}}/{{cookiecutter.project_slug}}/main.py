@@ -154,7 +154,10 @@ def main():
     if args.command == "run":
         try:
             runtime = load_workflow(args.workflow, environment=args.environment)
-            result = runtime.run(args.query or "Hello! Can you summarize the project scope?")
+            try:
+                result = runtime.run(args.query or "Hello! Can you summarize the project scope?")
+            finally:
+                runtime.close()
             print(json.dumps(result, indent=2))
         except SpecValidationError as exc:
             raise SystemExit(f"[spec-validation] {exc}") from exc
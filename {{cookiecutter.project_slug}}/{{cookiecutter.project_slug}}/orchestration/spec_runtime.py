@@ -4,20 +4,40 @@ Runtime wiring for Spec-as-Code workflows.
 
 from __future__ import annotations
 
+import hashlib
+import json
 import os
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 from {{ cookiecutter.project_slug }}.agents.agent import Agent, RouterManager
 from {{ cookiecutter.project_slug }}.config.spec_loader import WorkflowSpecLoader
 from {{ cookiecutter.project_slug }}.config.spec_models import WorkflowSpec
+from {{ cookiecutter.project_slug }}.data_loaders.chunking import chunk_text
+from {{ cookiecutter.project_slug }}.embeddings.embedder import Embedder
+from {{ cookiecutter.project_slug }}.embeddings.embedding_cache import EmbeddingCache
+from {{ cookiecutter.project_slug }}.embeddings.factory import create_embedder
+from {{ cookiecutter.project_slug }}.embeddings.hashing_embedder import HashingEmbedder
 from {{ cookiecutter.project_slug }}.guardrails.policies import GuardrailManager
 from {{ cookiecutter.project_slug }}.guardrails.resolver import GuardrailResolver
 from {{ cookiecutter.project_slug }}.llms.base_llm import BaseLLM
 from {{ cookiecutter.project_slug }}.memory.memory import ChatMemory
+from {{ cookiecutter.project_slug }}.reranker.lexical_reranker import LexicalReranker
+from {{ cookiecutter.project_slug }}.reranker.reranker import BaseReranker, Reranker
+from {{ cookiecutter.project_slug }}.retrievers.pipeline import (
+    CandidateGeneration,
+    PackingStage,
+    PipelineResult,
+    RerankStage,
+    RetrievalPipeline,
+    RetrievalStage,
+)
 from {{ cookiecutter.project_slug }}.retrievers.retriever import Retriever
 from {{ cookiecutter.project_slug }}.telemetry.telemetry import Telemetry
 from {{ cookiecutter.project_slug }}.tools.tools import assemble_tools, tools as builtin_tools
+from {{ cookiecutter.project_slug }}.vectordatabase.vector_store import InMemoryVectorStore
+
+SEARCH_MODES_BY_RETRIEVER = {"in_memory": "vector", "bm25": "lexical", "hybrid": "hybrid"}
 
 
 class SpecRuntime:
@@ -29,7 +49,15 @@ class SpecRuntime:
         self.spec = spec
         self.base_dir = base_dir
         self.telemetry = self._build_telemetry()
-        self.retriever = Retriever(top_k=self.spec.rag.top_k)
+        self.retriever = Retriever(
+            vector_store=self._build_vector_store(),
+            top_k=self.spec.rag.top_k,
+            cache_size=self.spec.rag.query_cache_size,
+            cache_ttl=self.spec.rag.query_cache_ttl_seconds,
+        )
+        self.reranker = self._build_reranker()
+        self.retrieval_pipeline = self._build_retrieval_pipeline()
+        self.last_retrieval: Optional[PipelineResult] = None
         self.kb_lookup = {kb.name: kb.collection for kb in self.spec.rag.knowledge_bases}
         self._index_contexts()
 
@@ -115,6 +143,84 @@ class SpecRuntime:
             },
         )
 
+    def _build_embedder(self) -> Union[Embedder, HashingEmbedder]:
+        storage = self.spec.storage
+        cache = None
+        if storage.embedding_cache_path:
+            cache = EmbeddingCache(
+                str((self.base_dir / storage.embedding_cache_path).resolve()),
+                max_entries=storage.embedding_cache_max_entries,
+            )
+        return create_embedder(
+            self.spec.rag.embedding_model,
+            embedding_cache=cache,
+            workers=self.spec.rag.embedding_workers,
+            chunk_size=self.spec.rag.embedding_chunk_size,
+        )
+
+    def _build_vector_store(self) -> InMemoryVectorStore:
+        vector_cfg = self.spec.storage.vector_store
+        hybrid_cfg = self.spec.rag.hybrid
+        index_config = vector_cfg.index.model_dump()
+        if vector_cfg.backend == "local_hnsw":
+            index_config["type"] = "hnsw"
+        return InMemoryVectorStore(
+            embedder=self._build_embedder(),
+            index_config=index_config,
+            index_overrides={name: cfg.model_dump() for name, cfg in vector_cfg.indexes.items()},
+            search_workers=vector_cfg.search_workers,
+            search_mode=SEARCH_MODES_BY_RETRIEVER.get(self.spec.rag.retriever, "vector"),
+            fusion=hybrid_cfg.fusion,
+            rrf_k=hybrid_cfg.rrf_k,
+            vector_weight=hybrid_cfg.vector_weight,
+            hybrid_candidates=hybrid_cfg.candidates,
+            mmr_lambda=self.spec.rag.mmr_lambda,
+            # Re-scored float32 rows of quantized indexes live on disk next to the persisted index.
+            spill_directory=str(self._vector_index_dir()) if vector_cfg.path else None,
+        )
+
+    def warmup(self) -> None:
+        """Load lazily initialised models (the reranker) ahead of the first query."""
+        if self.reranker:
+            self.reranker.warmup()
+
+    def close(self) -> None:
+        """
+        Stop the vector store's search worker pool, free its shared memory and
+        shut down the embedding process pool; call on shutdown.
+        """
+        vector_store = self.retriever.vector_store
+        vector_store.close()
+        close_embedder = getattr(vector_store.embedder, "close", None)
+        if close_embedder is not None:
+            close_embedder()
+
+    def _build_reranker(self) -> Optional[BaseReranker]:
+        """
+        ``local`` is the model-free lexical reranker; ``cross_encoder`` uses the
+        sentence-transformers model ``model_name``, loaded on first use (or by
+        ``warmup()``) and shared across runtimes in the process. Disabled or
+        ``none`` skips reranking.
+        """
+        reranker_cfg = self.spec.rag.reranker
+        if not self.spec.rag.enabled or not reranker_cfg or not reranker_cfg.enabled or reranker_cfg.provider == "none":
+            return None
+        if reranker_cfg.provider == "local":
+            return LexicalReranker()
+        return Reranker(model_name=reranker_cfg.model_name)
+
+    def _build_retrieval_pipeline(self) -> RetrievalPipeline:
+        rag = self.spec.rag
+        stages: List[RetrievalStage] = [CandidateGeneration(self.retriever, candidates=rag.top_k)]
+        if self.reranker and rag.reranker:
+            # Over-retrieve top_k candidates, then keep only the reranked top_n for the prompt.
+            stages[0].candidates = max(rag.top_k, rag.reranker.top_n)
+            stages.append(RerankStage(self.reranker, top_n=rag.reranker.top_n))
+        # Neighbouring chunks share up to `overlap` characters; merge them back before packing.
+        min_overlap = min(rag.chunking.overlap, 20) if rag.chunking.overlap > 0 else 20
+        stages.append(PackingStage(max_tokens=rag.context_token_budget, min_overlap=min_overlap))
+        return RetrievalPipeline(stages)
+
     def _build_tools(self) -> Dict[str, dict]:
         config = {
             "mcp_connectors": [connector.model_dump() for connector in self.spec.tools.mcp_connectors],
@@ -139,6 +245,41 @@ class SpecRuntime:
     def _index_contexts(self) -> None:
         if not self.spec.rag.enabled:
             return
+        index_dir = self._vector_index_dir()
+        fingerprint = self._context_fingerprint() if index_dir else None
+        if index_dir and self.retriever.vector_store.load(str(index_dir), fingerprint=fingerprint):
+            return
+        self._embed_contexts()
+        if index_dir:
+            self.retriever.vector_store.save(str(index_dir), fingerprint=fingerprint)
+
+    def _vector_index_dir(self) -> Path | None:
+        path = self.spec.storage.vector_store.path
+        return (self.base_dir / path).resolve() if path else None
+
+    def _context_sources(self) -> List[Path]:
+        sources = [self.base_dir / context for kb in self.spec.rag.knowledge_bases for context in kb.contexts]
+        sources.extend(self.base_dir / agent.context_file for agent in self.spec.agents if agent.context_file)
+        return sources
+
+    def _context_fingerprint(self) -> str:
+        """Hash of everything that shapes the persisted index, so stale indexes are rebuilt."""
+        digest = hashlib.sha256()
+        settings = {
+            "embedding_model": self.spec.rag.embedding_model,
+            "chunking": self.spec.rag.chunking.model_dump(),
+            "knowledge_bases": [kb.model_dump() for kb in self.spec.rag.knowledge_bases],
+            "agents": [[agent.name, agent.context_file] for agent in self.spec.agents],
+        }
+        digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        for source in self._context_sources():
+            path = source.resolve()
+            digest.update(str(source).encode("utf-8"))
+            digest.update(path.read_bytes() if path.exists() else b"<missing>")
+        return digest.hexdigest()
+
+    def _embed_contexts(self) -> None:
+        batches: List[Tuple[List[str], List[Dict[str, str]], str]] = []
         docs: List[str] = []
         metadata: List[Dict[str, str]] = []
         for kb in self.spec.rag.knowledge_bases:
@@ -146,12 +287,11 @@ class SpecRuntime:
                 context_path = (self.base_dir / context_file).resolve()
                 if not context_path.exists():
                     continue
-                text = context_path.read_text()
-                for chunk in self._chunk_text(text, self.spec.rag.chunking.size, self.spec.rag.chunking.overlap):
+                for chunk in self._chunk_file(context_path):
                     docs.append(chunk)
                     metadata.append({"knowledge_base": kb.name, "source": str(context_file)})
             if docs:
-                self.retriever.add_texts(docs, metadatas=metadata, index=kb.collection)
+                batches.append((docs, metadata, kb.collection))
                 docs, metadata = [], []
         for agent in self.spec.agents:
             if not agent.context_file:
@@ -159,8 +299,7 @@ class SpecRuntime:
             context_path = (self.base_dir / agent.context_file).resolve()
             if not context_path.exists():
                 continue
-            text = context_path.read_text()
-            for chunk in self._chunk_text(text, self.spec.rag.chunking.size, self.spec.rag.chunking.overlap):
+            for chunk in self._chunk_file(context_path):
                 docs.append(chunk)
                 metadata.append(
                     {
@@ -170,19 +309,23 @@ class SpecRuntime:
                     }
                 )
         if docs:
-            self.retriever.add_texts(docs, metadatas=metadata, index="agent_contexts")
+            batches.append((docs, metadata, "agent_contexts"))
+        fit = getattr(self.retriever.vector_store.embedder, "fit", None)
+        if fit is not None and batches:
+            # Fit ingest statistics (IDF) on every chunk before embedding any, not just the first collection.
+            fit([chunk for chunks, _, _ in batches for chunk in chunks])
+        for chunks, chunk_metadata, index in batches:
+            self.retriever.add_texts(chunks, metadatas=chunk_metadata, index=index)
+
+    def _chunk_file(self, path: Path) -> Iterator[str]:
+        """Stream ``path`` through the configured chunking strategy without reading it whole."""
+        chunking = self.spec.rag.chunking
+        with path.open() as handle:
+            yield from chunk_text(handle, chunking.size, chunking.overlap, chunking.strategy)
 
     @staticmethod
-    def _chunk_text(text: str, size: int, overlap: int) -> List[str]:
-        if size <= 0:
-            return [text]
-        chunks: List[str] = []
-        start = 0
-        while start < len(text):
-            end = min(len(text), start + size)
-            chunks.append(text[start:end])
-            start = end - overlap if overlap < size else end
-        return chunks
+    def _chunk_text(text: str, size: int, overlap: int, strategy: str = "sliding_window") -> List[str]:
+        return list(chunk_text(text, size, overlap, strategy))
 
     def _apply_rag(self, query: str) -> str:
         if not self.spec.rag.enabled:
@@ -196,7 +339,9 @@ class SpecRuntime:
         if target_indexes:
             target_indexes = [idx for idx in target_indexes if idx]
 
-        results = self.retriever.retrieve(query, indexes=target_indexes, top_k=self.spec.rag.top_k)
+        # Kept on the runtime so per-stage timings can be inspected after each query.
+        self.last_retrieval = self.retriever.retrieve_staged(query, self.retrieval_pipeline, indexes=target_indexes)
+        results = self.last_retrieval.hits
         if not results:
             return query
         formatted = "\n".join(
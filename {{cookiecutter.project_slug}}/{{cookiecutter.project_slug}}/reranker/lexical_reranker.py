@@ -0,0 +1,137 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from {{ cookiecutter.project_slug }}.reranker.reranker import BaseReranker
+from {{ cookiecutter.project_slug }}.vectordatabase.lexical_index import tokenize
+
+
+class LexicalReranker(BaseReranker):
+    """
+    Model-free reranker scoring query/chunk pairs with token-overlap features.
+
+    Each candidate is tokenized once into an array of term ids (kept in a
+    bounded LRU cache keyed by text). A query marks its terms in a term-id
+    lookup table, maps the candidates' concatenated token ids through it with
+    one gather, and scores all candidates with a few vectorized passes:
+
+    - BM25: term frequencies per (candidate, query term), with IDF and length
+      normalization computed over the candidate set.
+    - Proximity: consecutive matches of different query terms, weighted by
+      their IDF and divided by the token gap between them.
+    - Phrase hits: query bigrams appearing verbatim, weighted by IDF.
+
+    The final score is ``bm25 + proximity_weight * proximity + phrase_weight * phrase``.
+    """
+
+    def __init__(
+        self,
+        k1: float = 1.2,
+        b: float = 0.75,
+        proximity_weight: float = 0.5,
+        phrase_weight: float = 1.0,
+        cache_size: int = 50_000,
+        max_vocabulary: int = 1_000_000,
+    ) -> None:
+        self.k1 = k1
+        self.b = b
+        self.proximity_weight = proximity_weight
+        self.phrase_weight = phrase_weight
+        self.cache_size = cache_size
+        self.max_vocabulary = max_vocabulary
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._vocabulary: Dict[str, int] = {}
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Query-term index per term id, -1 for terms outside the current query.
+        self._lookup = np.full(1024, -1, dtype=np.int32)
+        self._lock = threading.Lock()
+
+    def _candidate_tokens(self, candidates: Sequence[str]) -> List[np.ndarray]:
+        """Term-id arrays for ``candidates``; call with the lock held."""
+
+        arrays = []
+        vocabulary = self._vocabulary
+        for text in candidates:
+            ids = self._cache.get(text)
+            if ids is None:
+                self.cache_misses += 1
+                tokens = tokenize(text)
+                ids = np.fromiter(
+                    (vocabulary.setdefault(token, len(vocabulary)) for token in tokens), dtype=np.int32, count=len(tokens)
+                )
+                if self.cache_size > 0:
+                    self._cache[text] = ids
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            else:
+                self.cache_hits += 1
+                self._cache.move_to_end(text)
+            arrays.append(ids)
+        return arrays
+
+    def scores(self, query: str, candidates: Sequence[str]) -> np.ndarray:
+        """Lexical relevance of each candidate to ``query``; candidates sharing no term score 0."""
+
+        count = len(candidates)
+        scores = np.zeros(count, dtype=np.float32)
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not count or not terms:
+            return scores
+        with self._lock:
+            if len(self._vocabulary) > self.max_vocabulary:
+                # Term ids are only meaningful with their vocabulary: drop both together.
+                self._vocabulary = {}
+                self._cache.clear()
+            arrays = self._candidate_tokens(candidates)
+            tokens = np.concatenate(arrays)
+            if len(self._lookup) < len(self._vocabulary):
+                self._lookup = np.full(2 * len(self._vocabulary), -1, dtype=np.int32)
+            query_ids = [(self._vocabulary[term], index) for index, term in enumerate(terms) if term in self._vocabulary]
+            for term_id, index in query_ids:
+                self._lookup[term_id] = index
+            matches = self._lookup[tokens]
+            for term_id, _ in query_ids:
+                self._lookup[term_id] = -1
+        lengths = np.fromiter(map(len, arrays), dtype=np.int64, count=count)
+
+        # Position and query-term index (in query order) of every token that matches one.
+        positions = np.flatnonzero(matches >= 0)
+        if not positions.size:
+            return scores
+        term_of = matches[positions]
+        doc_of = np.searchsorted(np.cumsum(lengths), positions, side="right")
+
+        frequencies = np.bincount(doc_of * len(terms) + term_of, minlength=count * len(terms))
+        frequencies = frequencies.reshape(count, len(terms)).astype(np.float32)
+        document_frequency = (frequencies > 0).sum(axis=0)
+        idf = np.log1p((count - document_frequency + 0.5) / (document_frequency + 0.5)).astype(np.float32)
+        norms = self.k1 * (1 - self.b + self.b * lengths / max(lengths.mean(), 1e-9))
+        scores += (idf * frequencies * (self.k1 + 1) / (frequencies + norms[:, None])).sum(axis=1)
+
+        if len(positions) > 1:
+            same_doc = doc_of[1:] == doc_of[:-1]
+            gaps = positions[1:] - positions[:-1]
+            first, second = term_of[:-1], term_of[1:]
+            pair_idf = idf[first] + idf[second]
+            near = same_doc & (first != second)
+            scores += self.proximity_weight * np.bincount(
+                doc_of[1:][near], weights=pair_idf[near] / gaps[near], minlength=count
+            ).astype(np.float32)
+            phrase = same_doc & (gaps == 1) & (second == first + 1)
+            scores += self.phrase_weight * np.bincount(
+                doc_of[1:][phrase], weights=pair_idf[phrase], minlength=count
+            ).astype(np.float32)
+        return scores
+
+    def cache_info(self) -> Dict[str, int]:
+        """Candidate token cache counters: hits, misses, current size and capacity."""
+        with self._lock:
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "size": len(self._cache),
+                "capacity": self.cache_size,
+            }
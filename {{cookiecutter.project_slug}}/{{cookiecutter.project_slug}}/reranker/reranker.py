@@ -1,21 +1,175 @@
-from typing import List, Tuple
+import importlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
-# Define the re-ranker class
-class Reranker:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        # Load a pre-trained embedding model (can be customized)
-        self.model = SentenceTransformer(model_name)
-        
-    def encode(self, text: List[str]) -> np.ndarray:
-        """Encodes a list of sentences into embeddings."""
-        return self.model.encode(text)
-    
+# sentence-transformers models loaded in this process, shared by every Reranker using the same model name.
+_MODELS: Dict[str, object] = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def load_model(model_name: str):
+    """
+    Return the process-wide ``SentenceTransformer`` for ``model_name``, importing
+    ``sentence_transformers`` and loading the model on first request only.
+    """
+    with _MODELS_LOCK:
+        model = _MODELS.get(model_name)
+        if model is None:
+            sentence_transformers = importlib.import_module("sentence_transformers")
+            model = _MODELS[model_name] = sentence_transformers.SentenceTransformer(model_name)
+        return model
+
+
+class BaseReranker:
+    """
+    Shared ranking on top of ``scores(query, candidates)``, which subclasses implement.
+    """
+
+    def scores(self, query: str, candidates: Sequence[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def warmup(self) -> "BaseReranker":
+        """Prepare the reranker ahead of the first query; a no-op by default."""
+        return self
+
     def rerank(self, query: str, candidates: List[str], top_k: int = 5) -> List[Tuple[str, float]]:
         """Re-ranks candidates based on similarity to the query."""
-        # Encode the query and candidates
-        # Compute similarity between the query and each candidate        
-        # Combine candidates with their similarity scores and sort them
-        # Return the top-k most similar candidates
-        return ranked_candidates[:top_k]
\ No newline at end of file
+        # Compute similarity between the query and each candidate
+        scores = self.scores(query, candidates)
+        # Stable sort keeps retrieval order among equal scores; return the top-k most similar candidates
+        order = np.argsort(-scores, kind="stable")[: max(top_k, 0)]
+        return [(candidates[position], float(scores[position])) for position in order]
+
+    def rerank_hits(self, query: str, hits: List[Dict], top_n: Optional[int] = None) -> List[Dict]:
+        """
+        Reorder retrieval hits (``{"text", "score", ...}`` dicts) by reranker score,
+        keeping the best ``top_n``. Each returned hit gains a ``rerank_score``.
+        """
+        scores = self.scores(query, [hit.get("text", "") for hit in hits])
+        order = np.argsort(-scores, kind="stable")[: len(hits) if top_n is None else max(top_n, 0)]
+        return [{**hits[position], "rerank_score": float(scores[position])} for position in order]
+
+
+# Define the re-ranker class
+class Reranker(BaseReranker):
+    """
+    Re-rank retrieved candidates by cosine similarity to the query.
+
+    Candidates are encoded in batches of ``batch_size``; their normalized
+    embeddings are kept in a bounded LRU cache keyed by text, so chunks that
+    keep coming back from retrieval are encoded once. Scoring is a single
+    matrix-vector product over the cached rows.
+
+    ``encoder`` may be any object exposing ``embed_batch`` (such as the project
+    ``Embedder``); without one, the ``sentence_transformers`` model
+    ``model_name`` is imported and loaded on first use (or by ``warmup()``),
+    shared with other rerankers in the process unless ``shared_model`` is False.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        encoder=None,
+        batch_size: int = 64,
+        cache_size: int = 10_000,
+        shared_model: bool = True,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.encoder = encoder
+        self.shared_model = shared_model
+        self._model = None
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def model(self):
+        """The sentence-transformers model, loaded on first access."""
+        if self._model is None and self.encoder is None:
+            with self._lock:
+                if self._model is None:
+                    if self.shared_model:
+                        self._model = load_model(self.model_name)
+                    else:
+                        sentence_transformers = importlib.import_module("sentence_transformers")
+                        self._model = sentence_transformers.SentenceTransformer(self.model_name)
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        return self.encoder is not None or self._model is not None
+
+    def warmup(self) -> "Reranker":
+        """Load the model and run one encode so the first real query pays no start-up cost."""
+        self.encode(["warmup"])
+        return self
+
+    def encode(self, text: List[str]) -> np.ndarray:
+        """Encodes a list of sentences into embeddings, ``batch_size`` at a time."""
+        if not text:
+            return np.zeros((0, 0), dtype=np.float32)
+        batches = []
+        for start in range(0, len(text), self.batch_size):
+            batch = list(text[start : start + self.batch_size])
+            if self.encoder is not None:
+                vectors = self.encoder.embed_batch(batch)
+                vectors = vectors.toarray() if hasattr(vectors, "toarray") else vectors
+            else:
+                vectors = self.model.encode(batch, batch_size=self.batch_size, convert_to_numpy=True)
+            batches.append(np.asarray(vectors, dtype=np.float32))
+        return np.vstack(batches)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def _candidate_matrix(self, candidates: Sequence[str]) -> np.ndarray:
+        """Normalized embeddings for ``candidates``, encoding only texts missing from the cache."""
+
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for text in dict.fromkeys(candidates):
+                vector = self._cache.get(text)
+                if vector is not None:
+                    self._cache.move_to_end(text)
+                    found[text] = vector
+            missing = [text for text in dict.fromkeys(candidates) if text not in found]
+            self.cache_hits += len(found)
+            self.cache_misses += len(missing)
+        if missing:
+            encoded = self._normalize(self.encode(missing))
+            encoded.setflags(write=False)
+            with self._lock:
+                for text, vector in zip(missing, encoded):
+                    found[text] = vector
+                    if self.cache_size > 0:
+                        self._cache[text] = vector
+                        self._cache.move_to_end(text)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return np.stack([found[text] for text in candidates])
+
+    def scores(self, query: str, candidates: Sequence[str]) -> np.ndarray:
+        """Cosine similarity between ``query`` and each candidate."""
+
+        if not candidates:
+            return np.zeros(0, dtype=np.float32)
+        query_vector = self._normalize(self.encode([query]))[0]
+        return self._candidate_matrix(candidates) @ query_vector
+
+    def cache_info(self) -> Dict[str, int]:
+        """Candidate-embedding cache counters: hits, misses, current size and capacity."""
+        with self._lock:
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "size": len(self._cache),
+                "capacity": self.cache_size,
+            }
@@ -0,0 +1,163 @@
+"""
+Pack retrieved chunks into a prompt-sized context: merge overlapping neighbours
+from the same source, drop near-duplicates, then fill a token budget by score.
+"""
+
+import math
+import re
+from typing import Dict, List, Optional, Set
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count: about four characters per token."""
+
+    return math.ceil(len(text) / 4)
+
+
+def hit_score(hit: Dict) -> float:
+    """Ranking score of a hit: the reranker's when present, else the retrieval score."""
+
+    return hit.get("rerank_score", hit.get("score", 0.0))
+
+
+def _overlap_start(first: str, second: str, min_overlap: int) -> Optional[int]:
+    """
+    Offset in ``first`` where ``second`` starts if ``second`` continues (or lies
+    inside) ``first`` with at least ``min_overlap`` shared characters.
+    """
+
+    probe = second[:min_overlap]
+    if len(probe) < min_overlap:
+        return None
+    start = first.find(probe)
+    while start != -1:
+        tail = first[start:]
+        if second.startswith(tail) or tail.startswith(second):
+            return start
+        start = first.find(probe, start + 1)
+    return None
+
+
+def _join(first: str, second: str, min_overlap: int) -> Optional[str]:
+    """The text spanning both chunks when they overlap in either order, else None."""
+
+    for left, right in ((first, second), (second, first)):
+        start = _overlap_start(left, right, min_overlap)
+        if start is not None:
+            return left[:start] + right if len(right) > len(left) - start else left
+    return None
+
+
+def merge_overlapping(hits: List[Dict], source_key: str = "source", min_overlap: int = 20) -> List[Dict]:
+    """
+    Merge hits from the same ``metadata[source_key]`` whose texts overlap, as
+    sliding-window neighbours do, into one hit spanning both. A merged hit keeps
+    the metadata and id of its best-scoring part, the best score, and lists the
+    ids it absorbed under ``merged_ids``.
+    """
+
+    merged: List[Dict] = []
+    for hit in hits:
+        current = dict(hit)
+        source = hit.get("metadata", {}).get(source_key)
+        changed = source is not None
+        while changed:
+            changed = False
+            for position, other in enumerate(merged):
+                if other.get("metadata", {}).get(source_key) != source:
+                    continue
+                text = _join(other["text"], current["text"], min_overlap)
+                if text is None:
+                    continue
+                best, worst = (other, current) if hit_score(other) >= hit_score(current) else (current, other)
+                current = {
+                    **best,
+                    "text": text,
+                    "merged_ids": best.get("merged_ids", [best.get("id")]) + worst.get("merged_ids", [worst.get("id")]),
+                }
+                del merged[position]
+                changed = True
+                break
+        merged.append(current)
+    return merged
+
+
+def _shingles(text: str, size: int = 3) -> Set[str]:
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[start : start + size]) for start in range(len(words) - size + 1)}
+
+
+def drop_near_duplicates(hits: List[Dict], threshold: float = 0.9) -> List[Dict]:
+    """
+    Keep hits in score order, dropping any whose text appears inside an already
+    kept hit, or whose word trigrams a kept hit covers for at least a
+    ``threshold`` fraction.
+    """
+
+    kept: List[Dict] = []
+    kept_shingles: List[Set[str]] = []
+    for hit in sorted(hits, key=hit_score, reverse=True):
+        text = hit.get("text", "")
+        shingles = _shingles(text)
+        duplicate = bool(text.strip()) and any(text.strip() in other.get("text", "") for other in kept)
+        duplicate = duplicate or (
+            bool(shingles) and any(len(shingles & other) >= threshold * len(shingles) for other in kept_shingles)
+        )
+        if not duplicate:
+            kept.append(hit)
+            kept_shingles.append(shingles)
+    return kept
+
+
+def _fit_parts(parts: List[Dict], budget: int, source_key: str, min_overlap: int) -> List[Dict]:
+    """
+    Best-scoring subset of a merged span's original chunks that fits ``budget``
+    tokens once overlapping picks are merged again.
+    """
+
+    chosen: List[Dict] = []
+    fitted: List[Dict] = []
+    for part in sorted(parts, key=hit_score, reverse=True):
+        trial = merge_overlapping(chosen + [part], source_key, min_overlap)
+        if sum(estimate_tokens(hit.get("text", "")) for hit in trial) <= budget:
+            chosen.append(part)
+            fitted = trial
+    return fitted
+
+
+def pack_context(
+    hits: List[Dict],
+    max_tokens: Optional[int] = None,
+    source_key: str = "source",
+    min_overlap: int = 20,
+    duplicate_threshold: float = 0.9,
+) -> List[Dict]:
+    """
+    Merge overlapping neighbours, drop near-duplicates, then greedily keep the
+    best-scoring hits whose estimated tokens fit ``max_tokens`` (no limit when
+    None). A merged span that does not fit falls back to the best of its own
+    chunks that do. Hits come back best first.
+    """
+
+    candidates = drop_near_duplicates(merge_overlapping(hits, source_key, min_overlap), duplicate_threshold)
+    if max_tokens is None:
+        return candidates
+    by_id = {hit.get("id"): hit for hit in hits if hit.get("id") is not None}
+    packed, used = [], 0
+    for hit in candidates:
+        tokens = estimate_tokens(hit.get("text", ""))
+        if used + tokens <= max_tokens:
+            packed.append(hit)
+            used += tokens
+            continue
+        parts = [by_id[part_id] for part_id in hit.get("merged_ids", []) if part_id in by_id]
+        if len(parts) < 2:
+            continue
+        for part in _fit_parts(parts, max_tokens - used, source_key, min_overlap):
+            packed.append(part)
+            used += estimate_tokens(part.get("text", ""))
+    return packed
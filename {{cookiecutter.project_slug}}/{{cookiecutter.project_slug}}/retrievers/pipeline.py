@@ -0,0 +1,171 @@
+"""
+Composable retrieval pipeline: candidate generation, metadata filter, rerank,
+diversification and context packing, each timed separately.
+"""
+
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from {{ cookiecutter.project_slug }}.retrievers.context_packing import pack_context
+from {{ cookiecutter.project_slug }}.vectordatabase.vector_store import MetadataFilter, _check_where, _matches_where
+
+
+@dataclass
+class RetrievalRequest:
+    query: str
+    indexes: Optional[List[str]] = None
+    where: Optional[MetadataFilter] = None
+    mode: Optional[str] = None
+    mmr_lambda: Optional[float] = None
+
+
+@dataclass
+class StageReport:
+    name: str
+    seconds: float
+    candidates_in: int
+    candidates_out: int
+
+
+@dataclass
+class PipelineResult:
+    hits: List[Dict]
+    stages: List[StageReport] = field(default_factory=list)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(stage.seconds for stage in self.stages)
+
+    def report(self) -> List[Dict]:
+        """Stage reports as plain dicts, e.g. for logging."""
+        return [asdict(stage) for stage in self.stages]
+
+
+class RetrievalStage:
+    """
+    One step of a ``RetrievalPipeline``: takes the request and the current
+    candidate hits and returns the hits for the next stage.
+    """
+
+    name = "stage"
+
+    def run(self, request: RetrievalRequest, hits: List[Dict]) -> List[Dict]:
+        raise NotImplementedError
+
+
+class CandidateGeneration(RetrievalStage):
+    """
+    Fetch the first ``candidates`` hits through a ``Retriever`` (and its query
+    cache); ``where`` is applied in the vector store as a prefilter.
+    """
+
+    name = "candidates"
+
+    def __init__(self, retriever, candidates: int = 20) -> None:
+        self.retriever = retriever
+        self.candidates = candidates
+
+    def run(self, request: RetrievalRequest, hits: List[Dict]) -> List[Dict]:
+        return self.retriever.retrieve(
+            request.query,
+            top_k=self.candidates,
+            indexes=request.indexes,
+            where=request.where,
+            mode=request.mode,
+            mmr_lambda=request.mmr_lambda,
+        )
+
+
+class MetadataFilterStage(RetrievalStage):
+    """
+    Drop hits whose metadata fails ``where`` or ``predicate``. ``where`` is
+    validated and matched exactly like the store's ``where=`` prefilter, so
+    nested filter values raise ``ValueError`` and unhashable metadata entries
+    are skipped.
+    """
+
+    name = "filter"
+
+    def __init__(
+        self, where: Optional[MetadataFilter] = None, predicate: Optional[Callable[[Dict], bool]] = None
+    ) -> None:
+        _check_where(where)
+        self.where = where or {}
+        self.predicate = predicate
+
+    def _matches(self, metadata: Dict) -> bool:
+        return _matches_where(metadata, self.where) and (self.predicate is None or self.predicate(metadata))
+
+    def run(self, request: RetrievalRequest, hits: List[Dict]) -> List[Dict]:
+        return [hit for hit in hits if self._matches(hit.get("metadata", {}))]
+
+
+class RerankStage(RetrievalStage):
+    """Reorder hits with a reranker (``rerank_hits``) and keep the best ``top_n``."""
+
+    name = "rerank"
+
+    def __init__(self, reranker, top_n: Optional[int] = None) -> None:
+        self.reranker = reranker
+        self.top_n = top_n
+
+    def run(self, request: RetrievalRequest, hits: List[Dict]) -> List[Dict]:
+        return self.reranker.rerank_hits(request.query, hits, top_n=self.top_n)
+
+
+class DiversifyStage(RetrievalStage):
+    """Keep at most ``max_per_source`` hits per ``metadata[key]``, preserving order."""
+
+    name = "diversify"
+
+    def __init__(self, max_per_source: int = 2, key: str = "source") -> None:
+        self.max_per_source = max_per_source
+        self.key = key
+
+    def run(self, request: RetrievalRequest, hits: List[Dict]) -> List[Dict]:
+        seen: Dict[str, int] = {}
+        kept = []
+        for hit in hits:
+            source = str(hit.get("metadata", {}).get(self.key))
+            if seen.get(source, 0) < self.max_per_source:
+                seen[source] = seen.get(source, 0) + 1
+                kept.append(hit)
+        return kept
+
+
+class PackingStage(RetrievalStage):
+    """
+    Merge overlapping same-source neighbours, drop near-duplicates and keep the
+    best hits within ``max_tokens`` estimated tokens (see ``pack_context``).
+    """
+
+    name = "pack"
+
+    def __init__(self, max_tokens: Optional[int] = None, source_key: str = "source", min_overlap: int = 20) -> None:
+        self.max_tokens = max_tokens
+        self.source_key = source_key
+        self.min_overlap = min_overlap
+
+    def run(self, request: RetrievalRequest, hits: List[Dict]) -> List[Dict]:
+        return pack_context(hits, max_tokens=self.max_tokens, source_key=self.source_key, min_overlap=self.min_overlap)
+
+
+class RetrievalPipeline:
+    """
+    Run retrieval stages in order, recording each stage's wall time and the
+    number of candidates going in and out.
+    """
+
+    def __init__(self, stages: Sequence[RetrievalStage]) -> None:
+        self.stages = list(stages)
+
+    def run(self, request: RetrievalRequest) -> PipelineResult:
+        hits: List[Dict] = []
+        reports = []
+        for stage in self.stages:
+            started = time.perf_counter()
+            candidates_in = len(hits)
+            hits = stage.run(request, hits)
+            reports.append(StageReport(stage.name, time.perf_counter() - started, candidates_in, len(hits)))
+        return PipelineResult(hits=hits, stages=reports)
@@ -1,12 +1,49 @@
-from typing import Dict, List, Optional
+import json
+from typing import Callable, Dict, Hashable, List, Optional, Sequence
 
 from {{ cookiecutter.project_slug }}.embeddings.embedder import Embedder
-from {{ cookiecutter.project_slug }}.vectordatabase.vector_store import InMemoryVectorStore
+from {{ cookiecutter.project_slug }}.retrievers.pipeline import (
+    CandidateGeneration,
+    DiversifyStage,
+    MetadataFilterStage,
+    PackingStage,
+    PipelineResult,
+    RerankStage,
+    RetrievalPipeline,
+    RetrievalRequest,
+)
+from {{ cookiecutter.project_slug }}.retrievers.query_cache import QueryCache
+from {{ cookiecutter.project_slug }}.vectordatabase.vector_store import (
+    InMemoryVectorStore,
+    MetadataFilter,
+    _check_where,
+)
+
+
+def _canonical_where(where: MetadataFilter) -> Dict[str, List]:
+    """
+    ``where`` with every field's values as one sorted list (a scalar is a
+    one-value list), so equal filters serialize identically whatever the
+    container type or set iteration order.
+    """
+
+    canonical = {}
+    for field, expected in where.items():
+        values = expected if isinstance(expected, (list, tuple, set, frozenset)) else [expected]
+        # repr orders mixed types deterministically; the filter semantics ignore value order.
+        canonical[field] = sorted(values, key=repr)
+    return canonical
 
 
 class Retriever:
     """
     Minimal retriever that wraps the in-memory vector store.
+
+    Results are cached in an LRU/TTL ``QueryCache`` keyed by the normalized
+    query (case and whitespace folded), indexes, top_k, filter, mode, MMR
+    lambda and the store's version stamp for those indexes, so any change to
+    a searched index makes its cached results unreachable. ``cache_size=0``
+    disables caching.
     """
 
     def __init__(
@@ -14,20 +51,162 @@ class Retriever:
         vector_store: Optional[InMemoryVectorStore] = None,
         embedder: Optional[Embedder] = None,
         top_k: int = 3,
+        cache_size: int = 1024,
+        cache_ttl: Optional[float] = 300.0,
     ) -> None:
         self.vector_store = vector_store or InMemoryVectorStore(embedder=embedder)
         self.top_k = top_k
+        self.cache = QueryCache(max_entries=cache_size, ttl_seconds=cache_ttl)
 
     def add_texts(
-        self, texts: List[str], metadatas: Optional[List[Dict]] = None, index: str = "default"
-    ) -> None:
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict]] = None,
+        index: str = "default",
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Index a batch of texts with optional metadata and return their document ids.
+        """
+        return self.vector_store.add_documents(texts, metadatas, index=index, ids=ids)
+
+    def upsert_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[Dict]] = None,
+        index: str = "default",
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Index texts, replacing previously indexed texts with the same ids.
+        """
+        return self.vector_store.upsert_documents(texts, metadatas, index=index, ids=ids)
+
+    def delete(self, ids: Sequence[str], index: Optional[str] = None) -> int:
+        """
+        Remove indexed texts by id and return how many were deleted.
         """
-        Index a batch of texts with optional metadata.
+        return self.vector_store.delete(ids, index=index)
+
+    def retrieve(
+        self,
+        query: str,
+        indexes: Optional[List[str]] = None,
+        top_k: Optional[int] = None,
+        where: Optional[MetadataFilter] = None,
+        mode: Optional[str] = None,
+        mmr_lambda: Optional[float] = None,
+    ) -> List[Dict]:
+        """
+        Return the most relevant documents for a query, optionally filtered by metadata.
+
+        ``mode`` ("vector", "lexical" or "hybrid") overrides the store's search mode;
+        ``mmr_lambda`` diversifies the results by maximal marginal relevance.
+        """
+        return self.retrieve_many(
+            [query], indexes=indexes, top_k=top_k, where=where, mode=mode, mmr_lambda=mmr_lambda
+        )[0]
+
+    def retrieve_many(
+        self,
+        queries: Sequence[str],
+        indexes: Optional[List[str]] = None,
+        top_k: Optional[int] = None,
+        where: Optional[MetadataFilter] = None,
+        mode: Optional[str] = None,
+        mmr_lambda: Optional[float] = None,
+    ) -> List[List[Dict]]:
+        """
+        Return the most relevant documents for each query in a batch; only
+        queries missing from the cache are searched, in one batch.
         """
-        self.vector_store.add_documents(texts, metadatas, index=index)
+        top_k = top_k or self.top_k
+        if self.cache.max_entries <= 0:
+            return self.vector_store.search_many(
+                queries, top_k=top_k, indexes=indexes, where=where, mode=mode, mmr_lambda=mmr_lambda
+            )
+        _check_where(where)
+        keys = [self._cache_key(query, indexes, top_k, where, mode, mmr_lambda) for query in queries]
+        results: List[Optional[List[Dict]]] = [self.cache.get(key) for key in keys]
+        missing = [position for position, hits in enumerate(results) if hits is None]
+        if missing:
+            searched = self.vector_store.search_many(
+                [queries[position] for position in missing],
+                top_k=top_k,
+                indexes=indexes,
+                where=where,
+                mode=mode,
+                mmr_lambda=mmr_lambda,
+            )
+            for position, hits in zip(missing, searched):
+                self.cache.put(keys[position], hits)
+                results[position] = hits
+        # Fresh hit dicts per call, so callers can annotate results without touching the cache.
+        return [[dict(hit) for hit in hits] for hits in results]
 
-    def retrieve(self, query: str, indexes: Optional[List[str]] = None, top_k: Optional[int] = None) -> List[Dict]:
+    def _cache_key(
+        self,
+        query: str,
+        indexes: Optional[List[str]],
+        top_k: int,
+        where: Optional[MetadataFilter],
+        mode: Optional[str],
+        mmr_lambda: Optional[float],
+    ) -> Hashable:
+        # Read before searching. The store publishes versions together with the rows they describe, so a
+        # racing write can only make the search newer than its key, never cache old rows under a new version.
+        return (
+            " ".join(query.casefold().split()),
+            tuple(indexes) if indexes is not None else None,
+            top_k,
+            json.dumps(_canonical_where(where), sort_keys=True, default=str) if where else None,
+            mode,
+            mmr_lambda,
+            self.vector_store.version(indexes),
+        )
+
+    def cache_info(self) -> Dict[str, float]:
+        """Query cache counters: hits, misses, hit rate, current size and capacity."""
+        return self.cache.stats()
+
+    def build_pipeline(
+        self,
+        candidates: Optional[int] = None,
+        where: Optional[MetadataFilter] = None,
+        predicate: Optional[Callable[[Dict], bool]] = None,
+        reranker=None,
+        top_n: Optional[int] = None,
+        max_per_source: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+    ) -> RetrievalPipeline:
+        """
+        Assemble the standard stages: candidate generation, then metadata filter,
+        rerank, diversification and packing for whichever of them are configured.
+        """
+        stages = [CandidateGeneration(self, candidates=candidates or self.top_k)]
+        if where or predicate:
+            stages.append(MetadataFilterStage(where=where, predicate=predicate))
+        if reranker is not None:
+            stages.append(RerankStage(reranker, top_n=top_n))
+        if max_per_source:
+            stages.append(DiversifyStage(max_per_source=max_per_source))
+        if max_tokens:
+            stages.append(PackingStage(max_tokens=max_tokens))
+        return RetrievalPipeline(stages)
+
+    def retrieve_staged(
+        self,
+        query: str,
+        pipeline: Optional[RetrievalPipeline] = None,
+        indexes: Optional[List[str]] = None,
+        where: Optional[MetadataFilter] = None,
+        mode: Optional[str] = None,
+        mmr_lambda: Optional[float] = None,
+    ) -> PipelineResult:
         """
-        Return the most relevant documents for a query.
+        Run a retrieval pipeline (default: candidate generation only) and return
+        the hits with per-stage wall time and candidate counts.
         """
-        return self.vector_store.search(query, top_k=top_k or self.top_k, indexes=indexes)
+        pipeline = pipeline or self.build_pipeline()
+        request = RetrievalRequest(query=query, indexes=indexes, where=where, mode=mode, mmr_lambda=mmr_lambda)
+        return pipeline.run(request)
@@ -0,0 +1,232 @@
+import copy
+import heapq
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class _FrozenLayer:
+    """
+    One saved layer of the graph in CSR form, read straight from (memory-mapped)
+    arrays: node ``n`` is on the layer when ``levels[n] >= layer`` and links to
+    ``neighbors[offsets[n] : offsets[n + 1]]``. ``copy()`` thaws it into the
+    dict the index writes to.
+    """
+
+    def __init__(self, layer: int, levels: np.ndarray, offsets: np.ndarray, neighbors: np.ndarray) -> None:
+        self.layer = layer
+        self.levels = levels
+        self.offsets = offsets
+        self.neighbors = neighbors
+
+    def get(self, node: int, default: Sequence[int] = ()) -> Sequence[int]:
+        if node >= len(self.levels) or self.levels[node] < self.layer:
+            return default
+        return self.neighbors[self.offsets[node] : self.offsets[node + 1]].tolist()
+
+    def keys(self) -> List[int]:
+        return np.flatnonzero(np.asarray(self.levels) >= self.layer).tolist()
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(np.asarray(self.levels) >= self.layer))
+
+    def copy(self) -> Dict[int, List[int]]:
+        return {node: self.get(node) for node in self.keys()}
+
+
+class HNSWIndex:
+    """
+    Hierarchical navigable small-world graph over the rows of a vector matrix.
+
+    Every row becomes a node on layer 0 and, with exponentially decaying
+    probability, on higher layers. Queries greedily descend from the top layer
+    and run a beam search of width ``ef_search`` on layer 0, so cost grows
+    roughly logarithmically with the number of rows. Inserts are incremental:
+    new rows are linked into the existing graph without a rebuild.
+
+    Similarities are dot products, so rows and queries must be L2-normalized.
+
+    ``snapshot()`` returns a frozen view sharing the adjacency. The next insert
+    copies the per-layer dicts before touching them (copy-on-write), and
+    neighbour lists are replaced rather than appended to, so views never see
+    later inserts.
+
+    ``state()`` exports the adjacency as CSR arrays and ``load_state()`` searches
+    them in place (e.g. memory-mapped from disk); the first insert afterwards
+    thaws them through the same copy-on-write step.
+    """
+
+    def __init__(self, m: int = 16, ef_construction: int = 100, ef_search: int = 50, seed: int = 0) -> None:
+        self.m = max(2, m)
+        self.max_links_0 = self.m * 2
+        self.ef_construction = max(ef_construction, self.m)
+        self.ef_search = ef_search
+        self._level_mult = 1.0 / math.log(self.m)
+        self._rng = np.random.default_rng(seed)
+        self._links: List[Dict[int, List[int]]] = []
+        self._entry: Optional[int] = None
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._shared = False
+
+    @property
+    def trained(self) -> bool:
+        return self._entry is not None
+
+    def __len__(self) -> int:
+        return len(self._links[0]) if self._links else 0
+
+    def add(self, vectors: np.ndarray, start: int) -> None:
+        """Insert rows ``start:`` of ``vectors`` (the full populated matrix) into the graph."""
+
+        if self._shared:
+            # A snapshot (or a loaded state) holds the current layers; copy them, not the neighbour lists, first.
+            self._links = [layer.copy() for layer in self._links]
+            self._shared = False
+        self._vectors = vectors
+        for node in range(start, len(vectors)):
+            self._insert(node)
+
+    def _insert(self, node: int) -> None:
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+        top_level = self._top_level()
+        while len(self._links) <= level:
+            self._links.append({})
+        for layer in range(level + 1):
+            self._links[layer][node] = []
+        if self._entry is None:
+            self._entry = node
+            return
+
+        query = self._vectors[node]
+        entry = self._entry
+        for layer in range(top_level, level, -1):
+            entry = max(self._search_layer(query, [entry], 1, layer))[1]
+        entries = [entry]
+        for layer in range(min(level, top_level), -1, -1):
+            found = self._search_layer(query, entries, self.ef_construction, layer)
+            neighbors = self._select_neighbors(found, self.m)
+            self._links[layer][node] = neighbors
+            max_links = self.max_links_0 if layer == 0 else self.m
+            for neighbor in neighbors:
+                links = self._links[layer][neighbor] + [node]
+                self._links[layer][neighbor] = links
+                if len(links) > max_links:
+                    scores = self._vectors[links] @ self._vectors[neighbor]
+                    pairs = sorted(zip(scores.tolist(), links), reverse=True)
+                    self._links[layer][neighbor] = self._select_neighbors(pairs, max_links)
+            entries = [candidate for _, candidate in found]
+        if level > top_level:
+            self._entry = node
+
+    def snapshot(self) -> "HNSWIndex":
+        """A frozen view of the graph; the live index copies its layer dicts on the next insert."""
+
+        view = copy.copy(self)
+        self._shared = True
+        return view
+
+    def state(self, rows: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        The graph as arrays for persisting ``rows`` of the matrix, or ``None``
+        when it cannot be kept as is: untrained, or rows were dropped
+        (tombstones still route searches, so their links cannot be removed).
+        """
+
+        if self._entry is None or len(rows) != len(self):
+            return None
+        size = len(self)
+        levels = np.zeros(size, dtype=np.int8)
+        for layer, links in enumerate(self._links[1:], start=1):
+            levels[list(links.keys())] = layer
+        state: Dict[str, Any] = {"levels": levels, "entry": int(self._entry), "layers": len(self._links)}
+        for layer, links in enumerate(self._links):
+            lists = [links.get(node, ()) for node in range(size)]
+            offsets = np.concatenate([[0], np.cumsum([len(items) for items in lists], dtype=np.int64)])
+            state[f"offsets_{layer}"] = offsets
+            state[f"neighbors_{layer}"] = np.fromiter(
+                (neighbor for items in lists for neighbor in items), dtype=np.int64, count=int(offsets[-1])
+            )
+        return state
+
+    def load_state(self, state: Dict[str, Any], vectors: np.ndarray) -> None:
+        """Adopt a saved ``state()`` over the matrix it was built from, without copying the arrays."""
+
+        self._vectors = vectors
+        self._links = [
+            _FrozenLayer(layer, state["levels"], state[f"offsets_{layer}"], state[f"neighbors_{layer}"])
+            for layer in range(state["layers"])
+        ]
+        self._entry = state["entry"]
+        self._shared = True
+
+    def _top_level(self) -> int:
+        # The entry point always lives on the highest layer created so far.
+        return len(self._links) - 1
+
+    def _search_layer(
+        self, query: np.ndarray, entries: Sequence[int], ef: int, layer: int
+    ) -> List[Tuple[float, int]]:
+        """Beam search on one layer; returns up to ``ef`` ``(similarity, node)`` pairs."""
+
+        links = self._links[layer]
+        vectors = self._vectors
+        visited = set(entries)
+        scores = (vectors[list(entries)] @ query).tolist()
+        candidates = [(-score, node) for score, node in zip(scores, entries)]
+        heapq.heapify(candidates)
+        best = [(score, node) for score, node in zip(scores, entries)]
+        heapq.heapify(best)
+        while len(best) > ef:
+            heapq.heappop(best)
+        while candidates:
+            negative, node = heapq.heappop(candidates)
+            if -negative < best[0][0] and len(best) >= ef:
+                break
+            neighbors = [neighbor for neighbor in links.get(node, ()) if neighbor not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            for score, neighbor in zip((vectors[neighbors] @ query).tolist(), neighbors):
+                if len(best) < ef or score > best[0][0]:
+                    heapq.heappush(candidates, (-score, neighbor))
+                    heapq.heappush(best, (score, neighbor))
+                    if len(best) > ef:
+                        heapq.heappop(best)
+        return best
+
+    def _select_neighbors(self, found: Sequence[Tuple[float, int]], m: int) -> List[int]:
+        """
+        Keep up to ``m`` of the ``(similarity, node)`` pairs, preferring nodes that
+        are closer to the base node than to any neighbor already kept (the HNSW diversity heuristic), then
+        topping up with the closest pruned candidates.
+        """
+
+        ordered = sorted(found, reverse=True)
+        if len(ordered) <= m:
+            return [candidate for _, candidate in ordered]
+        nodes = [candidate for _, candidate in ordered]
+        pairwise = (self._vectors[nodes] @ self._vectors[nodes].T).tolist()
+        kept: List[int] = []
+        pruned: List[int] = []
+        for position, (score, _) in enumerate(ordered):
+            if len(kept) >= m:
+                break
+            similarities = pairwise[position]
+            if kept and max(similarities[other] for other in kept) > score:
+                pruned.append(position)
+                continue
+            kept.append(position)
+        kept.extend(pruned[: m - len(kept)])
+        return [nodes[position] for position in kept]
+
+    def candidates(self, query_vector: np.ndarray, k: int = 0) -> Optional[np.ndarray]:
+        """Return the sorted row ids found by a beam search of width ``max(ef_search, k)``."""
+
+        if self._entry is None:
+            return None
+        entry = self._entry
+        for layer in range(self._top_level(), 0, -1):
+            entry = max(self._search_layer(query_vector, [entry], 1, layer))[1]
+        found = self._search_layer(query_vector, [entry], max(self.ef_search, k), 0)
+        return np.sort(np.fromiter((node for _, node in found), dtype=np.int64, count=len(found)))
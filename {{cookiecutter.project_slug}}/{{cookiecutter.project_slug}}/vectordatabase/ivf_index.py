@@ -0,0 +1,160 @@
+import copy
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+def spherical_kmeans(vectors: np.ndarray, clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Cluster normalized vectors by cosine similarity and return unit-length centroids.
+
+    Empty clusters are re-seeded from the points that are worst served by
+    their current centroid, so every centroid ends up owning data.
+    """
+
+    rng = np.random.default_rng(seed)
+    clusters = max(1, min(clusters, len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), size=clusters, replace=False)].copy()
+    for _ in range(iterations):
+        similarities = vectors @ centroids.T
+        assignments = similarities.argmax(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=clusters)
+        empty = np.flatnonzero(counts == 0)
+        if empty.size:
+            worst = np.argsort(similarities[np.arange(len(vectors)), assignments])[: empty.size]
+            sums[empty[: worst.size]] = vectors[worst]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = np.divide(sums, norms, out=centroids, where=norms > 0)
+    return centroids.astype(np.float32, copy=False)
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate index over the rows of a vector matrix.
+
+    A spherical k-means coarse quantizer splits rows into ``nlist`` clusters and
+    keeps one posting list of row ids per cluster. A query only scores the rows
+    in its ``nprobe`` closest clusters. Until enough rows exist to train the
+    quantizer, ``candidates`` returns ``None`` and callers fall back to exact search.
+
+    Training and ``add`` rebind ``centroids`` and the assignments to new arrays
+    rather than writing into them, so a shallow ``snapshot()`` stays frozen, and
+    arrays adopted by ``load_state()`` may be read-only memory maps. Rows are
+    assigned ``block_size`` at a time, so the matrix may be a memory map or
+    rows decoded from quantizer codes without being loaded whole.
+    """
+
+    def __init__(
+        self,
+        nlist: int = 64,
+        nprobe: int = 8,
+        min_train_size: Optional[int] = None,
+        retrain_growth: float = 4.0,
+        iterations: int = 10,
+        max_train_points: int = 50_000,
+        seed: int = 0,
+        block_size: int = 16_384,
+    ) -> None:
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size if min_train_size is not None else nlist * 8
+        self.retrain_growth = retrain_growth
+        self.iterations = iterations
+        self.max_train_points = max_train_points
+        self.seed = seed
+        self.block_size = block_size
+        self.centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._trained_size = 0
+        self._csr: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, vectors: np.ndarray) -> None:
+        """Fit the coarse quantizer on (a sample of) ``vectors`` and reassign every row."""
+
+        sample = vectors[:]
+        if len(vectors) > self.max_train_points:
+            rng = np.random.default_rng(self.seed)
+            sample = vectors[rng.choice(len(vectors), size=self.max_train_points, replace=False)]
+        self.centroids = spherical_kmeans(sample, self.nlist, iterations=self.iterations, seed=self.seed)
+        self._assignments = self._assign(vectors)
+        self._trained_size = len(vectors)
+        self._csr = None
+
+    def add(self, vectors: np.ndarray, start: int) -> None:
+        """
+        Register rows ``start:`` of ``vectors`` (the full populated matrix).
+
+        Training happens once the index reaches ``min_train_size`` rows and is
+        repeated whenever the row count grows by ``retrain_growth``, so the
+        clusters keep tracking the data without retraining on every append.
+        """
+
+        size = len(vectors)
+        if size < self.min_train_size:
+            return
+        if not self.trained or size >= self._trained_size * self.retrain_growth:
+            self.train(vectors)
+            return
+        self._assignments = np.concatenate([self._assignments[:start], self._assign(vectors[start:])])
+        self._csr = None
+
+    def snapshot(self) -> "IVFIndex":
+        """A frozen view for readers; later trains and adds only rebind the live index's arrays."""
+
+        return copy.copy(self)
+
+    def state(self, rows: np.ndarray) -> Optional[Dict[str, Any]]:
+        """The trained centroids and the assignments of ``rows`` (renumbered from 0), or ``None`` if untrained."""
+
+        if not self.trained:
+            return None
+        return {"centroids": self.centroids, "assignments": self._assignments[rows], "trained_size": self._trained_size}
+
+    def load_state(self, state: Dict[str, Any], vectors: np.ndarray) -> None:
+        """Adopt a saved ``state()`` without retraining or reassigning rows."""
+
+        self.centroids = state["centroids"]
+        self._assignments = state["assignments"]
+        self._trained_size = state["trained_size"]
+        self._csr = None
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), self.block_size):
+            block = vectors[start : start + self.block_size]
+            assignments[start : start + len(block)] = (block @ self.centroids.T).argmax(axis=1)
+        return assignments
+
+    def _postings(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Posting lists in CSR form: row ids grouped by cluster plus cluster offsets."""
+
+        csr = self._csr
+        if csr is None:
+            # Built from local references and published as one tuple, so concurrent readers never mix generations.
+            assignments, centroids = self._assignments, self.centroids
+            counts = np.bincount(assignments, minlength=len(centroids))
+            csr = (np.argsort(assignments, kind="stable"), np.concatenate([[0], np.cumsum(counts)]))
+            self._csr = csr
+        return csr
+
+    def candidates(self, query_vector: np.ndarray, k: int = 0) -> Optional[np.ndarray]:
+        """Return the sorted row ids stored in the ``nprobe`` clusters closest to the query."""
+
+        if not self.trained:
+            return None
+        order, offsets = self._postings()
+        probes = min(self.nprobe, len(self.centroids))
+        centroid_scores = self.centroids @ query_vector
+        if probes < len(centroid_scores):
+            probed = np.argpartition(-centroid_scores, probes - 1)[:probes]
+        else:
+            probed = np.arange(len(centroid_scores))
+        rows = np.concatenate([order[offsets[cluster] : offsets[cluster + 1]] for cluster in probed])
+        rows.sort()
+        return rows
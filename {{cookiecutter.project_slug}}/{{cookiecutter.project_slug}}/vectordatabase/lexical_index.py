@@ -0,0 +1,95 @@
+import copy
+import math
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Word runs, keeping joined codes such as "ORD-1042" or "v2.3.1" as single tokens.
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase lexical tokens used by the BM25 index."""
+
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index over the rows of one vector index.
+
+    Postings map each term to the rows containing it and the term frequency in
+    each row; they are appended incrementally as rows are added. A query only
+    accumulates scores from the postings of its own terms.
+
+    Lists are only ever appended to and counters rebound, so ``snapshot()`` can
+    share them: a view scores against its own row count and total length.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.size = 0
+        self.postings: Dict[str, List[int]] = {}
+        self.frequencies: Dict[str, List[int]] = {}
+        self.lengths: List[int] = []
+        self._total_length = 0
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def add(self, documents: Sequence[str], start: int) -> None:
+        """Index ``documents[start:]`` (the full list of documents aligned with the rows)."""
+
+        for row in range(start, len(documents)):
+            counts: Dict[str, int] = {}
+            tokens = tokenize(documents[row])
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                self.postings.setdefault(token, []).append(row)
+                self.frequencies.setdefault(token, []).append(count)
+            self.lengths.append(len(tokens))
+            self._total_length += len(tokens)
+        self.size = len(documents)
+        self._arrays = {}
+
+    def snapshot(self) -> "BM25Index":
+        """A frozen view whose scores later ``add`` calls do not change."""
+
+        view = copy.copy(self)
+        view._arrays = {}
+        return view
+
+    def _posting(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._arrays.get(term)
+        if cached is None:
+            cached = (
+                np.asarray(self.postings.get(term, []), dtype=np.int64),
+                np.asarray(self.frequencies.get(term, []), dtype=np.float32),
+            )
+            self._arrays[term] = cached
+        return cached
+
+    def scores(self, query: str, size: Optional[int] = None) -> np.ndarray:
+        """
+        Dense BM25 scores for the first ``size`` rows (default: all); rows
+        sharing no term with the query score 0.
+        """
+
+        size = self.size if size is None else size
+        scores = np.zeros(size, dtype=np.float32)
+        if not size:
+            return scores
+        lengths = np.asarray(self.lengths[:size], dtype=np.float32)
+        average_length = max(self._total_length / max(self.size, 1), 1e-9)
+        norms = self.k1 * (1 - self.b + self.b * lengths / average_length)
+        for term in set(tokenize(query)):
+            rows, frequencies = self._posting(term)
+            # Rows ascend, so the ones below ``size`` are a prefix (a racing writer may append past it).
+            count = int(np.searchsorted(rows, size))
+            if not count:
+                continue
+            rows, frequencies = rows[:count], frequencies[:count]
+            idf = math.log(1 + (self.size - len(rows) + 0.5) / (len(rows) + 0.5))
+            scores[rows] += idf * frequencies * (self.k1 + 1) / (frequencies + norms[rows])
+        return scores
@@ -0,0 +1,264 @@
+import copy
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+def kmeans(vectors: np.ndarray, clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Plain (Euclidean) Lloyd's k-means returning float32 centroids.
+    """
+
+    rng = np.random.default_rng(seed)
+    clusters = max(1, min(clusters, len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), size=clusters, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assignments = _nearest(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=clusters)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    # argmin ||x - c||^2 == argmax (2 x.c - ||c||^2); the ||x||^2 term is constant per row.
+    return (2 * vectors @ centroids.T - (centroids**2).sum(axis=1)).argmax(axis=1)
+
+
+class _Quantizer:
+    """
+    Shared bookkeeping for quantizers that compress the rows of a vector matrix.
+
+    Rows are centered on their mean before encoding: ``q . x == q . mean + q .
+    (x - mean)``, and the residuals spread over the full code range even when
+    all embeddings point in a similar direction. Codes are trained once
+    ``min_train_size`` rows exist and retrained when the row count grows by
+    ``retrain_growth``, each time on at most ``max_train_points`` sampled rows.
+    Until then ``trained`` is ``False`` and callers score the float32 rows
+    directly.
+
+    Codes sit in a buffer with spare capacity. Appends encode only the new rows,
+    ``block_size`` at a time, straight into it; a retrain re-encodes every row
+    into a fresh buffer. Rows below ``size`` are never rewritten and the mean
+    and codebooks are rebound, never written in place, so a shallow
+    ``snapshot()`` that pins ``size`` stays frozen.
+
+    ``add`` reads its rows through slicing and integer-array indexing only, so
+    the source may be a matrix, a memory map or rows ``decode``d from an older
+    snapshot: an index that keeps nothing but codes retrains on its own
+    reconstructions.
+    """
+
+    code_dtype = np.uint8
+    # Trained arrays besides ``mean`` and the codes, named per subclass.
+    parameters: Tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        min_train_size: int,
+        retrain_growth: float = 4.0,
+        seed: int = 0,
+        max_train_points: int = 20_000,
+        block_size: int = 16_384,
+    ) -> None:
+        self.min_train_size = min_train_size
+        self.retrain_growth = retrain_growth
+        self.seed = seed
+        self.max_train_points = max_train_points
+        self.block_size = block_size
+        self.mean: Optional[np.ndarray] = None
+        self.size = 0
+        self._codes: Optional[np.ndarray] = None
+        self._trained_size = 0
+
+    @property
+    def trained(self) -> bool:
+        return self._codes is not None
+
+    @property
+    def codes(self) -> Optional[np.ndarray]:
+        return None if self._codes is None else self._codes[: self.size]
+
+    @property
+    def bytes_per_vector(self) -> int:
+        return 0 if self._codes is None else self._codes.shape[1] * self._codes.itemsize
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the code buffer (spare capacity included) and the trained arrays."""
+
+        arrays = [self._codes, self.mean] + [getattr(self, name) for name in self.parameters]
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def add(self, vectors: np.ndarray, start: int) -> None:
+        """Encode rows ``start:`` of ``vectors`` (the full populated matrix)."""
+
+        size = len(vectors)
+        if size < self.min_train_size:
+            return
+        if not self.trained or size >= self._trained_size * self.retrain_growth:
+            sample = self._sample(vectors)
+            self.mean = sample.mean(axis=0)
+            self._fit(sample - self.mean)
+            self._codes, self.size, start = None, 0, 0
+            self._trained_size = size
+        self._reserve(size, vectors.shape[1])
+        for block_start in range(start, size, self.block_size):
+            block = vectors[block_start : block_start + self.block_size]
+            self._codes[block_start : block_start + len(block)] = self._encode(block - self.mean)
+        self.size = size
+
+    def snapshot(self) -> "_Quantizer":
+        """A frozen view for readers; later adds only append past its ``size`` or rebind arrays."""
+
+        return copy.copy(self)
+
+    def state(self, rows: np.ndarray) -> Optional[Dict[str, Any]]:
+        """The trained arrays and the codes of ``rows`` (renumbered from 0), or ``None`` if untrained."""
+
+        if not self.trained:
+            return None
+        state: Dict[str, Any] = {"mean": self.mean, "codes": self.codes[rows], "trained_size": self._trained_size}
+        state.update((name, getattr(self, name)) for name in self.parameters)
+        return state
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        """Adopt a saved ``state()``; the next append copies the codes into a growable buffer."""
+
+        self.mean = state["mean"]
+        self._codes = state["codes"]
+        self.size = len(self._codes)
+        self._trained_size = state["trained_size"]
+        for name in self.parameters:
+            setattr(self, name, state[name])
+
+    def scores(self, query_vector: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Approximate dot products between the query and the encoded rows (all, or ``rows``)."""
+
+        codes = self.codes if rows is None else self.codes[rows]
+        return self._scores(query_vector, codes) + float(query_vector @ self.mean)
+
+    def decode(self, rows: np.ndarray) -> np.ndarray:
+        """Approximate float32 rows rebuilt from the codes of ``rows``."""
+
+        return self._decode(self.codes[rows]) + self.mean
+
+    def _sample(self, vectors: np.ndarray) -> np.ndarray:
+        if len(vectors) <= self.max_train_points:
+            return vectors[:]
+        rng = np.random.default_rng(self.seed)
+        return vectors[rng.choice(len(vectors), size=self.max_train_points, replace=False)]
+
+    def _reserve(self, needed: int, dimensions: int) -> None:
+        """Grow the code buffer geometrically; a new buffer leaves snapshots on the old one."""
+
+        capacity = 0 if self._codes is None else len(self._codes)
+        if needed <= capacity:
+            return
+        grown = np.empty((max(needed, capacity * 2), self._code_width(dimensions)), dtype=self.code_dtype)
+        if self._codes is not None:
+            grown[: self.size] = self._codes[: self.size]
+        self._codes = grown
+
+    def _code_width(self, dimensions: int) -> int:
+        raise NotImplementedError
+
+    def _fit(self, residuals: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def _encode(self, residuals: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def _decode(self, codes: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def _scores(self, query_vector: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+
+class ScalarQuantizer(_Quantizer):
+    """
+    Symmetric int8 scalar quantization with one scale per dimension (codes are 4x smaller than float32).
+    """
+
+    code_dtype = np.int8
+    parameters = ("scale",)
+
+    def __init__(self, min_train_size: int = 64, **kwargs) -> None:
+        super().__init__(min_train_size, **kwargs)
+        self.scale: Optional[np.ndarray] = None
+
+    def _code_width(self, dimensions: int) -> int:
+        return dimensions
+
+    def _fit(self, residuals: np.ndarray) -> None:
+        self.scale = np.maximum(np.abs(residuals).max(axis=0), 1e-12).astype(np.float32) / 127.0
+
+    def _encode(self, residuals: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(residuals / self.scale), -127, 127).astype(np.int8)
+
+    def _decode(self, codes: np.ndarray) -> np.ndarray:
+        return codes.astype(np.float32) * self.scale
+
+    def _scores(self, query_vector: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        scaled_query = query_vector * self.scale
+        scores = np.empty(len(codes), dtype=np.float32)
+        # Widen to float32 one block at a time so the temporary stays bounded.
+        for start in range(0, len(codes), self.block_size):
+            block = codes[start : start + self.block_size]
+            scores[start : start + len(block)] = block.astype(np.float32) @ scaled_query
+        return scores
+
+
+class ProductQuantizer(_Quantizer):
+    """
+    Product quantization: each vector is split into ``subvectors`` slices and
+    every slice is replaced by the id of its nearest centroid (one byte each).
+
+    Queries build a ``(subvectors, 256)`` lookup table of partial dot products
+    once, then score each row by summing table entries selected by its codes.
+    """
+
+    parameters = ("codebooks",)
+
+    def __init__(self, subvectors: int = 16, centroids: int = 256, iterations: int = 10, **kwargs) -> None:
+        kwargs.setdefault("min_train_size", centroids)
+        super().__init__(**kwargs)
+        self.subvectors = subvectors
+        self.centroids = min(centroids, 256)
+        self.iterations = iterations
+        self.codebooks: Optional[np.ndarray] = None
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        dimensions = vectors.shape[-1]
+        if dimensions % self.subvectors:
+            raise ValueError(f"PQ subvectors ({self.subvectors}) must divide the vector dimensions ({dimensions}).")
+        return vectors.reshape(*vectors.shape[:-1], self.subvectors, dimensions // self.subvectors)
+
+    def _code_width(self, dimensions: int) -> int:
+        return self.subvectors
+
+    def _fit(self, residuals: np.ndarray) -> None:
+        parts = self._split(residuals)
+        self.codebooks = np.stack(
+            [
+                kmeans(parts[:, part], self.centroids, iterations=self.iterations, seed=self.seed + part)
+                for part in range(self.subvectors)
+            ]
+        )
+
+    def _encode(self, residuals: np.ndarray) -> np.ndarray:
+        parts = self._split(residuals)
+        return np.stack(
+            [_nearest(parts[:, part], self.codebooks[part]) for part in range(self.subvectors)], axis=1
+        ).astype(np.uint8)
+
+    def _decode(self, codes: np.ndarray) -> np.ndarray:
+        subvectors, _, width = self.codebooks.shape
+        return self.codebooks[np.arange(subvectors), codes].reshape(len(codes), subvectors * width)
+
+    def _scores(self, query_vector: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        lookup = np.einsum("pcd,pd->pc", self.codebooks, self._split(query_vector))
+        return lookup[np.arange(self.subvectors), codes].sum(axis=1, dtype=np.float32)
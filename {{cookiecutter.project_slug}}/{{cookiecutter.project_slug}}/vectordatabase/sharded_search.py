@@ -0,0 +1,195 @@
+import heapq
+import itertools
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Shared-memory blocks attached by this (worker) process, keyed by block name.
+_ATTACHED: Dict[str, Tuple[shared_memory.SharedMemory, np.ndarray]] = {}
+
+
+def _attach(name: str, shape: Tuple[int, int], active: Sequence[str]) -> np.ndarray:
+    for stale in [block for block in _ATTACHED if block not in active]:
+        _ATTACHED.pop(stale)[0].close()
+    if name not in _ATTACHED:
+        block = shared_memory.SharedMemory(name=name)
+        _ATTACHED[name] = (block, np.ndarray(shape, dtype=np.float32, buffer=block.buf))
+    return _ATTACHED[name][1]
+
+
+def _search_shard(
+    name: str, shape: Tuple[int, int], start: int, end: int, query_vectors: np.ndarray, k: int, active: Sequence[str]
+) -> List[List[Tuple[float, int]]]:
+    """
+    Worker task: score one row range of a shared matrix and return each query's
+    partial top-k as best-first ``(score, row)`` pairs.
+    """
+
+    scores = query_vectors @ _attach(name, shape, active)[start:end].T
+    partial = []
+    for query_scores in scores:
+        if k < len(query_scores):
+            positions = np.argpartition(-query_scores, k - 1)[:k]
+        else:
+            positions = np.arange(len(query_scores))
+        positions = positions[np.lexsort((positions, -query_scores[positions]))]
+        partial.append([(float(query_scores[pos]), start + int(pos)) for pos in positions])
+    return partial
+
+
+class _SharedBlock:
+    """
+    The live rows of one index lineage, copied once into shared memory.
+
+    ``size`` and ``deleted`` record the index state the copy was taken from.
+    ``holders`` counts queries using the block; a retired block is unlinked only
+    once the last of them finishes, so workers never attach a vanished segment.
+    """
+
+    def __init__(self, owner, rows: np.ndarray, vectors: np.ndarray) -> None:
+        self.lineage = owner.lineage
+        self.size = owner.size
+        self.deleted = owner.deleted
+        self.rows = rows
+        self.shape = (len(vectors), vectors.shape[1])
+        self.memory = shared_memory.SharedMemory(create=True, size=max(vectors.nbytes, 1))
+        np.ndarray(self.shape, dtype=np.float32, buffer=self.memory.buf)[:] = vectors
+        self.holders = 0
+        self.retired = False
+
+    def drift(self, owner) -> int:
+        """Rows appended plus rows tombstoned in ``owner`` since the copy (same lineage only)."""
+        return owner.size - self.size + owner.deleted - self.deleted
+
+    def release(self) -> None:
+        self.memory.close()
+        self.memory.unlink()
+
+
+class ShardedSearcher:
+    """
+    Exact top-k search split across a process pool.
+
+    Each index's live rows are copied into a ``multiprocessing.shared_memory``
+    block; workers map the block by name and keep it mapped, so a query only
+    ships the query vectors to the pool. Every worker scores one contiguous shard
+    of rows and returns its partial top-k, and the parent merges the sorted
+    partial lists with a heap.
+
+    Rows are append-only within an index lineage (until compaction), so a block
+    keeps serving newer snapshots: rows appended since the copy are scored in
+    the parent, and workers return ``k`` plus the number of rows tombstoned
+    since, which the parent filters out. The block is re-copied only once
+    appends and deletes exceed ``rebuild_fraction`` of its rows, or the index is
+    compacted, so mixed read/write traffic does not re-copy the matrix per write.
+    """
+
+    def __init__(self, workers: int, shards: Optional[int] = None, rebuild_fraction: float = 0.1) -> None:
+        self.workers = workers
+        self.shards = shards or workers
+        self.rebuild_fraction = rebuild_fraction
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._blocks: Dict[str, _SharedBlock] = {}
+        self._retired: List[_SharedBlock] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self, index: str, store) -> Optional[_SharedBlock]:
+        """
+        Hold the block serving ``store`` (a snapshot view), re-copying it when it
+        drifted too far. Returns ``None`` for a snapshot older than the block.
+        """
+
+        with self._lock:
+            block = self._blocks.get(index)
+            same_lineage = block is not None and block.lineage == store.lineage
+            if same_lineage and (block.size > store.size or block.deleted > store.deleted):
+                return None
+            if not same_lineage or block.drift(store) > self.rebuild_fraction * max(block.shape[0], 1):
+                rows = store.live_rows
+                fresh = _SharedBlock(store, rows, np.ascontiguousarray(store.vectors[rows], dtype=np.float32))
+                self._blocks[index] = fresh
+                if block is not None:
+                    self._retire(block)
+                block = fresh
+            block.holders += 1
+            return block
+
+    def _retire(self, block: _SharedBlock) -> None:
+        """Unlink ``block`` now, or when its last holder releases it; call with the lock held."""
+
+        block.retired = True
+        if block.holders:
+            self._retired.append(block)
+        else:
+            block.release()
+
+    def _release(self, block: _SharedBlock) -> None:
+        with self._lock:
+            block.holders -= 1
+            if block.retired and not block.holders:
+                self._retired.remove(block)
+                block.release()
+
+    def top_k(self, index: str, store, query_vectors: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """Return ``(row, score)`` hits per query, best first, like ``_VectorIndex.top_k``."""
+
+        if k <= 0:
+            return [[] for _ in query_vectors]
+        block = self._acquire(index, store)
+        if block is None:
+            # A reader still on a snapshot older than the shared copy: score it in-process.
+            return store.top_k(query_vectors, k)
+        try:
+            partials = self._shard_hits(block, query_vectors, k + store.deleted - block.deleted)
+        finally:
+            self._release(block)
+
+        alive = store.alive
+        tail = np.arange(block.size, store.size)
+        tail = tail[alive[tail]]
+        tail_scores = query_vectors @ store.vectors[tail].T if tail.size else None
+        hits = []
+        for position, query_partials in enumerate(zip(*partials) if partials else [()] * len(query_vectors)):
+            # Each partial list is best-first; ties resolve to the lower row, as in exact search.
+            merged = heapq.merge(*query_partials, key=lambda pair: (-pair[0], pair[1]))
+            streams = [((score, int(block.rows[row])) for score, row in merged)]
+            if tail_scores is not None:
+                order = np.lexsort((tail, -tail_scores[position]))[:k]
+                streams.append((float(tail_scores[position][pos]), int(tail[pos])) for pos in order)
+            live = (pair for pair in heapq.merge(*streams, key=lambda pair: (-pair[0], pair[1])) if alive[pair[1]])
+            hits.append([(row, score) for score, row in itertools.islice(live, k)])
+        return hits
+
+    def _shard_hits(
+        self, block: _SharedBlock, query_vectors: np.ndarray, k: int
+    ) -> List[List[List[Tuple[float, int]]]]:
+        """Per shard, per query: the best ``k`` ``(score, block row)`` pairs."""
+
+        if not block.shape[0]:
+            return []
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            # Segments workers may keep mapped: current blocks plus retired ones still in use.
+            active = tuple(entry.memory.name for entry in list(self._blocks.values()) + self._retired)
+        bounds = np.linspace(0, block.shape[0], min(self.shards, block.shape[0]) + 1).astype(int)
+        futures = [
+            self._pool.submit(_search_shard, block.memory.name, block.shape, start, end, query_vectors, k, active)
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        """Stop the worker pool and free every shared-memory block."""
+
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            for block in list(self._blocks.values()) + self._retired:
+                block.release()
+            self._blocks = {}
+            self._retired = []
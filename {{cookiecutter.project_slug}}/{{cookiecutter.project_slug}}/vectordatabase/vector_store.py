@@ -1,93 +1,1196 @@
-from typing import Dict, List, Optional, Tuple
+import heapq
+import copy
+import itertools
+import json
+import os
+import tempfile
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Set, Tuple
 
 import numpy as np
 
 from {{ cookiecutter.project_slug }}.embeddings.embedder import Embedder
+from {{ cookiecutter.project_slug }}.vectordatabase.hnsw_index import HNSWIndex
+from {{ cookiecutter.project_slug }}.vectordatabase.ivf_index import IVFIndex
+from {{ cookiecutter.project_slug }}.vectordatabase.lexical_index import BM25Index
+from {{ cookiecutter.project_slug }}.vectordatabase.quantization import ProductQuantizer, ScalarQuantizer
+from {{ cookiecutter.project_slug }}.vectordatabase.sharded_search import ShardedSearcher
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize vectors along the last axis as float32. Zero vectors stay zero.
+    """
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def _top_k_positions(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Return the positions of the k highest scores, best first.
+
+    Uses ``argpartition`` so only the winners are sorted. Ties are broken by
+    position, matching a stable descending sort over the full array.
+    """
+
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.size:
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[: k - above.size]
+        candidates = np.concatenate([above, ties])
+    else:
+        candidates = np.arange(scores.size)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+def _build_ann(config: Optional[Dict[str, Any]]):
+    """
+    Create the approximate index described by an index config, or ``None`` for exact search.
+    """
+
+    config = config or {}
+    index_type = config.get("type", "flat")
+    if index_type == "flat":
+        return None
+    if index_type == "ivf":
+        return IVFIndex(nlist=config.get("nlist", 64), nprobe=config.get("nprobe", 8))
+    if index_type == "hnsw":
+        return HNSWIndex(
+            m=config.get("m", 16),
+            ef_construction=config.get("ef_construction", 100),
+            ef_search=config.get("ef_search", 50),
+        )
+    raise ValueError(f"Unknown vector index type: {index_type}")
+
+
+def _build_quantizer(config: Optional[Dict[str, Any]]):
+    """
+    Create the compressed-code store described by an index config, or ``None`` for float32 only.
+    """
+
+    config = config or {}
+    quantization = config.get("quantization", "none")
+    if quantization == "none":
+        return None
+    if quantization == "int8":
+        return ScalarQuantizer()
+    if quantization == "pq":
+        return ProductQuantizer(subvectors=config.get("pq_subvectors", 16))
+    raise ValueError(f"Unknown vector quantization: {quantization}")
+
+
+MetadataFilter = Dict[str, Any]
+
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+
+
+def _fuse(
+    vector_hits: List[Tuple[int, float]],
+    lexical_hits: List[Tuple[int, float]],
+    k: int,
+    fusion: str = "rrf",
+    rrf_k: int = 60,
+    vector_weight: float = 0.5,
+) -> List[Tuple[int, float]]:
+    """
+    Combine two best-first ``(row, score)`` rankings into one.
+
+    ``rrf`` (reciprocal rank fusion) scores a row ``sum(1 / (rrf_k + rank))``
+    and ignores the raw scores. ``weighted`` min-max normalizes each ranking
+    and mixes them with ``vector_weight``; a row missing from a ranking gets 0
+    for it.
+    """
+
+    fused: Dict[int, float] = {}
+    if fusion == "rrf":
+        for hits in (vector_hits, lexical_hits):
+            for rank, (row, _) in enumerate(hits, start=1):
+                fused[row] = fused.get(row, 0.0) + 1.0 / (rrf_k + rank)
+    elif fusion == "weighted":
+        for hits, weight in ((vector_hits, vector_weight), (lexical_hits, 1.0 - vector_weight)):
+            if not hits:
+                continue
+            high, low = hits[0][1], hits[-1][1]
+            spread = high - low
+            for row, score in hits:
+                normalized = (score - low) / spread if spread > 0 else 1.0
+                fused[row] = fused.get(row, 0.0) + weight * normalized
+    else:
+        raise ValueError(f"Unknown fusion method: {fusion}")
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def _filter_values(value: Any) -> List[Hashable]:
+    """Values a metadata entry is indexed under: list/tuple/set entries are indexed per element."""
+
+    values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+    return [item for item in values if isinstance(item, Hashable)]
+
+
+def _check_where(where: Optional[MetadataFilter]) -> None:
+    """Reject ``where`` filters that can never match indexed metadata with a ``ValueError``."""
+
+    if where is None:
+        return
+    if not isinstance(where, dict):
+        raise ValueError(f"where must be a dict of metadata field -> value(s), got {type(where).__name__}")
+    for field, expected in where.items():
+        for value in expected if isinstance(expected, (list, tuple, set, frozenset)) else [expected]:
+            try:
+                hash(value)
+            except TypeError:
+                raise ValueError(
+                    f"where[{field!r}] must be a scalar or a list of scalars; nested {type(value).__name__} "
+                    f"values such as {value!r} are not indexed"
+                ) from None
+
+
+def _matches_where(metadata: Dict, where: MetadataFilter) -> bool:
+    """
+    Whether one metadata dict passes a ``_check_where``-validated filter, with
+    the semantics of ``_VectorIndex.filter_rows``: fields are ANDed, a list of
+    values matches any of them and list metadata matches on any indexed element.
+    """
+
+    for field, expected in where.items():
+        indexed = set(_filter_values(metadata[field])) if field in metadata else set()
+        if indexed.isdisjoint(expected if isinstance(expected, (list, tuple, set, frozenset)) else [expected]):
+            return False
+    return True
+
+
+def _merge_hits(
+    ranked: List[Tuple["_VectorIndex", List[Tuple[int, float]]]], k: int
+) -> List[Tuple[float, "_VectorIndex", int]]:
+    """
+    Merge per-index best-first hit lists into the global top k ``(score, store, row)``.
+
+    ``heapq.merge`` keeps one cursor per index and stops after k winners, so
+    the work is O(k log indexes). It is stable, so equal scores keep index order
+    then row order.
+    """
+
+    streams = [[(score, store, row) for row, score in hits] for store, hits in ranked]
+    return list(itertools.islice(heapq.merge(*streams, key=lambda item: -item[0]), k))
+
+
+def _mmr(
+    winners: List[Tuple[float, "_VectorIndex", int]], k: int, mmr_lambda: float, cosine_scores: bool
+) -> List[Tuple[float, "_VectorIndex", int]]:
+    """
+    Pick k of the best-first ``winners`` by maximal marginal relevance.
+
+    Each step takes the candidate maximizing ``lambda * relevance - (1 - lambda) *
+    max similarity to the already picked ones``, with cosine similarities from
+    one candidate-by-candidate matrix product. Relevance is the score itself
+    for cosine scores; BM25 and fusion scores are divided by the best one.
+    """
+
+    if len(winners) <= 1 or mmr_lambda >= 1:
+        return winners[:k]
+    vectors = np.stack([store.vectors[row] for _, store, row in winners])
+    similarity = vectors @ vectors.T
+    relevance = np.asarray([score for score, _, _ in winners], dtype=np.float32)
+    if not cosine_scores and relevance.max() > 0:
+        relevance = relevance / relevance.max()
+    redundancy = np.zeros(len(winners), dtype=np.float32)
+    available = np.ones(len(winners), dtype=bool)
+    picked: List[int] = []
+    for step in range(min(k, len(winners))):
+        # argmax returns the first maximum: ties keep the original ranking.
+        gains = np.where(available, mmr_lambda * relevance - (1 - mmr_lambda) * redundancy, -np.inf)
+        choice = int(np.argmax(gains))
+        picked.append(choice)
+        available[choice] = False
+        redundancy = similarity[choice] if step == 0 else np.maximum(redundancy, similarity[choice])
+    return [winners[choice] for choice in picked]
+
+
+def _hit_dicts(winners: List[Tuple[float, "_VectorIndex", int]]) -> List[Dict]:
+    """Result dicts, built only for the final winners."""
+
+    return [
+        {"id": store.ids[row], "text": store.documents[row], "metadata": store.metadatas[row], "score": score}
+        for score, store, row in winners
+    ]
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """
+    What searches read: frozen views of every index plus the version stamps
+    describing exactly those views, published together with one reference swap.
+    """
+
+    stores: Dict[str, "_VectorIndex"]
+    versions: Dict[str, int]
+    generation: int
+
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def _write_state(directory: Path, prefix: str, state: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Write a structure's ``state()`` arrays as ``.npy`` files; returns their manifest record (scalars inline)."""
+
+    if state is None:
+        return None
+    record: Dict[str, Any] = {"arrays": {}, "values": {}}
+    for key, value in state.items():
+        if isinstance(value, np.ndarray):
+            file_name = f"{prefix}.{key}.npy"
+            np.save(directory / file_name, np.ascontiguousarray(value))
+            record["arrays"][key] = file_name
+        else:
+            record["values"][key] = value
+    return record
+
+
+def _read_state(directory: Path, record: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Map the arrays named by a ``_write_state`` record read-only, without loading them."""
+
+    if record is None:
+        return None
+    state = dict(record["values"])
+    for key, file_name in record["arrays"].items():
+        state[key] = np.load(directory / file_name, mmap_mode="r")
+    return state
+
+
+# Rows copied per step when float32 rows are moved to disk or written out, bounding the temporary copy.
+ROW_BLOCK_SIZE = 16_384
+
+
+class _CodedRows:
+    """
+    Read-only stand-in for the float32 matrix of an index that keeps only
+    quantizer codes: rows are decoded from a frozen ``quantizer`` view on
+    access, followed by ``tail`` rows that are not encoded yet. Supports
+    ``len``, ``shape``, slicing and integer (array) indexing, which is all the
+    ANN indexes, quantizers and scoring paths use.
+    """
+
+    def __init__(self, quantizer, tail: Optional[np.ndarray] = None) -> None:
+        self.quantizer = quantizer
+        dimensions = len(quantizer.mean) if tail is None else tail.shape[1]
+        self.tail = np.empty((0, dimensions), dtype=np.float32) if tail is None else tail
+        self.shape = (quantizer.size + len(self.tail), dimensions)
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, rows) -> np.ndarray:
+        if isinstance(rows, slice):
+            rows = np.arange(*rows.indices(len(self)))
+        rows = np.asarray(rows, dtype=np.int64)
+        if rows.ndim == 0:
+            return self[rows[None]][0]
+        coded = rows < self.quantizer.size
+        if coded.all():
+            return self.quantizer.decode(rows)
+        decoded = np.empty((len(rows), self.shape[1]), dtype=np.float32)
+        decoded[coded] = self.quantizer.decode(rows[coded])
+        decoded[~coded] = self.tail[rows[~coded] - self.quantizer.size]
+        return decoded
+
+
+class _VectorIndex:
+    """
+    One named index: a contiguous, pre-normalized float32 matrix with spare
+    capacity, plus the ids, documents and metadata aligned with its rows.
+
+    An optional approximate index (``ann``) narrows each query to a subset of
+    candidate rows, which are then scored exactly against the matrix. An
+    optional ``quantizer`` scores candidates on compressed codes first; the best
+    ``k * rescore_factor`` are then re-scored in full precision when ``rescore``
+    is set.
+
+    Once the quantizer is trained the float32 rows leave process memory. With
+    ``rescore`` they move to a disk-backed memory map (the saved matrix file
+    after a load, else an anonymous temporary file in ``spill_directory``), so
+    re-scoring pages in just the shortlisted rows. Without it ``matrix`` is
+    ``None`` and the codes are the only copy: ``vectors`` decodes them (see
+    ``_CodedRows``) for the ANN index, filtered scoring, MMR and saving.
+    ``resident_bytes`` reports what is actually held in memory.
+
+    Metadata fields are kept in inverted indexes (field -> value -> ascending row
+    ids) so ``where`` filters resolve to a row subset before any scoring.
+
+    Deleting a document only clears its ``alive`` flag (a tombstone); its row
+    keeps its position until the owning store compacts the index.
+
+    A BM25 index over the document texts (``lexical``) is maintained alongside
+    the vectors for keyword and hybrid search.
+
+    Rows are append-only, so ``snapshot()`` can hand readers a cheap frozen
+    view: it shares the matrix and payload lists but pins ``size``, copies the
+    ``alive`` flags and takes frozen views of the BM25, ANN and quantizer
+    structures, and every lookup below clips row ids to ``size``.
+    """
+
+    def __init__(
+        self,
+        dimensions: int,
+        capacity: int = 64,
+        ann=None,
+        quantizer=None,
+        rescore: bool = True,
+        rescore_factor: int = 4,
+        spill_directory: Optional[str] = None,
+    ) -> None:
+        self.dimensions = dimensions
+        self.matrix: Optional[np.ndarray] = np.zeros((max(capacity, 1), dimensions), dtype=np.float32)
+        self.alive = np.zeros(max(capacity, 1), dtype=bool)
+        self.size = 0
+        self.deleted = 0
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.documents: List[str] = []
+        self.metadatas: List[Dict] = []
+        self.ann = ann
+        self.quantizer = quantizer
+        self.rescore = rescore
+        self.rescore_factor = rescore_factor
+        self.spill_directory = spill_directory
+        # Open temporary file behind a disk-backed ``matrix``; growing it only extends the file.
+        self._spill = None
+        self.postings: Dict[str, Dict[Hashable, List[int]]] = {}
+        self._posting_arrays: Dict[Tuple[str, Hashable], np.ndarray] = {}
+        self.lexical = BM25Index()
+        # Shared by this index's snapshots; a compacted or loaded index starts a new lineage.
+        self.lineage = uuid.uuid4().hex
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the populated rows, tombstoned ones included (decoded from the codes when only those are kept)."""
+
+        if self.matrix is None:
+            # A frozen view, so rows read by a held snapshot (or its graph) survive a later retrain.
+            return _CodedRows(self.quantizer.snapshot())
+        return self.matrix[: self.size]
+
+    @property
+    def resident_bytes(self) -> int:
+        """Process memory held for the vectors: the in-memory float32 matrix, if any, plus the quantizer."""
+
+        in_memory = self.matrix is not None and not isinstance(self.matrix, np.memmap)
+        return (self.matrix.nbytes if in_memory else 0) + (self.quantizer.nbytes if self.quantizer is not None else 0)
+
+    @property
+    def live_rows(self) -> np.ndarray:
+        return np.flatnonzero(self.alive[: self.size])
+
+    @property
+    def exact(self) -> bool:
+        """True while searches scan the full matrix (no trained approximate index or codes)."""
+
+        use_ann = self.ann is not None and self.ann.trained
+        use_codes = self.quantizer is not None and self.quantizer.trained
+        return not use_ann and not use_codes
+
+    @property
+    def _spills(self) -> bool:
+        """True once float32 rows belong on disk: the codes are trained and re-scoring still reads the rows."""
+
+        return self.quantizer is not None and self.quantizer.trained and self.rescore
+
+    def _reserve(self, needed: int) -> None:
+        """
+        Grow the matrix geometrically so appends stay amortized O(1). A
+        temporary-file matrix is re-mapped over the extended file without a
+        copy; snapshots keep their shorter maps of the same rows.
+        """
+
+        capacity = len(self.alive)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        if self.matrix is None:
+            grown = None
+        elif self._spill is not None:
+            grown = self._map_spill(capacity)
+        elif self._spills:
+            grown = self._spill_rows(self.vectors, None, capacity)
+        else:
+            grown = np.zeros((capacity, self.dimensions), dtype=np.float32)
+            grown[: self.size] = self.matrix[: self.size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[: self.size] = self.alive[: self.size]
+        self.matrix = grown
+        self.alive = alive
+
+    def _map_spill(self, capacity: int) -> np.memmap:
+        # Mapping past the end of the file extends it; rows already written are untouched.
+        return np.memmap(self._spill, dtype=np.float32, mode="r+", shape=(max(capacity, 1), self.dimensions))
+
+    def _spill_rows(self, source, rows: Optional[np.ndarray], capacity: int) -> np.memmap:
+        """Copy ``source`` rows (all, or ``rows``) into a new temporary-file matrix of ``capacity`` rows."""
+
+        if self.spill_directory:
+            Path(self.spill_directory).mkdir(parents=True, exist_ok=True)
+        # Unlinked on creation, so the file disappears with the last map of it.
+        self._spill = tempfile.TemporaryFile(dir=self.spill_directory)
+        matrix = self._map_spill(capacity)
+        count = len(source) if rows is None else len(rows)
+        for start in range(0, count, ROW_BLOCK_SIZE):
+            stop = min(start + ROW_BLOCK_SIZE, count)
+            matrix[start:stop] = source[start:stop] if rows is None else source[rows[start:stop]]
+        return matrix
+
+    def _settle_rows(self) -> None:
+        """Drop the float32 rows (``rescore=False``) or move them to disk once the codes are trained."""
+
+        if self.matrix is None or self.quantizer is None or not self.quantizer.trained:
+            return
+        if not self.rescore:
+            self.matrix = None
+        elif not isinstance(self.matrix, np.memmap):
+            self.matrix = self._spill_rows(self.vectors, None, len(self.alive))
+
+    def copy_rows(self, source: "_VectorIndex", rows: np.ndarray) -> Optional[np.ndarray]:
+        """
+        ``rows`` of ``source`` as a matrix for this empty index to ``restore``:
+        ``None`` when ``source`` keeps only codes, a temporary-file matrix when
+        its rows are on disk, else an in-memory copy.
+        """
+
+        if source.matrix is None:
+            return None
+        if source._spills:
+            return self._spill_rows(source.vectors, rows, len(rows))
+        return np.ascontiguousarray(source.vectors[rows])
+
+    def add(self, vectors: np.ndarray, ids: Sequence[str], documents: Sequence[str], metadatas: Sequence[Dict]) -> None:
+        """Append vectors and their payloads; rows already holding one of ``ids`` are tombstoned."""
+
+        start = self.size
+        end = start + len(documents)
+        self._reserve(end)
+        replaced = [self.row_of[document_id] for document_id in ids if document_id in self.row_of]
+        rows = _normalize_rows(vectors)
+        source = None
+        if self.matrix is None:
+            # Only codes are kept: the new rows are encoded from memory and never stored in float32.
+            source = _CodedRows(self.quantizer.snapshot(), rows)
+        else:
+            self.matrix[start:end] = rows
+        self.ids.extend(ids)
+        self.documents.extend(documents)
+        self.metadatas.extend(metadatas)
+        self.alive[start:end] = True
+        self.size = end
+        self._index_rows(start, source=source)
+        # New versions become visible before the rows they replace are tombstoned.
+        self.alive[replaced] = False
+        self.deleted += len(replaced)
+
+    def restore(
+        self,
+        matrix: Optional[np.ndarray],
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict],
+        ann_state: Optional[Dict[str, Any]] = None,
+        quantizer_state: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Adopt an already-normalized matrix (e.g. a read-only memmap) without copying it.
+
+        Saved ANN and quantizer states are adopted as they are; without one,
+        that structure is rebuilt from the rows. ``matrix`` may be ``None``
+        for an index that keeps only codes, given their ``quantizer_state``.
+        The first append afterwards copies the rows into a growable matrix,
+        in memory or, for a re-scoring quantized index, on disk.
+        """
+
+        self.matrix = matrix
+        self.alive = np.ones(len(ids), dtype=bool)
+        self.size = len(ids)
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        if quantizer_state is not None:
+            self.quantizer.load_state(quantizer_state)
+        self._index_rows(0, ann=ann_state is None, quantizer=quantizer_state is None)
+        if ann_state is not None:
+            self.ann.load_state(ann_state, self.vectors)
+
+    def snapshot(self) -> "_VectorIndex":
+        """A read-only view of the current rows that later writes to this index do not affect."""
+
+        view = copy.copy(self)
+        view.alive = self.alive[: self.size].copy()
+        view.lexical = self.lexical.snapshot()
+        if self.ann is not None:
+            view.ann = self.ann.snapshot()
+        if self.quantizer is not None:
+            view.quantizer = self.quantizer.snapshot()
+        return view
+
+    def delete(self, document_id: str) -> bool:
+        """Tombstone a document; returns ``False`` if the id is unknown."""
+
+        row = self.row_of.pop(document_id, None)
+        if row is None:
+            return False
+        self.alive[row] = False
+        self.deleted += 1
+        return True
+
+    def _index_rows(self, start: int, ann: bool = True, quantizer: bool = True, source=None) -> None:
+        """Index rows ``start:``; ``source`` holds the rows when they are not in ``matrix`` (codes-only indexes)."""
+
+        for row in range(start, self.size):
+            self.row_of[self.ids[row]] = row
+            for field, value in self.metadatas[row].items():
+                field_postings = self.postings.setdefault(field, {})
+                for item in _filter_values(value):
+                    field_postings.setdefault(item, []).append(row)
+        self._posting_arrays = {}
+        self.lexical.add(self.documents, start)
+        if quantizer and self.quantizer is not None:
+            self.quantizer.add(self.vectors if source is None else source, start)
+        self._settle_rows()
+        if ann and self.ann is not None:
+            # After settling, so a codes-only graph reads decoded rows rather than a dropped matrix.
+            self.ann.add(self.vectors, start)
+
+    def _posting(self, field: str, value: Hashable) -> np.ndarray:
+        key = (field, value)
+        cached = self._posting_arrays.get(key)
+        if cached is None:
+            cached = np.asarray(self.postings.get(field, {}).get(value, []), dtype=np.int64)
+            self._posting_arrays[key] = cached
+        return cached
+
+    def filter_rows(self, where: MetadataFilter) -> np.ndarray:
+        """
+        Resolve a metadata filter to ascending row ids.
+
+        Fields are ANDed; a list of values for one field matches any of them.
+        """
+
+        rows: Optional[np.ndarray] = None
+        for field, expected in where.items():
+            values = expected if isinstance(expected, (list, tuple, set, frozenset)) else [expected]
+            matched = np.empty(0, dtype=np.int64)
+            for value in values:
+                matched = np.union1d(matched, self._posting(field, value))
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+            if not rows.size:
+                break
+        if rows is None:
+            return np.arange(self.size)
+        return rows[: np.searchsorted(rows, self.size)]
+
+    def top_k(
+        self, query_vectors: np.ndarray, k: int, where: Optional[MetadataFilter] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Keep the best k live rows per normalized query.
+
+        Exact search scores the whole batch with one matrix product; a trained
+        approximate index scores only each query's candidate rows, and a trained
+        quantizer shortlists them on compressed codes. With ``where``, only the
+        matching rows are gathered and scored exactly. Tombstoned rows score
+        ``-inf`` and are never returned.
+        """
+
+        vectors = self.vectors
+        alive = self.alive[: len(vectors)]
+        has_tombstones = self.deleted > 0
+        if where:
+            rows = self.filter_rows(where)
+            if has_tombstones:
+                rows = rows[alive[rows]]
+            if not rows.size:
+                return [[] for _ in query_vectors]
+            scores = query_vectors @ vectors[rows].T
+            return [self._hits(query_scores, rows, k) for query_scores in scores]
+
+        if self.exact:
+            scores = query_vectors @ vectors.T
+            if has_tombstones:
+                scores[:, ~alive] = -np.inf
+            return [self._hits(query_scores, None, k) for query_scores in scores]
+        use_ann = self.ann is not None and self.ann.trained
+        use_codes = self.quantizer is not None and self.quantizer.trained
+        hits = []
+        for query_vector in query_vectors:
+            rows = self.ann.candidates(query_vector, k) if use_ann else None
+            if rows is not None:
+                rows = rows[: np.searchsorted(rows, len(vectors))]
+            if has_tombstones:
+                rows = np.flatnonzero(alive) if rows is None else rows[alive[rows]]
+            if use_codes:
+                approximate = self.quantizer.scores(query_vector, rows)
+                if rows is None:
+                    approximate = approximate[: len(vectors)]
+                if not self.rescore:
+                    hits.append(self._hits(approximate, rows, k))
+                    continue
+                shortlist = np.sort(_top_k_positions(approximate, k * self.rescore_factor))
+                rows = shortlist if rows is None else rows[shortlist]
+            hits.append(self._hits(vectors[rows] @ query_vector, rows, k))
+        return hits
+
+    def lexical_top_k(
+        self, queries: Sequence[str], k: int, where: Optional[MetadataFilter] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """Keep the best k live rows per query by BM25 score; rows sharing no term are skipped."""
+
+        size = self.size
+        alive = self.alive[:size]
+        rows = self.filter_rows(where) if where else None
+        hits = []
+        for query in queries:
+            scores = self.lexical.scores(query, size)
+            scores[scores <= 0] = -np.inf
+            if self.deleted:
+                scores[~alive] = -np.inf
+            if rows is None:
+                hits.append(self._hits(scores, None, k))
+            else:
+                hits.append(self._hits(scores[rows], rows, k))
+        return hits
+
+    @staticmethod
+    def _hits(scores: np.ndarray, rows: Optional[np.ndarray], k: int) -> List[Tuple[int, float]]:
+        positions = _top_k_positions(scores, k)
+        positions = positions[np.isfinite(scores[positions])]
+        ids = positions if rows is None else rows[positions]
+        return [(int(row), float(score)) for row, score in zip(ids, scores[positions])]
 
 
 class InMemoryVectorStore:
     """
     A simple in-memory vector store powered by NumPy for similarity search.
     Suitable for starter projects without external database dependencies.
+
+    Each named index keeps its embeddings in one pre-normalized float32 matrix,
+    so cosine similarity is a single matrix-vector product per query.
+
+    ``index_config`` selects the search structure for every index (``{"type":
+    "flat"}`` for exact search, ``{"type": "ivf", "nlist": ..., "nprobe": ...}``
+    for an inverted-file index, ``{"type": "hnsw", "m": ..., "ef_construction":
+    ..., "ef_search": ...}`` for a navigable small-world graph). Adding
+    ``"quantization": "int8" | "pq"`` scores on compressed codes and re-scores
+    a shortlist in float32 (``rescore``/``rescore_factor``). Only the codes stay
+    in memory: re-scored rows are read from a disk-backed map created in
+    ``spill_directory`` (the system temp directory by default), and with
+    ``"rescore": False`` the float32 rows are not kept at all (see
+    ``_VectorIndex``). ``index_overrides`` replaces the config per index name.
+
+    Documents carry stable ids. ``delete`` and ``upsert_documents`` tombstone
+    the affected rows; once more than ``compaction_threshold`` of an index is
+    tombstoned, a fresh dense index is built from the live rows (on a
+    background thread when ``background_compaction`` is set) and swapped in.
+
+    Searches read an immutable snapshot (frozen index views plus their version
+    stamps, see ``_Snapshot``) and never take a lock. Writers serialize on one
+    lock, apply their change to the live indexes, then publish the next snapshot
+    with a single reference swap. A search therefore sees each write (including
+    both halves of an upsert) entirely or not at all, and ingestion and
+    compaction never block queries.
+
+    With ``search_workers > 1``, exact searches over indexes of at least
+    ``shard_min_rows`` rows are split into shards scored by a process pool over
+    a shared-memory copy of the matrix (see ``ShardedSearcher``). Call
+    ``close()`` to stop the pool and free the shared memory.
+
+    ``search_mode`` picks the default ranking: ``"vector"`` (cosine similarity),
+    ``"lexical"`` (BM25 over the document text, which catches exact tokens such
+    as order ids that hashed embeddings blur) or ``"hybrid"``, which fuses the
+    best ``top_k * hybrid_candidates`` of both rankings per index with ``fusion``
+    (``"rrf"`` or ``"weighted"``, see ``_fuse``). Hybrid and lexical scores are
+    fusion/BM25 scores, not cosine similarities.
     """
 
-    def __init__(self, embedder: Optional[Embedder] = None) -> None:
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        index_config: Optional[Dict[str, Any]] = None,
+        index_overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+        compaction_threshold: float = 0.2,
+        background_compaction: bool = True,
+        search_workers: int = 1,
+        shard_min_rows: int = 20_000,
+        search_mode: str = "vector",
+        fusion: str = "rrf",
+        rrf_k: int = 60,
+        vector_weight: float = 0.5,
+        hybrid_candidates: int = 4,
+        mmr_lambda: Optional[float] = None,
+        mmr_candidates: int = 4,
+        spill_directory: Optional[str] = None,
+    ) -> None:
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {search_mode}")
+        if fusion not in ("rrf", "weighted"):
+            raise ValueError(f"Unknown fusion method: {fusion}")
+        if getattr(embedder, "output", "dense") != "dense":
+            raise ValueError("The vector store indexes dense float32 rows; configure the embedder with output='dense'.")
         self.embedder = embedder or Embedder()
-        self._stores: Dict[str, Dict[str, List]] = {}
+        self.index_config = index_config or {"type": "flat"}
+        self.index_overrides = index_overrides or {}
+        self.compaction_threshold = compaction_threshold
+        self.background_compaction = background_compaction
+        self._stores: Dict[str, _VectorIndex] = {}
+        # Index versions grow on every publish and are never reset, so cached results cannot outlive a change.
+        self._snapshot = _Snapshot(stores={}, versions={}, generation=0)
+        self._write_lock = threading.RLock()
+        self._compacting: Set[str] = set()
+        self.shard_min_rows = shard_min_rows
+        self._sharded = ShardedSearcher(search_workers) if search_workers > 1 else None
+        self.search_mode = search_mode
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.vector_weight = vector_weight
+        self.hybrid_candidates = hybrid_candidates
+        self.mmr_lambda = mmr_lambda
+        self.mmr_candidates = mmr_candidates
+        self.spill_directory = spill_directory
+
+    def _embed(self, texts: Sequence[str], cache: bool = True) -> np.ndarray:
+        """
+        Embed texts as a float32 matrix, skipping the list round-trip when the embedder offers ``embed_batch``.
+
+        ``cache=False`` (used for queries) keeps the texts out of the embedder's persistent embedding cache.
+        """
+
+        embed_batch = getattr(self.embedder, "embed_batch", None)
+        if embed_batch is None:
+            return np.asarray(self.embedder.embed_documents(texts), dtype=np.float32)
+        if not cache and getattr(self.embedder, "embedding_cache", None) is not None:
+            embeddings = embed_batch(texts, cache=False)
+        else:
+            embeddings = embed_batch(texts)
+        return np.asarray(embeddings, dtype=np.float32)
 
-    def _get_store(self, index: str) -> Dict[str, List]:
+    def _get_store(self, index: str, dimensions: int) -> _VectorIndex:
         """Return a named index store, creating it if needed."""
 
         if index not in self._stores:
-            self._stores[index] = {"vectors": [], "documents": [], "metadatas": []}
+            self._stores[index] = self._new_store(index, dimensions)
         return self._stores[index]
 
+    def _new_store(self, index: str, dimensions: int) -> _VectorIndex:
+        config = self.index_overrides.get(index, self.index_config)
+        return _VectorIndex(
+            dimensions,
+            ann=_build_ann(config),
+            quantizer=_build_quantizer(config),
+            rescore=config.get("rescore", True),
+            rescore_factor=config.get("rescore_factor", 4),
+            spill_directory=self.spill_directory,
+        )
+
     def add_documents(
-        self, documents: List[str], metadatas: Optional[List[Dict]] = None, index: str = "default"
-    ) -> None:
+        self,
+        documents: List[str],
+        metadatas: Optional[List[Dict]] = None,
+        index: str = "default",
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
         """
         Add documents and optional metadata to a named index.
+
+        Returns the document ids, generating random ones when ``ids`` is omitted.
+        Raises ``ValueError`` if an id is already stored in the index; use
+        ``upsert_documents`` to replace documents.
         """
 
+        return self._write(documents, metadatas, index, ids, replace=False)
+
+    def upsert_documents(
+        self,
+        documents: List[str],
+        metadatas: Optional[List[Dict]] = None,
+        index: str = "default",
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Insert documents, replacing any already stored in the index under the same ids.
+
+        Only the given documents are re-embedded; the rows they replace are tombstoned.
+        """
+
+        return self._write(documents, metadatas, index, ids, replace=True)
+
+    def _write(
+        self,
+        documents: List[str],
+        metadatas: Optional[List[Dict]],
+        index: str,
+        ids: Optional[List[str]],
+        replace: bool,
+    ) -> List[str]:
         metadatas = metadatas or [{} for _ in documents]
         if len(metadatas) != len(documents):
             raise ValueError("metadatas length must match documents length.")
+        ids = [str(document_id) for document_id in ids] if ids is not None else [uuid.uuid4().hex for _ in documents]
+        if len(ids) != len(documents):
+            raise ValueError("ids length must match documents length.")
+        if len(set(ids)) != len(ids):
+            raise ValueError("ids must be unique within one call.")
+        if not documents:
+            return ids
 
-        embeddings = self.embedder.embed_documents(documents)
-        store = self._get_store(index)
-        for doc, metadata, embedding in zip(documents, metadatas, embeddings):
+        fit = getattr(self.embedder, "fit", None)
+        if fit is not None and not getattr(self.embedder, "fitted", True):
+            # Ingest statistics (IDF) are fitted on the first batch and then frozen, so later writes and deletes
+            # never reweight queries away from the stored vectors; refit with ``embedder.fit`` and re-add.
+            fit(documents)
+        embeddings = self._embed(documents)
+        metadatas_with_index = []
+        for metadata in metadatas:
             metadata_with_index = dict(metadata)
             metadata_with_index.setdefault("index", index)
-            store["documents"].append(doc)
-            store["metadatas"].append(metadata_with_index)
-            store["vectors"].append(np.array(embedding, dtype=np.float32))
+            metadatas_with_index.append(metadata_with_index)
+        with self._write_lock:
+            store = self._get_store(index, embeddings.shape[1])
+            if not replace:
+                existing = [document_id for document_id in ids if document_id in store.row_of]
+                if existing:
+                    raise ValueError(f"Document ids already exist in index '{index}': {existing[:5]}")
+            store.add(embeddings, ids, documents, metadatas_with_index)
+            self._publish(index)
+            self._maybe_compact(index)
+        return ids
 
-    @staticmethod
-    def _similarity(query_vector: np.ndarray, vectors: List[np.ndarray]) -> List[Tuple[int, float]]:
+    def delete(self, ids: Sequence[str], index: Optional[str] = None) -> int:
         """
-        Compute cosine similarity between the query vector and stored vectors.
+        Delete documents by id from one index (or every index) and return how many were removed.
         """
 
-        similarities: List[Tuple[int, float]] = []
-        for idx, vector in enumerate(vectors):
-            denom = np.linalg.norm(vector) * np.linalg.norm(query_vector)
-            if denom == 0:
-                score = 0.0
-            else:
-                score = float(np.dot(vector, query_vector) / denom)
-            similarities.append((idx, score))
-        return similarities
+        removed = 0
+        with self._write_lock:
+            target_indexes = [index] if index is not None else list(self._stores.keys())
+            for name in target_indexes:
+                store = self._stores.get(name)
+                if store is None:
+                    continue
+                removed_here = sum(store.delete(str(document_id)) for document_id in ids)
+                if removed_here:
+                    # Unknown ids change nothing, so cached results and snapshots for the index stay valid.
+                    removed += removed_here
+                    self._publish(name)
+                    self._maybe_compact(name)
+        return removed
 
-    def search(self, query: str, top_k: int = 3, indexes: Optional[List[str]] = None) -> List[Dict]:
+    def compact(self, index: Optional[str] = None) -> None:
         """
-        Search for the top_k most similar documents across one or more indexes.
+        Rebuild one index (or every index) from its live rows, dropping tombstones.
         """
 
-        query_vector = np.array(self.embedder.embed(query), dtype=np.float32)
-        if not self._stores:
-            return []
+        for name in [index] if index is not None else list(self._stores.keys()):
+            self._compact(name)
 
-        target_indexes = indexes or list(self._stores.keys())
-        results = []
-        for index in target_indexes:
+    def _publish(self, *names: str) -> None:
+        """
+        Swap in a snapshot with fresh views of ``names`` (every index when empty)
+        and their bumped versions; call under the write lock.
+        """
+
+        current = self._snapshot
+        versions = dict(current.versions)
+        for name in names or set(current.versions) | set(self._stores):
+            versions[name] = versions.get(name, 0) + 1
+        if names:
+            stores = dict(current.stores)
+            for name in names:
+                stores[name] = self._stores[name].snapshot()
+        else:
+            stores = {name: store.snapshot() for name, store in self._stores.items()}
+        # Views and versions change in one assignment: a reader never pairs a new version with old rows.
+        self._snapshot = _Snapshot(stores=stores, versions=versions, generation=current.generation + 1)
+
+    def version(self, indexes: Optional[Sequence[str]] = None) -> Tuple:
+        """
+        Change stamp for ``indexes`` (all indexes when None). It differs after
+        any write, delete, compaction, load or reset touching them, so results
+        cached under an older stamp are stale. A stamp read before a search is
+        never newer than the rows that search sees.
+        """
+
+        snapshot = self._snapshot
+        if indexes is None:
+            return ("*", snapshot.generation)
+        return tuple(snapshot.versions.get(name, 0) for name in indexes)
+
+    def _maybe_compact(self, index: str) -> None:
+        store = self._stores[index]
+        if not store.deleted or store.deleted <= self.compaction_threshold * store.size:
+            return
+        if not self.background_compaction:
+            self._compact(index)
+        elif index not in self._compacting:
+            self._compacting.add(index)
+            threading.Thread(target=self._compact, args=(index,), daemon=True).start()
+
+    def _compact(self, index: str) -> None:
+        with self._write_lock:
+            self._compacting.discard(index)
             store = self._stores.get(index)
-            if not store:
+            if store is None or not store.deleted:
+                return
+            live = store.live_rows
+            compacted = self._new_store(index, store.dimensions)
+            compacted.restore(
+                compacted.copy_rows(store, live),
+                [store.ids[row] for row in live],
+                [store.documents[row] for row in live],
+                [store.metadatas[row] for row in live],
+                # Trained codes carry over, so compaction never re-encodes rows (or needs float32 ones).
+                quantizer_state=store.quantizer.state(live) if store.quantizer is not None else None,
+            )
+            # Searches already running keep their snapshot of the old, still valid index.
+            self._stores[index] = compacted
+            self._publish(index)
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 3,
+        indexes: Optional[List[str]] = None,
+        where: Optional[MetadataFilter] = None,
+        mode: Optional[str] = None,
+        mmr_lambda: Optional[float] = None,
+    ) -> List[Dict]:
+        """
+        Search for the top_k most similar documents across one or more indexes.
+
+        ``where`` restricts the search to documents whose metadata matches, e.g.
+        ``{"knowledge_base": "product_docs", "source": ["a.md", "b.md"]}``;
+        values must be scalars or lists of scalars (``ValueError`` otherwise).
+        ``mode`` overrides the store's ``search_mode`` and ``mmr_lambda`` its
+        ``mmr_lambda`` for this call.
+        """
+
+        return self.search_many(
+            [query], top_k=top_k, indexes=indexes, where=where, mode=mode, mmr_lambda=mmr_lambda
+        )[0]
+
+    def search_many(
+        self,
+        queries: Sequence[str],
+        top_k: int = 3,
+        indexes: Optional[List[str]] = None,
+        where: Optional[MetadataFilter] = None,
+        mode: Optional[str] = None,
+        mmr_lambda: Optional[float] = None,
+    ) -> List[List[Dict]]:
+        """
+        Search for the top_k most similar documents for each query in a batch.
+
+        All queries are embedded together and scored against each index with a
+        single matrix-matrix product. Returns one ranked list per query, in the
+        same order as ``queries``.
+
+        With ``mmr_lambda`` set (0 = most diverse, 1 = plain ranking), the best
+        ``top_k * mmr_candidates`` hits are re-ranked by maximal marginal
+        relevance (see ``_mmr``), so near-identical chunks do not fill every slot.
+        """
+
+        mode = mode or self.search_mode
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        mmr_lambda = self.mmr_lambda if mmr_lambda is None else mmr_lambda
+        if mmr_lambda is not None and not 0 <= mmr_lambda <= 1:
+            raise ValueError(f"mmr_lambda must be between 0 and 1, got {mmr_lambda}")
+        _check_where(where)
+        if not queries:
+            return []
+        final_k = top_k
+        if mmr_lambda is not None:
+            top_k = top_k * self.mmr_candidates
+        query_vectors = None
+        if mode != "lexical":
+            query_vectors = _normalize_rows(self._embed(list(queries), cache=False))
+        stores = self._snapshot.stores
+        # Per query: one best-first (row, score) list per searched index, built by each index's own top-k.
+        ranked: List[List[Tuple[_VectorIndex, List[Tuple[int, float]]]]] = [[] for _ in queries]
+        for index in indexes or list(stores.keys()):
+            store = stores.get(index)
+            if not store or not store.size:
                 continue
-            similarities = self._similarity(query_vector, store["vectors"])
-            for idx, score in similarities:
-                results.append(
-                    {
-                        "text": store["documents"][idx],
-                        "metadata": store["metadatas"][idx],
-                        "score": score,
-                    }
-                )
-        ranked = sorted(results, key=lambda item: item["score"], reverse=True)[:top_k]
-        return ranked
+            index_hits = self._index_hits(index, store, queries, query_vectors, top_k, where, mode)
+            for query_ranked, hits in zip(ranked, index_hits):
+                if hits:
+                    query_ranked.append((store, hits))
+        winners = [_merge_hits(query_ranked, top_k) for query_ranked in ranked]
+        if mmr_lambda is not None:
+            winners = [_mmr(query_winners, final_k, mmr_lambda, mode == "vector") for query_winners in winners]
+        return [_hit_dicts(query_winners) for query_winners in winners]
+
+    def _index_hits(
+        self,
+        index: str,
+        store: _VectorIndex,
+        queries: Sequence[str],
+        query_vectors: Optional[np.ndarray],
+        top_k: int,
+        where: Optional[MetadataFilter],
+        mode: str,
+    ) -> List[List[Tuple[int, float]]]:
+        if mode == "lexical":
+            return store.lexical_top_k(queries, top_k, where=where)
+        depth = top_k * self.hybrid_candidates if mode == "hybrid" else top_k
+        if self._sharded is not None and not where and store.exact and store.size >= self.shard_min_rows:
+            vector_hits = self._sharded.top_k(index, store, query_vectors, depth)
+        else:
+            vector_hits = store.top_k(query_vectors, depth, where=where)
+        if mode == "vector":
+            return vector_hits
+        lexical_hits = store.lexical_top_k(queries, depth, where=where)
+        return [
+            _fuse(dense, sparse, top_k, fusion=self.fusion, rrf_k=self.rrf_k, vector_weight=self.vector_weight)
+            for dense, sparse in zip(vector_hits, lexical_hits)
+        ]
+
+    def save(self, directory: str, fingerprint: Optional[str] = None) -> None:
+        """
+        Persist every index to ``directory``.
+
+        Each index is written as a raw float32 matrix file plus a JSON Lines
+        sidecar holding its document ids, texts and metadata; tombstoned rows are
+        left out. Trained IVF centroids and assignments, the HNSW adjacency and
+        quantizer codes are written as ``.npy`` files next to them, together
+        with the index config they were built with, so ``load`` can map them
+        instead of rebuilding; so are the embedder's frozen ingest statistics
+        (IDF), if it has any. ``manifest.json`` names the files and records
+        ``fingerprint`` (any caller-defined string, such as a hash of the
+        sources and embedding settings). Data files get fresh names on every save and the manifest is
+        swapped in atomically, so processes that still map the previous
+        generation keep reading consistent data.
+        """
+
+        target = Path(directory)
+        target.mkdir(parents=True, exist_ok=True)
+        generation = uuid.uuid4().hex[:12]
+        manifest: Dict[str, Any] = {"version": MANIFEST_VERSION, "fingerprint": fingerprint, "indexes": {}}
+        with self._write_lock:
+            embedder_state = getattr(self.embedder, "state", None)
+            embedder_state = embedder_state() if embedder_state is not None else None
+            manifest["embedder"] = _write_state(target, f"{generation}.embedder", embedder_state)
+            for position, (name, store) in enumerate(self._stores.items()):
+                vectors_file = f"{position}-{generation}.f32"
+                records_file = f"{position}-{generation}.jsonl"
+                live = store.live_rows
+                vectors = store.vectors
+                with open(target / vectors_file, "wb") as handle:
+                    # Block by block, so rows kept on disk or only as codes are never gathered in memory at once.
+                    for start in range(0, live.size, ROW_BLOCK_SIZE):
+                        block = vectors[live[start : start + ROW_BLOCK_SIZE]]
+                        np.ascontiguousarray(block, dtype=np.float32).tofile(handle)
+                with open(target / records_file, "w", encoding="utf-8") as handle:
+                    for row in live:
+                        record = {
+                            "id": store.ids[row],
+                            "text": store.documents[row],
+                            "metadata": store.metadatas[row],
+                        }
+                        handle.write(json.dumps(record) + "\n")
+                prefix = f"{position}-{generation}"
+                manifest["indexes"][name] = {
+                    "rows": int(live.size),
+                    "dimensions": store.dimensions,
+                    "vectors": vectors_file,
+                    "records": records_file,
+                    "index": self.index_overrides.get(name, self.index_config),
+                    "ann": _write_state(target, f"{prefix}.ann", store.ann.state(live) if store.ann else None),
+                    "quantizer": _write_state(
+                        target, f"{prefix}.quantizer", store.quantizer.state(live) if store.quantizer else None
+                    ),
+                }
+        staging = target / f"{MANIFEST_NAME}.{generation}.tmp"
+        staging.write_text(json.dumps(manifest, indent=2))
+        os.replace(staging, target / MANIFEST_NAME)
+
+        referenced = {MANIFEST_NAME}
+        records = [manifest["embedder"]]
+        for entry in manifest["indexes"].values():
+            referenced.update((entry["vectors"], entry["records"]))
+            records.extend((entry["ann"], entry["quantizer"]))
+        for record in records:
+            referenced.update(record["arrays"].values() if record else ())
+        for stale in target.iterdir():
+            if stale.name not in referenced and stale.suffix in {".f32", ".jsonl", ".npy"}:
+                # Unlinking is safe for readers: existing memory maps outlive the directory entry.
+                stale.unlink(missing_ok=True)
+
+    def load(self, directory: str, fingerprint: Optional[str] = None) -> bool:
+        """
+        Replace the in-memory indexes with the ones saved in ``directory``.
+
+        Matrices are opened as read-only ``np.memmap`` views, so loading does not
+        copy or re-embed vectors and concurrent processes share the OS page
+        cache. Saved ANN and quantizer states are mapped the same way when the
+        index config still matches; otherwise those structures are rebuilt.
+        Returns ``False`` (leaving the store untouched) when no manifest exists
+        or its fingerprint differs from ``fingerprint``.
+        """
+
+        manifest_path = Path(directory) / MANIFEST_NAME
+        if not manifest_path.exists():
+            return False
+        manifest = json.loads(manifest_path.read_text())
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("fingerprint") != fingerprint:
+            return False
+
+        stores: Dict[str, _VectorIndex] = {}
+        for name, entry in manifest["indexes"].items():
+            shape = (entry["rows"], entry["dimensions"])
+            matrix = (
+                np.memmap(Path(directory) / entry["vectors"], dtype=np.float32, mode="r", shape=shape)
+                if entry["rows"]
+                else np.zeros(shape, dtype=np.float32)
+            )
+            ids, documents, metadatas = [], [], []
+            with open(Path(directory) / entry["records"], encoding="utf-8") as handle:
+                for line in handle:
+                    record = json.loads(line)
+                    ids.append(record.get("id") or uuid.uuid4().hex)
+                    documents.append(record["text"])
+                    metadatas.append(record["metadata"])
+            stores[name] = self._new_store(name, entry["dimensions"])
+            ann_state = quantizer_state = None
+            if entry.get("index") == json.loads(json.dumps(self.index_overrides.get(name, self.index_config))):
+                ann_state = _read_state(Path(directory), entry.get("ann"))
+                quantizer_state = _read_state(Path(directory), entry.get("quantizer"))
+            stores[name].restore(matrix, ids, documents, metadatas, ann_state, quantizer_state)
+        embedder_state = _read_state(Path(directory), manifest.get("embedder"))
+        load_state = getattr(self.embedder, "load_state", None)
+        if embedder_state is not None and load_state is not None:
+            # Ingest statistics (e.g. IDF) saved with the rows, so queries are weighted like them.
+            load_state(embedder_state)
+        with self._write_lock:
+            self._stores = stores
+            self._publish()
+        return True
 
     def reset(self) -> None:
         """
         Clear all stored vectors and documents.
         """
 
-        self._stores = {}
+        with self._write_lock:
+            self._stores = {}
+            self._publish()
+
+    def close(self) -> None:
+        """
+        Release the sharded-search worker pool and its shared memory, if any.
+        """
+
+        if self._sharded is not None:
+            self._sharded.close()